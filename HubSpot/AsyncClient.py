@@ -0,0 +1,53 @@
+from typing import List
+
+from .AsyncInterface import AsyncInterface
+from .CRM.AsyncCRM import AsyncCRM
+from .CRM.Schema import SchemaRegistry
+from .Files import Files
+from .Metrics import Instrument
+from .Retry import RetryPolicy
+
+
+class AsyncClient:
+    def __init__(self, access_token: str, rate_limit: int = 10, rate_window: float = 1.0, burst: int = None,
+                 retry_policy: RetryPolicy = None, max_concurrency: int = 10, schemas: SchemaRegistry = None,
+                 instruments: List[Instrument] = None):
+        """
+        The asyncio counterpart of Client.  Requires aiohttp.
+
+        :param access_token: App Access token
+        :param rate_limit: The Number of requests allowed per rate_window, shared by every task
+        :param rate_window: The length of the rate limit window in seconds
+        :param burst: The Number of requests that may be made back to back.  Defaults to rate_limit
+        :param retry_policy: How rate limited (429) and server error (5xx) responses are retried
+        :param max_concurrency: The Number of requests that may be in flight at once
+        :param schemas: Holds the property schema of each object type.  Kept between runs in the user's cache
+                        directory, a file per access token, if not given.  Pass SchemaRegistry() to hold them in memory
+                        only
+        :param instruments: Receive an event for every call made, e.g. a MetricsAggregator
+        """
+
+        interface = AsyncInterface(
+            access_token=access_token,
+            base_url="https://api.hubspot.com",
+            rate_limit=rate_limit,
+            rate_window=rate_window,
+            burst=burst,
+            retry_policy=retry_policy,
+            max_concurrency=max_concurrency,
+            instruments=instruments
+        )
+        self.interface = interface
+        self.crm = AsyncCRM(interface, schemas if schemas is not None else SchemaRegistry.for_token(access_token))
+        self.files = Files(interface)
+
+    async def close(self):
+        """ Closes the underlying HTTP session """
+
+        await self.interface.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
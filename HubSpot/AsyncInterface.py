@@ -0,0 +1,256 @@
+import asyncio
+import json
+import logging
+from time import perf_counter
+from typing import Any, AsyncIterator, Callable, Dict, Generator, List, Mapping, Union
+
+from requests import HTTPError
+
+from .Metrics import CallEvent, Instrument, body_size, endpoint_template
+from .RateLimiter import RateLimiter, RateLimitStatus
+from .Retry import RetryPolicy, rewindable
+
+
+class AsyncResponse:
+    """ A fully read response, so it can be used after the connection has been released """
+
+    def __init__(self, url: str, status_code: int, headers: Mapping[str, str], content: bytes):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def __repr__(self):
+        return f"<AsyncResponse [{self.status_code}]>"
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+
+class AsyncInterface:
+    """
+    The asyncio counterpart of Interface, built on aiohttp.
+
+    Every task using the interface shares one rate limiter, and at most max_concurrency requests are in flight at once.
+    """
+
+    def __init__(self, access_token: str, base_url: str, rate_limit=10, rate_window: float = 1.0, burst: int = None,
+                 retry_policy: RetryPolicy = None, max_concurrency: int = 10, rate_limiter: RateLimiter = None,
+                 instruments: List[Instrument] = None):
+        self.refresh_token = None
+        self.auth_header = {"Authorization": f"Bearer {access_token}"}
+        self.default_headers = {
+            "Content-Type": "Application/JSON",
+            **self.auth_header
+        }
+        self.base_url = base_url
+        self.rate_limit = rate_limit
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter(rate_limit, rate_window, burst)
+        self.rate_limit_status = RateLimitStatus()
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.max_concurrency = max_concurrency
+        self.instruments: List[Instrument] = list(instruments or [])
+        self._session = None
+        self._semaphore = None
+
+    @property
+    def remaining(self):
+        """ The Number of requests HubSpot reported as left in the current interval, or None if not yet known """
+
+        return self.rate_limit_status.remaining
+
+    @property
+    def session(self):
+        # aiohttp sessions and semaphores have to be created inside the running event loop
+        if self._session is None or self._session.closed:
+            try:
+                import aiohttp
+            except ImportError:
+                raise Exception("The AsyncClient requires aiohttp.  Install it with pip install HubSpot[async]")
+
+            self._session = aiohttp.ClientSession(headers=self.auth_header)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    @staticmethod
+    def _params(params: Dict) -> list:
+        # aiohttp only takes strings, and repeats a key for each item of a list as requests does
+        pairs = []
+        for key, value in (params or {}).items():
+            for item in value if isinstance(value, (list, tuple)) else [value]:
+                pairs.append((key, str(item)))
+
+        return pairs
+
+    @staticmethod
+    def _form(files: Dict):
+        import aiohttp
+
+        form = aiohttp.FormData()
+        for key, value in files.items():
+            if isinstance(value, tuple):
+                form.add_field(key, value[1], filename=value[0])
+            elif isinstance(value, (bytes, bytearray)) or hasattr(value, "read"):
+                form.add_field(key, value, filename=getattr(value, "name", key))
+            else:
+                form.add_field(key, str(value))
+
+        return form
+
+    def _observe(self, response: AsyncResponse):
+        if self.rate_limit_status.update(response.headers):
+            self.rate_limiter.observe(self.rate_limit_status)
+
+    @staticmethod
+    async def _stream(body) -> AsyncIterator[bytes]:
+        loop = asyncio.get_running_loop()
+        while True:
+            # Reading from disk happens off the event loop
+            chunk = await loop.run_in_executor(None, body.read, 1 << 16)
+            if not chunk:
+                return
+
+            yield chunk
+
+    def _body(self, data: Any, files: Dict, headers: Dict) -> Any:
+        if files is not None:
+            return self._form(files)
+
+        if hasattr(data, "read"):
+            if getattr(data, "len", None) is not None:
+                headers["Content-Length"] = str(data.len)
+
+            return self._stream(data)
+
+        return data
+
+    def _start(self, endpoint: str, method: str, data: Any) -> CallEvent:
+        event = CallEvent(endpoint_template(endpoint), method, endpoint, request_bytes=body_size(data))
+        for instrument in self.instruments:
+            instrument.request(event)
+
+        return event
+
+    def _finish(self, event: CallEvent, start: float):
+        event.total = perf_counter() - start
+        for instrument in self.instruments:
+            instrument.response(event)
+
+    async def _call(self, endpoint: str, method: str, event: CallEvent, params: Dict = None, data: Any = None,
+                    files: Dict = None, headers: Dict = None) -> AsyncResponse:
+        logging.debug(f"callling ({method}) {endpoint}")
+
+        session = self.session
+        url = f"{self.base_url}{endpoint}"
+        default_headers = {} if files is not None else {"Content-Type": self.default_headers["Content-Type"]}
+        headers = {**default_headers, **(headers or {})}
+
+        attempt = 0
+        while True:
+            delay = self.rate_limiter.reserve()
+            if delay:
+                await asyncio.sleep(delay)
+                event.limiter_wait += delay
+
+            async with self._semaphore:
+                sent = perf_counter()
+                async with session.request(method, url, params=self._params(params), headers=headers,
+                                           data=self._body(data, files, headers)) as raw:
+                    response = AsyncResponse(url, raw.status, raw.headers, await raw.read())
+                event.latency += perf_counter() - sent
+                event.status = response.status_code
+                event.response_bytes += len(response.content)
+
+            self._observe(response)
+
+            if not self.retry_policy.should_retry(response.status_code, attempt, method, endpoint):
+                break
+
+            if not rewindable(data):
+                # The stream was used up by the failed attempt, so the error it got is the one to raise
+                logging.debug(f"({method}) {endpoint} returned {response.status_code}, its body can't be sent again")
+                break
+
+            delay = self.retry_policy.delay(attempt, response.headers)
+            logging.debug(f"({method}) {endpoint} returned {response.status_code}, retrying in {delay:.2f}s")
+            attempt += 1
+            event.retries = attempt
+            if response.status_code == 429:
+                # Every task sharing the limiter backs off, not just this one
+                self.rate_limiter.pause(delay)
+            else:
+                await asyncio.sleep(delay)
+                event.retry_wait += delay
+
+            if hasattr(data, "seek"):
+                # Streamed bodies were used up by the failed attempt
+                data.seek(0)
+
+        if response.status_code >= 400:
+            logging.error(f"({method}) {endpoint} returned {response.status_code}: {response.content[:1000]!r}")
+        response.raise_for_status()
+
+        return response
+
+    async def _send(self, endpoint: str, method: str, handler: Union[Callable[[AsyncResponse], Any], None],
+                    **kwargs) -> Any:
+        # Taken for the same calls as the Interface, but there are no lanes to send them through, and aiohttp's own
+        # timeouts are used
+        kwargs.pop("priority", None)
+        kwargs.pop("timeout", None)
+
+        start = perf_counter()
+        event = self._start(endpoint, method, kwargs.get("data"))
+        try:
+            response = await self._call(endpoint, method, event, **kwargs)
+
+            return event.handle(response, handler) if handler is not None else response
+        except Exception as e:
+            event.error = type(e).__name__
+            raise
+        finally:
+            self._finish(event, start)
+
+    async def call(self, endpoint: str, method: str = "GET", **kwargs) -> AsyncResponse:
+        return await self._send(endpoint, method, None, **kwargs)
+
+    @staticmethod
+    async def run(steps: Generator) -> Any:
+        """
+        Runs an operation of several calls written as a generator, awaiting each call it yields and sending the result
+        back in.  An exception raised by a call is thrown into the generator, as it would be on the Interface.  See
+        Interface.run
+
+        :return: whatever the generator returns
+        """
+
+        value, error = None, None
+        while True:
+            try:
+                step = steps.throw(error) if error is not None else steps.send(value)
+            except StopIteration as stop:
+                return stop.value
+
+            try:
+                value, error = await step, None
+            except Exception as e:
+                value, error = None, e
+
+    async def call_then(self, endpoint: str, handler: Callable[[AsyncResponse], Any], method: str = "GET",
+                        **kwargs) -> Any:
+        """
+        Calls the endpoint and passes the response to the handler
+
+        :return: whatever the handler returns
+        """
+
+        return await self._send(endpoint, method, handler, **kwargs)
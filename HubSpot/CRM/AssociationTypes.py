@@ -0,0 +1,188 @@
+from threading import Lock
+from time import time
+from typing import Any, Dict, Generator, List, Tuple, Union
+
+from .HSObjects import ASSOCIATION_MATRIX, _hs_engagement
+from ..Files.File import File
+
+DEFINERS = frozenset(("HUBSPOT_DEFINED", "USER_DEFINED", "INTEGRATOR_DEFINED"))
+
+# {(from class, to class): type ID} of the HubSpot defined association types.  Where a pair has two types (company to
+# company is parent to child, then child to parent) the first is the default
+HUBSPOT_DEFINED_TYPES: Dict[Tuple[type, type], int] = dict()
+for _type_id, _pair in enumerate(ASSOCIATION_MATRIX, start=1):
+    if _pair != (None, None):
+        HUBSPOT_DEFINED_TYPES.setdefault(_pair, _type_id)
+
+HUBSPOT_DEFINED_TYPE_IDS = frozenset(type_id for type_id, pair in enumerate(ASSOCIATION_MATRIX, start=1)
+                                     if pair != (None, None))
+
+
+def association_class(hs_object) -> type:
+    """ The class an object is associated as: engagements and files share one, records stand in for their class """
+
+    hs_class = getattr(hs_object, "hs_class", hs_object.__class__)
+    if isinstance(hs_object, File) or issubclass(hs_class, _hs_engagement):
+        return _hs_engagement
+
+    return hs_class
+
+
+class _Labels:
+    """ The association types of one pair of object types, indexed for lookups """
+
+    def __init__(self, results: List[Dict]):
+        self.results = results
+        self.fetched = time()
+        self.type_ids = {result["typeId"]: result.get("category", "USER_DEFINED") for result in results}
+        self.by_label = dict()
+        for result in results:
+            if result.get("label"):
+                self.by_label.setdefault(result["label"].casefold(), (result.get("category", "USER_DEFINED"),
+                                                                      result["typeId"]))
+
+
+class AssociationTypeResolver:
+    """
+    Works out the association type to send when associating two objects.
+
+    HubSpot defined types are looked up locally.  The labels defined in the portal are fetched from HubSpot the first
+    time a label is used for a pair of object types, and kept for ttl seconds, so types can be given by label:
+
+        resolver.resolve(deal, company, "USER_DEFINED", "Primary reseller")
+    """
+
+    def __init__(self, interface, base_url: str, ttl: float = 3600):
+        """
+        :param interface: The interface to fetch labels with
+        :param base_url: The base url of the CRM api
+        :param ttl: The Number of seconds the labels of a pair of object types are kept for
+        """
+
+        self.interface = interface
+        self.base_url = base_url
+        self.ttl = ttl
+        self._labels: Dict[Tuple[str, str], _Labels] = dict()
+        self._lock = Lock()
+
+    @staticmethod
+    def _object_type(hs_object) -> str:
+        return getattr(hs_object, "object_type", "files")
+
+    def _fetch(self, from_type: str, to_type: str) -> List[Dict]:
+        return self.interface.call_then(f"{self.base_url}/v4/associations/{from_type}/{to_type}/labels",
+                                        lambda response: response.json()["results"])
+
+    def _cached(self, from_type: str, to_type: str) -> Union[_Labels, None]:
+        with self._lock:
+            labels = self._labels.get((from_type, to_type))
+
+        if labels is None or labels.fetched + self.ttl <= time():
+            return None
+
+        return labels
+
+    def labels(self, from_type: str, to_type: str) -> List[Dict]:
+        """
+        :param from_type: The object type associated from
+        :param to_type: The object type associated to
+
+        :return: The association types HubSpot has for the pair, as {"category", "typeId", "label"}.  Fetched if not
+                 held
+        """
+
+        return self.interface.run(self._results(from_type, to_type))
+
+    def _results(self, from_type: str, to_type: str) -> Generator[Any, Any, List[Dict]]:
+        return (yield from self._loading(from_type, to_type)).results
+
+    def _loading(self, from_type: str, to_type: str) -> Generator[Any, Any, _Labels]:
+        """ The labels of the pair, fetched if not held.  Steps for interface.run """
+
+        labels = self._cached(from_type, to_type)
+        if labels is None:
+            labels = _Labels((yield self._fetch(from_type, to_type)))
+            with self._lock:
+                self._labels[(from_type, to_type)] = labels
+
+        return labels
+
+    def invalidate(self, from_type: str = None, to_type: str = None):
+        """ Forgets the labels of a pair of object types, or of every pair, e.g. after adding a label """
+
+        with self._lock:
+            if from_type is None:
+                self._labels.clear()
+            else:
+                self._labels.pop((from_type, to_type), None)
+
+    def resolve(self, hs_obj_1, hs_obj_2, definer: str = "HUBSPOT_DEFINED",
+                association_type: Union[int, str, None] = None) -> Tuple[str, int]:
+        """
+        :param hs_obj_1: The object associated from
+        :param hs_obj_2: The object associated to
+        :param definer: Who defined the association type, one of HUBSPOT_DEFINED, USER_DEFINED or INTEGRATOR_DEFINED
+        :param association_type: The type ID, or the label of a type defined in the portal, in which case the definer
+                                 is taken from the label.  Defaults to the HubSpot defined type for the pair
+
+        :return: (definer, type ID)
+        """
+
+        return self.interface.run(self._resolving(hs_obj_1, hs_obj_2, definer, association_type))
+
+    def _resolving(self, hs_obj_1, hs_obj_2, definer: str, association_type: Union[int, str, None]
+                   ) -> Generator[Any, Any, Tuple[str, int]]:
+        """ Steps for interface.run.  Only a label needs a call, to fetch the labels of the pair if they aren't held """
+
+        labels = None
+        if isinstance(association_type, str):
+            labels = yield from self._loading(self._object_type(hs_obj_1), self._object_type(hs_obj_2))
+
+        return self._resolve(hs_obj_1, hs_obj_2, definer, association_type, labels)
+
+    def _resolve(self, hs_obj_1, hs_obj_2, definer: str, association_type: Union[int, str, None],
+                 labels: Union[_Labels, None]) -> Tuple[str, int]:
+        """
+        Resolves as resolve does, without calling HubSpot
+
+        :param labels: The labels of the pair of object types, as loaded by _loading.  Needed when association_type
+                       is a label
+
+        :return: (definer, type ID)
+        """
+
+        definer = definer.upper()
+        if definer not in DEFINERS:
+            raise Exception("bad definer")
+
+        if isinstance(association_type, str):
+            from_type, to_type = self._object_type(hs_obj_1), self._object_type(hs_obj_2)
+            found = labels.by_label.get(association_type.casefold())
+            if found is None:
+                raise Exception(f"No association label {association_type!r} from {from_type} to {to_type}")
+
+            return found
+
+        if association_type is None:
+            if definer != "HUBSPOT_DEFINED":
+                raise Exception(f"An association type is needed with definer {definer}")
+
+            pair = (association_class(hs_obj_1), association_class(hs_obj_2))
+            association_type = HUBSPOT_DEFINED_TYPES.get(pair)
+            if association_type is None:
+                raise Exception(f"HubSpot has no default association type from {pair[0].__name__} to "
+                                f"{pair[1].__name__}")
+
+            return definer, association_type
+
+        # Checked against the portal's types only if they are already held, so no call is made
+        labels = self._cached(self._object_type(hs_obj_1), self._object_type(hs_obj_2))
+        if definer == "HUBSPOT_DEFINED":
+            known = labels is not None and labels.type_ids.get(association_type) == definer
+            if association_type not in HUBSPOT_DEFINED_TYPE_IDS and not known:
+                raise Exception("Can not use non hubspot defined association types with definer HUBSPOT_DEFINED")
+        elif labels is not None and association_type not in labels.type_ids:
+            raise Exception(f"No {definer} association type {association_type} from "
+                            f"{self._object_type(hs_obj_1)} to {self._object_type(hs_obj_2)}")
+
+        return definer, association_type
@@ -1,26 +1,59 @@
 import json
-from typing import NoReturn, Union
+from typing import Any, Dict, Generator, Iterable, List, NoReturn, Tuple, Type, Union
 
-from .HSObjects import ASSOCIATION_MATRIX, _hs_engagement
+from requests import HTTPError
+
+from .AssociationTypes import AssociationTypeResolver
 from ..Interface import Interface
 from ..Files.File import File
 from .HSObjects import HubSpotObject
+from .Batch import BATCH_SIZE, BatchError, BatchResult, chunked
+from .Graph import AssociationIndex
+
+# HubSpot reads the associations of up to 1000 objects per batch read call
+READ_BATCH_SIZE = 1000
 
 
 class Associations:
+    type_resolver_class = AssociationTypeResolver
+
     def __init__(self, interface: Interface, base_url: str):
         self.interface = interface
         self.base_url = base_url
+        self.types = self.type_resolver_class(interface, base_url)
+        # Set by the CRM, so read_many can fetch the associated objects
+        self.hs_factory = None
 
     @staticmethod
-    def _association_class(hs_object):
-        if isinstance(hs_object, _hs_engagement) or isinstance(hs_object, File):
-            return _hs_engagement
+    def _object_type(hs_object) -> str:
+        return getattr(hs_object, 'object_type', 'files')
+
+    def _association_type(self, hs_obj_1, hs_obj_2, definer: str, association_type: Union[int, str, None]
+                          ) -> Generator[Any, Any, Tuple[str, int]]:
+        """
+        Validates the definer and association type, defaulting the type to the HubSpot defined one.  Steps for
+        interface.run, fetching the labels of the pair when the type is given by label
+
+        :return: (definer, association type)
+        """
 
-        return hs_object.__class__
+        return (yield from self.types._resolving(hs_obj_1, hs_obj_2, definer, association_type))
+
+    def labels(self, from_class: Union[Type[HubSpotObject], str], to_class: Union[Type[HubSpotObject], str]
+               ) -> List[Dict]:
+        """
+        :param from_class: The HubSpot Object class, or object type, associated from
+        :param to_class: The HubSpot Object class, or object type, associated to
+
+        :return: The association types defined for the pair, as {"category", "typeId", "label"}.  Fetched from HubSpot
+                 the first time and held for an hour
+        """
+
+        return self.types.labels(getattr(from_class, "object_type", from_class),
+                                 getattr(to_class, "object_type", to_class))
 
     def create_association(self, hs_obj_1: Union[HubSpotObject, File], hs_obj_2: Union[HubSpotObject, File],
-                           definer: str = "HUBSPOT_DEFINED", association_type: int = None) -> NoReturn:
+                           definer: str = "HUBSPOT_DEFINED", association_type: Union[int, str] = None) -> NoReturn:
         """
         Associates 2 objects together in hubspot.
 
@@ -28,8 +61,8 @@ class Associations:
         :param hs_obj_2: one of the HubSpot Object or File to associate
         :param definer: Who defined the association type? can be one of HUBSPOT_DEFINED, USER_DEFINED, or
                         INTEGRATOR_DEFINED
-        :param association_type: The type of association to use.  Useful for custom Association Types or reverse the way
-                                 companies are associated.
+        :param association_type: The type of association to use, by ID or by the label defined in HubSpot.  Useful
+                                 for custom Association Types or reverse the way companies are associated.
 
         :return: Associated Response
 
@@ -37,27 +70,11 @@ class Associations:
             https://legacydocs.hubspot.com/docs/methods/crm-associations/crm-associations-overview
         """
 
-        definer = definer.upper()
-        if definer not in ("HUBSPOT_DEFINED", "USER_DEFINED", "INTEGRATOR_DEFINED"):
-            raise Exception("bad definer")
-
-        association_type_ids = list(range(1, 29))
-        for bad_association_id in {21, 22, 23, 24}:
-            association_type_ids.pop(bad_association_id)
+        return self.interface.run(self._create(hs_obj_1, hs_obj_2, definer, association_type))
 
-        hubspot_defined_conditions = (
-            definer == "HUBSPOT_DEFINED",
-            association_type is not None,
-            association_type not in association_type_ids
-        )
-        if all(hubspot_defined_conditions):
-            raise Exception("Can not use non hubspot defined association types with definer HUBSPOT_DEFINED")
-
-        if association_type is None and definer == "HUBSPOT_DEFINED":
-            association = (self._association_class(hs_obj_1),
-                           self._association_class(hs_obj_2))
-            association_type = ASSOCIATION_MATRIX.index(association)
-            association_type += 1
+    def _create(self, hs_obj_1, hs_obj_2, definer: str, association_type: Union[int, str, None]
+                ) -> Generator[Any, Any, Dict]:
+        definer, association_type = yield from self._association_type(hs_obj_1, hs_obj_2, definer, association_type)
 
         url = (f"{self.base_url}/v4/objects/{getattr(hs_obj_1, 'object_type', 'files')}/{hs_obj_1.hs_id}"
                f"/associations/{getattr(hs_obj_2, 'object_type', 'files')}/{hs_obj_2.hs_id}")
@@ -66,9 +83,7 @@ class Associations:
             "associationTypeId": association_type
         }])
 
-        response = self.interface.call(url, method="put", data=data)
-
-        return response.json()
+        return (yield self.interface.call_then(url, lambda response: response.json(), method="put", data=data))
 
     def remove_association(self, hs_obj_1: Union[HubSpotObject, File], hs_obj_2: Union[HubSpotObject, File]
                            ) -> NoReturn:
@@ -84,4 +99,333 @@ class Associations:
         url = (f"{self.base_url}/v4/objects/{hs_obj_1.object_type}/{hs_obj_1.hs_id}"
                f"/associations/{hs_obj_2.object_type}/{hs_obj_2.hs_id}")
 
-        response = self.interface.call(url, method="delete")
+        return self.interface.call_then(url, lambda response: None, method="delete")
+
+    def _batch(self, action: str, associations: Iterable[Tuple], payload,
+               batch_size: int) -> Generator[Any, Any, BatchResult]:
+        """
+        Groups the associations by object type pair and sends them to the v4 batch endpoint in chunks.  Steps for
+        interface.run
+
+        :param action: The batch action, one of create or archive
+        :param associations: (object 1, object 2, ...) for each association
+        :param payload: Builds the input sent to HubSpot for an association
+        :param batch_size: The Number of associations per call
+
+        :return: a BatchResult holding True for each association that succeeded, in the order they were given
+        """
+
+        associations = list(associations)
+        result = BatchResult(results=[None] * len(associations))
+
+        groups = dict()
+        for index, association in enumerate(associations):
+            try:
+                pair = (self._object_type(association[0]), self._object_type(association[1]))
+                item = (index, association, payload(association))
+            except Exception as e:
+                result.errors.append(BatchError(index, association, str(e), "VALIDATION_ERROR"))
+                continue
+
+            groups.setdefault(pair, []).append(item)
+
+        for (from_type, to_type), items in groups.items():
+            url = f"{self.base_url}/v4/associations/{from_type}/{to_type}/batch/{action}"
+
+            for chunk in chunked(items, batch_size):
+                data = json.dumps({"inputs": [item_payload for _, _, item_payload in chunk]})
+
+                try:
+                    response = yield self.interface.call(url, method="POST", data=data)
+                except HTTPError as e:
+                    try:
+                        error = e.response.json()
+                    except Exception:
+                        error = {"message": str(e)}
+
+                    for index, association, _ in chunk:
+                        result.errors.append(BatchError(index, association, error.get("message", str(e)),
+                                                        error.get("category"), error.get("context", {})))
+                    continue
+
+                response = response.json() if response.content else {}
+                self._line_up(chunk, response, result)
+
+        return result
+
+    @staticmethod
+    def _context_ids(context: Dict, *names: str) -> set:
+        ids = set()
+        for name in names:
+            value = context.get(name, [])
+            ids.update(str(item) for item in (value if isinstance(value, list) else [value]))
+
+        return ids
+
+    @classmethod
+    def _line_up(cls, chunk: List[Tuple], response: Dict, result: BatchResult):
+        """
+        Fills in the results and errors of one chunk.  Each error goes to the associations its context names; an error
+        naming none goes only to the associations HubSpot didn't report as done
+        """
+
+        pairs = {index: (str(association[0].hs_id), str(association[1].hs_id)) for index, association, _ in chunk}
+        associations = {index: association for index, association, _ in chunk}
+        done = {(str(hs_data["fromObjectId"]), str(hs_data["toObjectId"])) for hs_data in response.get("results", [])
+                if "fromObjectId" in hs_data and "toObjectId" in hs_data}
+
+        failed = dict()
+        unattributed = []
+        for error in response.get("errors", []):
+            context = error.get("context", {})
+            from_ids = cls._context_ids(context, "fromObjectId", "fromObjectIds", "ids")
+            to_ids = cls._context_ids(context, "toObjectId", "toObjectIds")
+
+            indexes = [index for index, (from_id, to_id) in pairs.items()
+                       if (from_ids or to_ids) and (not from_ids or from_id in from_ids) and
+                       (not to_ids or to_id in to_ids)]
+            if not indexes:
+                unattributed.append(error)
+
+            for index in indexes:
+                failed.setdefault(index, error)
+
+        for index, pair in pairs.items():
+            error = failed.get(index)
+            if error is None and unattributed and pair not in done:
+                error = unattributed[0] if len(unattributed) == 1 else {
+                    "message": " | ".join(error.get("message", "") for error in unattributed),
+                    "category": unattributed[0].get("category")
+                }
+
+            if error is None:
+                result.results[index] = True
+            else:
+                result.errors.append(BatchError(index, associations[index], error.get("message", ""),
+                                                error.get("category"), error.get("context", {})))
+
+    def batch_create(self, associations: Iterable[Tuple], definer: str = "HUBSPOT_DEFINED",
+                     batch_size: int = BATCH_SIZE) -> BatchResult:
+        """
+        Associates many pairs of objects together in hubspot, sending up to batch_size associations per call for each
+        pair of object types.
+
+        :param associations: (object 1, object 2) or (object 1, object 2, association type) for each association.  The
+                             association type, an ID or label, defaults to the HubSpot defined type, as in
+                             create_association
+        :param definer: Who defined the association types? can be one of HUBSPOT_DEFINED, USER_DEFINED, or
+                        INTEGRATOR_DEFINED
+        :param batch_size: The Number of associations per call.  HubSpot allows up to 100
+
+        :return: a BatchResult holding True for each association created, in the order they were given
+        """
+
+        return self.interface.run(self._batch_create(associations, definer, batch_size))
+
+    def _batch_create(self, associations: Iterable[Tuple], definer: str, batch_size: int
+                      ) -> Generator[Any, Any, BatchResult]:
+        """
+        Fetches the labels of each pair of object types given a label, once, then creates the associations.  Steps
+        for interface.run
+        """
+
+        associations = list(associations)
+
+        # {(from type, to type): labels, or the exception fetching them failed with}
+        labels = dict()
+        for association in associations:
+            if len(association) < 3 or not isinstance(association[2], str):
+                continue
+
+            pair = (self._object_type(association[0]), self._object_type(association[1]))
+            if pair not in labels:
+                try:
+                    labels[pair] = yield from self.types._loading(*pair)
+                except Exception as e:
+                    labels[pair] = e
+
+        def payload(association):
+            hs_obj_1, hs_obj_2, association_type = (tuple(association) + (None, ))[:3]
+            pair_labels = labels.get((self._object_type(hs_obj_1), self._object_type(hs_obj_2)))
+            if isinstance(pair_labels, Exception):
+                raise pair_labels
+
+            category, association_type = self.types._resolve(hs_obj_1, hs_obj_2, definer, association_type,
+                                                              pair_labels)
+
+            return {
+                "from": {"id": str(hs_obj_1.hs_id)},
+                "to": {"id": str(hs_obj_2.hs_id)},
+                "types": [{
+                    "associationCategory": category,
+                    "associationTypeId": association_type
+                }]
+            }
+
+        return (yield from self._batch("create", associations, payload, batch_size))
+
+    def batch_remove(self, associations: Iterable[Tuple], batch_size: int = BATCH_SIZE) -> BatchResult:
+        """
+        Removes the associations between many pairs of objects in hubspot, sending up to batch_size removals per call
+        for each pair of object types.
+
+        :param associations: (object 1, object 2) for each association to remove.  Anything after the first two
+                             items is ignored
+        :param batch_size: The Number of removals per call.  HubSpot allows up to 100
+
+        :return: a BatchResult holding True for each association removed, in the order they were given
+        """
+
+        return self.interface.run(self._batch_remove(associations, batch_size))
+
+    def _batch_remove(self, associations: Iterable[Tuple], batch_size: int) -> Generator[Any, Any, BatchResult]:
+        def payload(association):
+            return {
+                "from": {"id": str(association[0].hs_id)},
+                "to": [{"id": str(association[1].hs_id)}]
+            }
+
+        return (yield from self._batch("archive", associations, payload, batch_size))
+
+    def _read(self, from_type: str, to_type: str, inputs: List[Dict]
+              ) -> Generator[Any, Any, Tuple[List[Dict], List[Dict]]]:
+        """
+        Calls the v4 batch read endpoint, following each object's paging until all its associations are read.  Steps
+        for interface.run
+
+        :return: (results, errors) with one result per object, its associations across every page in "to"
+        """
+
+        url = f"{self.base_url}/v4/associations/{from_type}/{to_type}/batch/read"
+        results: Dict[str, Dict] = dict()
+        errors = []
+
+        while inputs:
+            response = yield self.interface.call(url, method="POST", data=json.dumps({"inputs": inputs}))
+            response = response.json() if response.content else {}
+            errors += response.get("errors", [])
+
+            inputs = []
+            for hs_data in response.get("results", []):
+                from_id = str(hs_data["from"]["id"])
+                results.setdefault(from_id, {"from": {"id": from_id}, "to": []})["to"] += hs_data.get("to", [])
+
+                after = hs_data.get("paging", {}).get("next", {}).get("after")
+                if after:
+                    inputs.append({"id": from_id, "after": after})
+
+        return list(results.values()), errors
+
+    def read_many(self, from_objects: Iterable[HubSpotObject], to_class: Union[Type[HubSpotObject], str],
+                  index: AssociationIndex = None, prefetch: bool = False, properties: List = None,
+                  refresh: bool = False, batch_size: int = READ_BATCH_SIZE) -> BatchResult:
+        """
+        Reads the associations of many objects to an object type, batch_size objects per call for each object type
+        read from.  Objects without associations get an empty list.
+
+        :param from_objects: The objects to read the associations of
+        :param to_class: The HubSpot Object class, or object type, associated to
+        :param index: Records the associations, so they can be looked up both ways later.  Objects whose associations
+                      the index already holds are not read again unless refresh is set
+        :param prefetch: Fetch the associated objects with batch reads, 100 per call.  Needs a HubSpot Object class
+        :param properties: The Properties to fetch the associated objects with
+        :param refresh: Read associations the index already holds again
+        :param batch_size: The Number of objects to read the associations of per call.  HubSpot allows up to 1000
+
+        :return: A BatchResult with, for each object in input order, the IDs of the objects associated with it, or the
+                 objects themselves if prefetched.  An object is failed by any error in its call that doesn't say
+                 which objects it was for, and when prefetching by any of its associated objects that couldn't be
+                 fetched
+        """
+
+        return self.interface.run(self._read_many(from_objects, to_class, index, prefetch, properties, refresh,
+                                                  batch_size))
+
+    def _read_many(self, from_objects: Iterable[HubSpotObject], to_class: Union[Type[HubSpotObject], str],
+                   index: Union[AssociationIndex, None], prefetch: bool, properties: Union[List, None], refresh: bool,
+                   batch_size: int) -> Generator[Any, Any, BatchResult]:
+        to_type = getattr(to_class, "object_type", to_class)
+        if prefetch and (isinstance(to_class, str) or self.hs_factory is None):
+            raise Exception("Prefetching associated objects needs a HubSpot Object class and a CRM")
+
+        index = index if index is not None else AssociationIndex()
+        from_objects = list(from_objects)
+        result = BatchResult(results=[None] * len(from_objects))
+
+        groups: Dict[str, Dict[str, List[int]]] = dict()
+        for position, hs_object in enumerate(from_objects):
+            from_type = self._object_type(hs_object)
+            if not refresh and index.loaded(hs_object, to_type):
+                continue
+
+            groups.setdefault(from_type, dict()).setdefault(str(hs_object.hs_id), []).append(position)
+
+        def fail(positions: List[int], error: Dict):
+            for position in positions:
+                result.errors.append(BatchError(position, from_objects[position], error.get("message", ""),
+                                                error.get("category"), error.get("context", {})))
+
+        for from_type, positions in groups.items():
+            for chunk in chunked(list(positions), batch_size):
+                try:
+                    results, errors = yield from self._read(from_type, to_type, [{"id": from_id} for from_id in chunk])
+                except HTTPError as e:
+                    try:
+                        error = e.response.json()
+                    except Exception:
+                        error = {"message": str(e)}
+
+                    for from_id in chunk:
+                        fail(positions[from_id], {"message": str(e), **error})
+                    continue
+
+                failed: Dict[str, List[Dict]] = dict()
+                for error in errors:
+                    # HubSpot reports objects without associations as errors; they have none rather than failing
+                    if error.get("category") == "OBJECT_NOT_FOUND":
+                        continue
+
+                    from_ids = self._context_ids(error.get("context", {}), "fromObjectId", "fromObjectIds", "ids")
+                    # An error that names none of the chunk's objects could be for any of them
+                    for from_id in (from_ids & set(chunk)) or chunk:
+                        failed.setdefault(from_id, []).append(error)
+
+                read = {hs_data["from"]["id"]: hs_data["to"] for hs_data in results}
+                for from_id in chunk:
+                    if from_id in failed:
+                        for error in failed[from_id]:
+                            fail(positions[from_id], error)
+                    else:
+                        index.add(from_type, from_id, to_type,
+                                  [(to["toObjectId"], to.get("associationTypes", [])) for to in read.get(from_id, [])])
+
+        failed = {error.index for error in result.errors}
+        for position, hs_object in enumerate(from_objects):
+            if position not in failed:
+                result.results[position] = index.targets(hs_object, to_type)
+
+        if prefetch:
+            missing = list(dict.fromkeys(hs_id for hs_ids in result.results if hs_ids
+                                         for hs_id in hs_ids if index.get(to_type, hs_id) is None))
+            found = yield from self.hs_factory._batch_get(to_class, missing, properties, None, BATCH_SIZE)
+            for hs_object in found.results:
+                if hs_object is not None:
+                    index.put(hs_object)
+
+            unread: Dict[str, List[BatchError]] = dict()
+            for error in found.errors:
+                unread.setdefault(str(error.input), []).append(error)
+
+            # An object is failed by the errors of any of its associated objects that couldn't be fetched
+            for position, hs_ids in enumerate(result.results):
+                for hs_id in hs_ids or []:
+                    for error in unread.get(str(hs_id), []):
+                        fail([position], {"message": error.message, "category": error.category,
+                                          "context": error.context})
+
+            failed = {error.index for error in result.errors}
+            result.results = [[index.get(to_type, hs_id) for hs_id in hs_ids if index.get(to_type, hs_id) is not None]
+                              if hs_ids is not None and position not in failed else None
+                              for position, hs_ids in enumerate(result.results)]
+
+        return result
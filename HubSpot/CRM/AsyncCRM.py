@@ -0,0 +1,210 @@
+from pathlib import Path
+from typing import Any, AsyncGenerator, Callable, Dict, Iterable, List, Type, Union
+
+from .CRM import CRM
+from .Export import FORMATS, Exporter
+from .HSFactory import SEARCH_LIMIT, HSFactory
+from .Pager import AsyncPager
+from .Pipeline import Pipeline, PipelineFactory
+from .Query import MAX_PAGE_SIZE, Query
+from .Session import Session, current_session
+from ..Parallel import async_parallel_map, async_parallel_merge
+from ..Pool import TRANSFER_TIMEOUT
+
+
+class AsyncHSFactory(HSFactory):
+    pager_class = AsyncPager
+
+    async def _search_range(self, hs_class: Type["HubSpotObject"], filters: Dict, low: int,
+                            high: Union[int, None], compact: bool = False, typed: bool = False
+                            ) -> AsyncGenerator["HubSpotObject", None]:
+        last = None
+        while True:
+            seen = 0
+            async for hs_object in self.search(hs_class, self._range_body(filters, low, high, last), compact=compact,
+                                               typed=typed):
+                yield hs_object
+                last = hs_object.hs_id
+                seen += 1
+
+            if seen < SEARCH_LIMIT:
+                return
+
+    async def search_all(self, hs_class: Type["HubSpotObject"], filters: Dict, partitions: int = 1,
+                         max_workers: int = 1, compact: bool = False, typed: bool = False
+                         ) -> AsyncGenerator["HubSpotObject", None]:
+        """ As HSFactory.search_all, with the ranges searched at once by tasks rather than threads """
+
+        self._check_room(filters)
+        filters = {"limit": MAX_PAGE_SIZE, **filters}
+
+        total, low = await self.interface.run(self._id_bound(hs_class, filters, "ASCENDING"))
+        if low is None:
+            return
+
+        if total < SEARCH_LIMIT and partitions <= 1:
+            # Everything fits in one search
+            async for hs_object in self.search(hs_class, filters, compact=compact, typed=typed):
+                yield hs_object
+            return
+
+        _, high = await self.interface.run(self._id_bound(hs_class, filters, "DESCENDING"))
+        sources = [lambda range_low=range_low, range_high=range_high: self._search_range(hs_class, filters, range_low,
+                                                                                         range_high, compact, typed)
+                   for range_low, range_high in self._ranges(low, high, partitions)]
+
+        seen = set()
+        async for hs_object in async_parallel_merge(sources, max(max_workers, 1)):
+            if hs_object.hs_id in seen:
+                continue
+
+            seen.add(hs_object.hs_id)
+            yield hs_object
+
+
+class AsyncExporter(Exporter):
+    """
+    The asyncio counterpart of Exporter.  Pages are fetched without blocking the event loop; each batch is written to
+    the file as it fills.
+    """
+
+    async def _batches(self, hs_class: Type["HubSpotObject"], properties: Union[List, None], batch_size: int,
+                       prefetch: int) -> AsyncGenerator[List[Dict], None]:
+        fetch_page = self.hs_factory._list_fetcher(hs_class, 100, properties, timeout=TRANSFER_TIMEOUT)
+        batch = []
+        async for result in AsyncPager(fetch_page, None, None, prefetch):
+            batch.append(result)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    async def export(self, hs_class: Type["HubSpotObject"], path: Union[str, Path], format: str = "parquet",
+                     properties: List[str] = None, batch_size: int = 10000, prefetch: int = 2) -> int:
+        """
+        Writes every object of this type to a file.  See Exporter.export
+        """
+
+        if format not in FORMATS:
+            raise Exception(f"Unknown format {format}.  Must be one of {FORMATS}")
+
+        if self.schema is None or self.schema.hs_class is not hs_class:
+            self.schema = await self.hs_factory.schema(hs_class)
+
+        with self._writer(path, format, properties) as writer:
+            async for batch in self._batches(hs_class, properties, batch_size, prefetch):
+                writer.write(batch)
+
+        return writer.written
+
+
+class AsyncQuery(Query):
+    """ The Query of the AsyncClient.  Iterate it with async for to run the search """
+
+    # Searches on the AsyncClient can only be iterated with async for
+    __iter__ = None
+
+    def __aiter__(self) -> AsyncPager:
+        return self.hs_factory.search(self.hs_class, self.compile())
+
+    async def first(self) -> Union["HubSpotObject", None]:
+        """
+        :return: The first matching object, or None if nothing matches
+        """
+
+        async for hs_object in self.hs_factory.search(self.hs_class, {**self.compile(), "limit": 1}, prefetch=0):
+            return hs_object
+
+        return None
+
+
+class AsyncSession(Session):
+    """
+    The Session of the AsyncClient, run with async with.  The changes are sent when the block ends, without blocking
+    the event loop:
+
+        async with client.crm.session():
+            deal.amount = "1500"
+            await deal.associate(company)
+
+    Associating inside the block is awaited, as it is outside, though it only records the association.  flush is
+    awaited too.
+    """
+
+    def __enter__(self):
+        raise Exception("Sessions on the AsyncClient are run with async with")
+
+    async def __aenter__(self) -> "AsyncSession":
+        self._token = current_session.set(self)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        current_session.reset(self._token)
+        self._token = None
+
+        if exc_type is None:
+            await self.flush()
+
+    async def associate(self, *args, **kwargs):
+        super().associate(*args, **kwargs)
+
+    async def remove_association(self, *args, **kwargs):
+        super().remove_association(*args, **kwargs)
+
+
+class AsyncPipelineFactory(PipelineFactory):
+    async def get_all(self, hs_class: Type["HubSpotObject"]) -> AsyncGenerator["Pipeline", None]:
+        """
+        Returns an async Generator of Pipeline Objects
+
+        :return: async Generator of Pipeline Objects
+        """
+
+        url = f"{self.base_url}/{hs_class.object_type}"
+        response = await self.interface.call(url)
+
+        for result in response.json()["results"]:
+            yield Pipeline(self.interface, result, url)
+
+
+class AsyncCRM(CRM):
+    """
+    The CRM namespace of the AsyncClient.  It has the same methods as CRM; listings, searches, pipelines and parallel
+    are async generators and everything else returns an awaitable.
+    """
+
+    pipeline_factory_class = AsyncPipelineFactory
+    hs_factory_class = AsyncHSFactory
+    exporter_class = AsyncExporter
+    session_class = AsyncSession
+
+    def parallel(self, operation: Union[str, Callable], arguments: Iterable[Any], max_workers: int = 8,
+                 ordered: bool = True, return_exceptions: bool = False) -> AsyncGenerator[Any, None]:
+        """
+        Runs many operations at once as tasks, as CRM.parallel does on threads.  However many run at once, no more than
+        the interface's max_concurrency requests are in flight
+
+            async for deal in client.crm.parallel("get_object", [(DEAL, hs_id) for hs_id in hs_ids]):
+                ...
+
+        :return: an async Generator of results
+        """
+
+        return async_parallel_map(self._operation(operation), arguments, max_workers, ordered, return_exceptions)
+
+    async def query(self, hs_class: Type["HubSpotObject"], validate: bool = False) -> AsyncQuery:
+        """
+        As CRM.query, awaited, as the schema may be fetched.  Run the search with async for, or await first()
+
+            query = await client.crm.query(DEAL)
+            async for deal in query.where(amount__gt=1000):
+                ...
+
+        :return: an AsyncQuery
+        """
+
+        schema = await self.hs_factory.interface.run(self.hs_factory._query_schema(hs_class, validate))
+
+        return AsyncQuery(self.hs_factory, hs_class, schema)
@@ -0,0 +1,62 @@
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Union
+
+BATCH_SIZE = 100
+
+
+def chunked(iterable: Iterable, size: int = BATCH_SIZE) -> Iterator[List]:
+    """
+    Splits an iterable into lists of at most `size` items
+
+    :param iterable: The items to split
+    :param size: The largest chunk to return
+
+    :return: A Generator of lists
+    """
+
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+
+        yield chunk
+
+
+@dataclass
+class BatchError:
+    """ A failure for a single input of a batch call """
+    index: int
+    input: Any
+    message: str
+    category: Union[str, None] = None
+    context: Dict = field(default_factory=dict)
+
+    def __str__(self):
+        return f"<BatchError {self.index} {self.category}: {self.message}>"
+
+
+@dataclass
+class BatchResult:
+    """
+    The outcome of a batch call.
+
+    results lines up with the inputs that were given; an input that failed has None in its place and a matching entry
+    in errors.
+    """
+    results: List[Any] = field(default_factory=list)
+    errors: List[BatchError] = field(default_factory=list)
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __len__(self):
+        return len(self.results)
+
+    def __getitem__(self, index):
+        return self.results[index]
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
@@ -1,26 +1,66 @@
-from typing import Dict, Generator, NoReturn, Type
+import copy
+from pathlib import Path
+from typing import Any, Callable, Dict, Generator, Iterable, List, NoReturn, Tuple, Type, Union
 
 from .HSObjects import HubSpotObject
 from .Associations import Associations
+from .Batch import BatchResult
+from .Export import Exporter
+from .Graph import AssociationIndex
 from .HSFactory import HSFactory
+from .Pager import Pager
 from .Pipeline import Pipeline, PipelineFactory
+from .Query import Query
+from .Schema import PropertySchema, SchemaRegistry
+from .Session import Session
+from .Sync import LocalMirror, SyncEngine
+from ..Parallel import parallel_map
 
 
 class CRM:
-    def __init__(self, interface):
+    association_class = Associations
+    pipeline_factory_class = PipelineFactory
+    hs_factory_class = HSFactory
+    exporter_class = Exporter
+    session_class = Session
+
+    def __init__(self, interface, schemas: SchemaRegistry = None):
         """
         :param access_token: App Access token
+        :param schemas: Holds the property schema of each object type.  Kept in memory if not given
         """
 
         base_url = "/crm"
-        self.association = Associations(interface, base_url)
-        self.pipeline_factory = PipelineFactory(interface, base_url)
-        self.hs_factory = HSFactory(interface, self.association, base_url)
+        self.association = self.association_class(interface, base_url)
+        self.pipeline_factory = self.pipeline_factory_class(interface, base_url)
+        self.hs_factory = self.hs_factory_class(interface, self.association, base_url, schemas)
+        self.association.hs_factory = self.hs_factory
+
+    def view(self, interface) -> "CRM":
+        """
+        :return: A CRM calling HubSpot through interface, e.g. a view of this CRM's interface in another priority lane.
+                 It shares this CRM's schemas and association labels rather than fetching them again
+        """
+
+        view = copy.copy(self)
+        view.association = copy.copy(self.association)
+        view.association.interface = interface
+        # The copy keeps the labels already fetched and their lock
+        view.association.types = copy.copy(self.association.types)
+        view.association.types.interface = interface
+
+        view.pipeline_factory = copy.copy(self.pipeline_factory)
+        view.pipeline_factory.interface = interface
+
+        view.hs_factory = self.hs_factory_class(interface, view.association, self.hs_factory.base_url,
+                                                self.hs_factory.schemas)
+        view.association.hs_factory = view.hs_factory
+
+        return view
 
     # HS Objects
-    def list_objects(self, hs_class: Type[HubSpotObject], *args, **kwargs) -> Generator[Type[HubSpotObject], None, None]:
-        for hs_object in self.hs_factory.list_all(hs_class, *args, **kwargs):
-            yield hs_object
+    def list_objects(self, hs_class: Type[HubSpotObject], *args, **kwargs) -> Pager:
+        return self.hs_factory.list_all(hs_class, *args, **kwargs)
 
     def get_object(self, hs_class: Type[HubSpotObject], hs_id: int) -> HubSpotObject:
         return self.hs_factory.get(hs_class, hs_id)
@@ -28,8 +68,76 @@ class CRM:
     def new_object(self, hs_class: Type[HubSpotObject], **kwargs) -> HubSpotObject:
         return self.hs_factory.new(hs_class, **kwargs)
 
+    def batch_new(self, hs_class: Type[HubSpotObject], properties: Iterable[Dict], **kwargs) -> BatchResult:
+        """
+        Creates many objects in HubSpot, 100 per call
+
+        :param hs_class: The object type in question
+        :param properties: The Properties to create each object with
+
+        :return: A BatchResult with the created objects in input order, and the inputs that failed in errors
+        """
+
+        return self.hs_factory.batch_new(hs_class, properties, **kwargs)
+
+    def batch_get(self, hs_class: Type[HubSpotObject], hs_ids: Iterable[Union[int, str]], properties: List = None,
+                  **kwargs) -> BatchResult:
+        """
+        Gets many objects from HubSpot, 100 per call
+
+        :param hs_class: The object type in question
+        :param hs_ids: The IDs of the objects to get
+        :param properties: The Properties to return for each object
+
+        :return: A BatchResult with the objects in input order, and the IDs that failed in errors
+        """
+
+        return self.hs_factory.batch_get(hs_class, hs_ids, properties, **kwargs)
+
+    def batch_update(self, hs_class: Type[HubSpotObject], updates: Iterable[Tuple[Union[HubSpotObject, int, str], Dict]],
+                     **kwargs) -> BatchResult:
+        """
+        Updates many objects in HubSpot, 100 per call
+
+        :param hs_class: The object type in question
+        :param updates: (object or ID, properties) for each object to update
+
+        :return: A BatchResult with the updated objects in input order, and the updates that failed in errors
+        """
+
+        return self.hs_factory.batch_update(hs_class, updates, **kwargs)
+
+    def batch_archive(self, hs_class: Type[HubSpotObject], hs_objects: Iterable[Union[HubSpotObject, int, str]],
+                      **kwargs) -> BatchResult:
+        """
+        Archives many objects in HubSpot, 100 per call
+
+        :param hs_class: The object type in question
+        :param hs_objects: The objects or IDs to archive
+
+        :return: A BatchResult with True for each archived object in input order, and the objects that failed in errors
+        """
+
+        return self.hs_factory.batch_archive(hs_class, hs_objects, **kwargs)
+
+    def upsert_many(self, hs_class: Type[HubSpotObject], records: Iterable[Dict], id_property: str,
+                    **kwargs) -> BatchResult:
+        """
+        Creates or updates many objects, matched to existing objects by a unique property, 100 per call
+
+        :param hs_class: The object type in question
+        :param records: The Properties of each object, each including id_property
+        :param id_property: A property with unique values, such as email or a custom external id
+
+        :return: A BatchResult with the created or updated objects in input order, and the records that failed in errors
+
+        See HSFactory.upsert_many for more
+        """
+
+        return self.hs_factory.upsert_many(hs_class, records, id_property, **kwargs)
+
     def create_association(self, hs_obj_1: HubSpotObject, hs_obj_2: HubSpotObject, definer: str = "HUBSPOT_DEFINED",
-                           association_type: int = None) -> NoReturn:
+                           association_type: Union[int, str] = None) -> NoReturn:
         """
         Associates 2 objects together in hubspot.
 
@@ -37,8 +145,8 @@ class CRM:
         :param hs_obj_2: one of the HubSpot Object to associate
         :param definer: Who defined the association type? can be one of HUBSPOT_DEFINED, USER_DEFINED, or
                         INTEGRATOR_DEFINED
-        :param association_type: The type of association to use.  Useful for custom Association Types or reverse the way
-                                 companies are associated.
+        :param association_type: The type of association to use, by ID or by the label defined in HubSpot.  Useful
+                                 for custom Association Types or reverse the way companies are associated.
 
         :return: Associated Response
 
@@ -46,7 +154,7 @@ class CRM:
             https://legacydocs.hubspot.com/docs/methods/crm-associations/crm-associations-overview
         """
 
-        self.association.create_association(hs_obj_1, hs_obj_2, definer, association_type)
+        return self.association.create_association(hs_obj_1, hs_obj_2, definer, association_type)
 
     def remove_association(self, hs_obj_1: HubSpotObject, hs_obj_2: HubSpotObject) -> NoReturn:
         """
@@ -58,13 +166,180 @@ class CRM:
         :return: No Return
         """
 
-        self.association.remove_association(hs_obj_1, hs_obj_2)
+        return self.association.remove_association(hs_obj_1, hs_obj_2)
+
+    def association_labels(self, from_class: Type[HubSpotObject], to_class: Type[HubSpotObject]) -> List[Dict]:
+        """
+        :return: The association types defined between two object types, as {"category", "typeId", "label"}.  Held
+                 for an hour after they are first fetched
+        """
+
+        return self.association.labels(from_class, to_class)
+
+    def batch_create_association(self, associations: Iterable[Tuple], definer: str = "HUBSPOT_DEFINED",
+                                 **kwargs) -> BatchResult:
+        """
+        Associates many pairs of objects together in hubspot, 100 per call for each pair of object types
+
+        :param associations: (object 1, object 2) or (object 1, object 2, association type) for each association
+        :param definer: Who defined the association types? can be one of HUBSPOT_DEFINED, USER_DEFINED, or
+                        INTEGRATOR_DEFINED
+
+        :return: A BatchResult with True for each association created in input order, and the failures in errors
+        """
+
+        return self.association.batch_create(associations, definer, **kwargs)
+
+    def batch_remove_association(self, associations: Iterable[Tuple], **kwargs) -> BatchResult:
+        """
+        Removes the associations between many pairs of objects in hubspot, 100 per call for each pair of object types
+
+        :param associations: (object 1, object 2) for each association to remove
+
+        :return: A BatchResult with True for each association removed in input order, and the failures in errors
+        """
+
+        return self.association.batch_remove(associations, **kwargs)
+
+    def read_associations(self, from_objects: Iterable[HubSpotObject], to_class: Type[HubSpotObject],
+                          index: AssociationIndex = None, **kwargs) -> BatchResult:
+        """
+        Reads the associations of many objects to an object type, 1000 objects per call for each object type
+
+        :param from_objects: The objects to read the associations of
+        :param to_class: The HubSpot Object class associated to
+        :param index: Records the associations for looking up both ways later
+
+        :return: A BatchResult with the IDs, or prefetched objects, associated with each object in input order
+
+        See Associations.read_many for more
+        """
+
+        return self.association.read_many(from_objects, to_class, index, **kwargs)
+
+    def search(self, hs_class: Type[HubSpotObject], filters: Dict, *args, **kwargs) -> Pager:
+        return self.hs_factory.search(hs_class, filters, *args, **kwargs)
+
+    def parallel(self, operation: Union[str, Callable], arguments: Iterable[Any], max_workers: int = 8,
+                 ordered: bool = True, return_exceptions: bool = False) -> Generator[Any, None, None]:
+        """
+        Runs many operations at once on a pool of threads, all sharing this CRM's connection and rate limit.
+
+        :param operation: The name of a CRM method such as get_object, the name of a HubSpot Object method such as
+                          update_hs, archive or associate, or any callable
+        :param arguments: The arguments for each operation.  A tuple is unpacked into positional arguments; for
+                          HubSpot Object methods the object comes first, e.g. (deal, {"amount": "0"}) for update_hs
+        :param max_workers: The Number of operations to run at once
+        :param ordered: Yield results in the order of the arguments.  Otherwise (index, result) is yielded as each
+                        operation finishes, where index is the position of the argument
+        :param return_exceptions: Yield the exception raised by an operation in place of its result, rather than
+                                  raising it
+
+        :return: a Generator of results
+        """
+
+        return parallel_map(self._operation(operation), arguments, max_workers, ordered, return_exceptions)
+
+    def _operation(self, operation: Union[str, Callable]) -> Callable:
+        """ The function to call for an operation given to parallel """
+
+        if callable(operation):
+            return operation
+
+        if hasattr(self, operation):
+            return getattr(self, operation)
+
+        def func(hs_object, *args):
+            return getattr(hs_object, operation)(*args)
+
+        return func
+
+    def sync(self, hs_class: Type[HubSpotObject], mirror: LocalMirror, properties: List = None) -> int:
+        """
+        Pulls every object of this type modified since the last sync into a local mirror
+
+        :param hs_class: The object type in question
+        :param mirror: The LocalMirror to keep up to date
+        :param properties: The Properties to mirror.  Only HubSpot's defaults if not given
+
+        :return: The Number of objects written to the mirror
+        """
+
+        return SyncEngine(self.hs_factory, mirror).sync(hs_class, properties)
+
+    def query(self, hs_class: Type[HubSpotObject], validate: bool = False) -> Query:
+        """
+        Starts a search query for this object type, e.g.
+            client.crm.query(DEAL).where(amount__gt=1000).select("dealname", "amount").order_by("-amount")
+
+        :param hs_class: The object type in question
+        :param validate: Fetch the schema of the object type if this run hasn't, so property names are always checked
+
+        :return: a Query.  Iterate it to run the search.  Property names are checked if the schema of the object type
+                 was fetched by this run or validate is set
+        """
+
+        schema = self.hs_factory.interface.run(self.hs_factory._query_schema(hs_class, validate))
+
+        return Query(self.hs_factory, hs_class, schema)
+
+    def session(self) -> Session:
+        """
+        Starts a unit of work.  Property changes and associations made inside
+            with client.crm.session() as session:
+        are sent together in batches when the block ends.  See Session
+
+        :return: a Session
+        """
+
+        return self.session_class(self)
+
+    def schema(self, hs_class: Type[HubSpotObject]) -> PropertySchema:
+        """
+        :param hs_class: The object type in question
+
+        :return: The properties HubSpot defines for this object type.  Fetched once and then held, after which new
+                 objects and queries of the type are checked against it before calling HubSpot
+        """
+
+        return self.hs_factory.schema(hs_class)
+
+    def search_all(self, hs_class: Type[HubSpotObject], filters: Dict, partitions: int = 1,
+                   max_workers: int = 1, compact: bool = False,
+                   typed: bool = False) -> Generator[HubSpotObject, None, None]:
+        """
+        Searches HubSpot without stopping at the 10,000 result cap of search, by splitting the query into
+        hs_object_id ranges.
+
+        :param hs_class: The object type in question
+        :param filters: The Filters for the HubSpot Class, as for search.  Any sorts are replaced
+        :param partitions: The Number of id ranges to split the query into
+        :param max_workers: The Number of ranges to search at once
+        :param compact: Build memory lean HubSpotRecords rather than HubSpot Objects
+        :param typed: Read property values as their types in the property schema
+
+        :return: a Generator of objects matching the filters, each yielded once
+        """
+
+        return self.hs_factory.search_all(hs_class, filters, partitions, max_workers, compact, typed)
+
+    def export(self, hs_class: Type[HubSpotObject], path: Union[str, Path], format: str = "parquet",
+               properties: List[str] = None, batch_size: int = 10000) -> int:
+        """
+        Writes every object of a type to a file, without building HubSpot Objects.  Only one batch is held in memory
+        at a time.  parquet and arrow need pyarrow
+
+        :param hs_class: The object type in question
+        :param path: The file to write
+        :param format: One of parquet, arrow, ndjson or csv
+        :param properties: The Properties to export.  HubSpot's defaults if not given
+        :param batch_size: The Number of objects held in memory and written at a time
+
+        :return: The Number of objects written
+        """
 
-    def search(self, hs_class: Type[HubSpotObject], filters: Dict) -> Generator[HubSpotObject, None, None]:
-        for hs_object in self.hs_factory.search(hs_class, filters):
-            yield hs_object
+        return self.exporter_class(self.hs_factory).export(hs_class, path, format, properties, batch_size)
 
     # HubSpot pipelines
     def list_pipelines(self, hs_class: Type[HubSpotObject]) -> Generator[Pipeline, None, None]:
-        for pipeline in self.pipeline_factory.get_all(hs_class):
-            yield pipeline
+        return self.pipeline_factory.get_all(hs_class)
@@ -0,0 +1,225 @@
+import csv
+from datetime import date, datetime
+import json
+from pathlib import Path
+from typing import Any, Dict, Generator, Iterable, List, Union
+
+from ..Pool import TRANSFER_TIMEOUT
+from .HSObjects import HubSpotObject
+from .Pager import Pager
+from .Schema import PropertySchema
+
+FORMATS = ("parquet", "arrow", "ndjson", "csv")
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise Exception("Exporting to parquet or arrow requires pyarrow.  Install it with pip install HubSpot[export]")
+
+    return pyarrow
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+
+    return value
+
+
+class Exporter:
+    """
+    Writes every object of a type to a file, a batch at a time.
+
+    Pages are read as HubSpot returns them and written without building HubSpot Objects, so only one batch is held in
+    memory at a time.  Values are typed using the property schema: numbers, booleans, dates and datetimes are written
+    as such to parquet, arrow and ndjson.  csv is written as HubSpot sent it.
+    """
+
+    def __init__(self, hs_factory, schema: PropertySchema = None):
+        """
+        :param hs_factory: The HSFactory to list objects with
+        :param schema: The property schema of the object type.  Taken from the HSFactory's schema registry if not given
+        """
+
+        self.hs_factory = hs_factory
+        self.schema = schema
+
+    def _batches(self, hs_class: HubSpotObject.__class__, properties: Union[List, None], batch_size: int,
+                 prefetch: int) -> Generator[List[Dict], None, None]:
+        fetch_page = self.hs_factory._list_fetcher(hs_class, 100, properties, timeout=TRANSFER_TIMEOUT)
+        batch = []
+        with Pager(fetch_page, None, None, prefetch) as pager:
+            for result in pager:
+                batch.append(result)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _columns(batch: List[Dict], properties: Union[List, None]) -> List[str]:
+        if properties is not None:
+            return list(dict.fromkeys(properties))
+
+        # HubSpot returns the same default properties for every object, so the first batch sets the columns
+        return list(dict.fromkeys(name for result in batch for name in result.get("properties", {})))
+
+    def _typed_columns(self, batch: List[Dict], columns: List[str]) -> Dict[str, List[Any]]:
+        typed = {"id": [result["id"] for result in batch]}
+        for name in columns:
+            typed[name] = self.schema.column(name, [result.get("properties", {}).get(name) for result in batch])
+
+        return typed
+
+    def _writer(self, path: Union[str, Path], format: str, properties: Union[List, None]) -> "_Writer":
+        if format == "ndjson":
+            return _NdjsonWriter(self, path, properties)
+        if format == "csv":
+            return _CsvWriter(self, path, properties)
+
+        return _ArrowWriter(self, path, properties, format)
+
+    def export(self, hs_class: HubSpotObject.__class__, path: Union[str, Path], format: str = "parquet",
+               properties: List[str] = None, batch_size: int = 10000, prefetch: int = 2) -> int:
+        """
+        Writes every object of this type to a file
+
+        :param hs_class: The object type in question
+        :param path: The file to write
+        :param format: One of parquet, arrow, ndjson or csv
+        :param properties: The Properties to export.  HubSpot's defaults if not given
+        :param batch_size: The Number of objects held in memory and written at a time
+        :param prefetch: The Number of pages to fetch ahead in the background
+
+        :return: The Number of objects written
+        """
+
+        if format not in FORMATS:
+            raise Exception(f"Unknown format {format}.  Must be one of {FORMATS}")
+
+        if self.schema is None or self.schema.hs_class is not hs_class:
+            self.schema = self.hs_factory.schema(hs_class)
+
+        with self._writer(path, format, properties) as writer:
+            for batch in self._batches(hs_class, properties, batch_size, prefetch):
+                writer.write(batch)
+
+        return writer.written
+
+
+class _Writer:
+    """ Writes batches of results to a file as they come, for both the Exporter and the AsyncExporter """
+
+    def __init__(self, exporter: Exporter, path: Union[str, Path], properties: Union[List, None]):
+        self.exporter = exporter
+        self.path = path
+        self.properties = properties
+        self.columns = None
+        self.written = 0
+
+    def write(self, batch: List[Dict]):
+        if self.columns is None:
+            self.columns = self.exporter._columns(batch, self.properties)
+            self._start()
+
+        self._write(batch)
+        self.written += len(batch)
+
+    def _start(self):
+        pass
+
+    def _write(self, batch: List[Dict]):
+        raise NotImplementedError
+
+    def close(self, finished: bool = True):
+        pass
+
+    def __enter__(self) -> "_Writer":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close(exc_type is None)
+
+
+class _NdjsonWriter(_Writer):
+    def __init__(self, exporter: Exporter, path: Union[str, Path], properties: Union[List, None]):
+        super().__init__(exporter, path, properties)
+        self.file = open(path, "w", encoding="utf-8")
+
+    def _write(self, batch: List[Dict]):
+        typed = self.exporter._typed_columns(batch, self.exporter._columns(batch, self.properties))
+        names = list(typed)
+        for row in zip(*typed.values()):
+            self.file.write(json.dumps({name: _json_value(value) for name, value in zip(names, row)}))
+            self.file.write("\n")
+
+    def close(self, finished: bool = True):
+        self.file.close()
+
+
+class _CsvWriter(_Writer):
+    def __init__(self, exporter: Exporter, path: Union[str, Path], properties: Union[List, None]):
+        super().__init__(exporter, path, properties)
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        self.writer = csv.writer(self.file)
+
+    def _start(self):
+        self.writer.writerow(["id"] + self.columns)
+
+    def _write(self, batch: List[Dict]):
+        self.writer.writerows([result["id"]] + [result.get("properties", {}).get(name) for name in self.columns]
+                              for result in batch)
+
+    def close(self, finished: bool = True):
+        self.file.close()
+
+
+class _ArrowWriter(_Writer):
+    def __init__(self, exporter: Exporter, path: Union[str, Path], properties: Union[List, None], format: str):
+        super().__init__(exporter, path, properties)
+        self.pyarrow = _pyarrow()
+        self.format = format
+        self.writer = self.arrow_schema = None
+
+    def _arrow_type(self, name: str):
+        pyarrow = self.pyarrow
+        hs_type = self.exporter.schema.type(name)
+        if hs_type == "number":
+            return pyarrow.float64()
+        if hs_type == "bool":
+            return pyarrow.bool_()
+        if hs_type == "datetime":
+            return pyarrow.timestamp("ms", tz="UTC")
+        if hs_type == "date":
+            return pyarrow.date32()
+
+        return pyarrow.string()
+
+    def _start(self):
+        pyarrow = self.pyarrow
+        self.arrow_schema = pyarrow.schema([("id", pyarrow.string())] +
+                                           [(name, self._arrow_type(name)) for name in self.columns])
+        if self.format == "parquet":
+            self.writer = pyarrow.parquet.ParquetWriter(str(self.path), self.arrow_schema)
+        else:
+            self.writer = pyarrow.ipc.new_file(str(self.path), self.arrow_schema)
+
+    def _write(self, batch: List[Dict]):
+        typed = self.exporter._typed_columns(batch, self.columns)
+        arrays = [self.pyarrow.array(values, type=self.arrow_schema.field(name).type) for name, values in typed.items()]
+        self.writer.write_batch(self.pyarrow.record_batch(arrays, schema=self.arrow_schema))
+
+    def close(self, finished: bool = True):
+        if self.writer is None and finished:
+            # No objects, but still write a file with the columns asked for
+            self.columns = list(dict.fromkeys(self.properties or []))
+            self._start()
+
+        if self.writer is not None:
+            self.writer.close()
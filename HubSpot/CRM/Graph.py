@@ -0,0 +1,200 @@
+import json
+from pathlib import Path
+import sqlite3
+from threading import Lock
+from typing import Dict, Iterable, List, Set, Tuple, Union
+
+
+class AssociationIndex:
+    """
+    The associations read from HubSpot, indexed both ways so they can be looked up without calling HubSpot again.
+
+    Associations are kept in memory, or in sqlite when given a path, which holds graphs too large for memory and keeps
+    them between runs.  Objects fetched along with the associations are only kept in memory.
+
+        index = AssociationIndex()
+        client.crm.association.read_many(deals, COMPANY, index, prefetch=True)
+        index.targets(deal, "companies")  # the IDs of the deal's companies
+        index.sources(company, "deals")   # the IDs of the deals read that are associated with the company
+    """
+
+    def __init__(self, path: Union[str, Path] = None):
+        """
+        :param path: The sqlite database to keep associations in.  Only kept in memory if not given
+        """
+
+        self.path = str(path) if path is not None else None
+        self._forward: Dict[Tuple[str, str, str], Dict[str, List[Dict]]] = dict()
+        self._reverse: Dict[Tuple[str, str, str], Set[str]] = dict()
+        self._objects: Dict[Tuple[str, str], object] = dict()
+        self._lock = Lock()
+        self._connection = None
+        if self.path is not None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            with self._connection:
+                self._connection.execute(
+                    "CREATE TABLE IF NOT EXISTS association_edges ("
+                    "from_type TEXT NOT NULL, "
+                    "from_id TEXT NOT NULL, "
+                    "to_type TEXT NOT NULL, "
+                    "to_id TEXT NOT NULL, "
+                    "types TEXT NOT NULL, "
+                    "PRIMARY KEY (from_type, from_id, to_type, to_id))"
+                )
+                self._connection.execute("CREATE INDEX IF NOT EXISTS association_edges_reverse "
+                                         "ON association_edges (to_type, to_id, from_type)")
+                self._connection.execute(
+                    "CREATE TABLE IF NOT EXISTS association_reads ("
+                    "from_type TEXT NOT NULL, "
+                    "from_id TEXT NOT NULL, "
+                    "to_type TEXT NOT NULL, "
+                    "PRIMARY KEY (from_type, from_id, to_type))"
+                )
+
+    @staticmethod
+    def _type(hs_class) -> str:
+        """ The object type of a HubSpot Object class, which may be given as the object type itself """
+
+        return getattr(hs_class, "object_type", hs_class)
+
+    def _key(self, hs_object, hs_id=None) -> Tuple[str, str]:
+        """ (object type, ID) of an object, or of an object type and ID """
+
+        if hs_id is not None:
+            return self._type(hs_object), str(hs_id)
+
+        return hs_object.object_type, str(hs_object.hs_id)
+
+    def add(self, from_type: str, from_id: Union[int, str], to_type: str,
+            associations: Iterable[Tuple[Union[int, str], List[Dict]]]):
+        """
+        Records every association of an object to an object type, replacing any read before
+
+        :param from_type: The object type associated from
+        :param from_id: The ID of the object associated from
+        :param to_type: The object type associated to
+        :param associations: (ID, association types) for each associated object
+        """
+
+        from_id = str(from_id)
+        associations = {str(to_id): list(types or []) for to_id, types in associations}
+
+        with self._lock:
+            if self._connection is not None:
+                with self._connection:
+                    self._connection.execute("DELETE FROM association_edges "
+                                             "WHERE from_type = ? AND from_id = ? AND to_type = ?",
+                                             (from_type, from_id, to_type))
+                    self._connection.executemany("INSERT INTO association_edges VALUES (?, ?, ?, ?, ?)",
+                                                 [(from_type, from_id, to_type, to_id, json.dumps(types))
+                                                  for to_id, types in associations.items()])
+                    self._connection.execute("INSERT OR IGNORE INTO association_reads VALUES (?, ?, ?)",
+                                             (from_type, from_id, to_type))
+                return
+
+            for to_id in self._forward.get((from_type, from_id, to_type), {}):
+                self._reverse.get((to_type, to_id, from_type), set()).discard(from_id)
+
+            self._forward[(from_type, from_id, to_type)] = associations
+            for to_id in associations:
+                self._reverse.setdefault((to_type, to_id, from_type), set()).add(from_id)
+
+    def loaded(self, hs_object, to_type: str, hs_id: Union[int, str] = None) -> bool:
+        """
+        :return: Whether the associations of the object to the object type have been read
+        """
+
+        from_type, from_id = self._key(hs_object, hs_id)
+        to_type = self._type(to_type)
+        with self._lock:
+            if self._connection is not None:
+                return self._connection.execute("SELECT 1 FROM association_reads "
+                                                "WHERE from_type = ? AND from_id = ? AND to_type = ?",
+                                                (from_type, from_id, to_type)).fetchone() is not None
+
+            return (from_type, from_id, to_type) in self._forward
+
+    def targets(self, hs_object, to_type: str, hs_id: Union[int, str] = None) -> List[str]:
+        """
+        :param hs_object: The object associated from, or its object type if hs_id is given
+        :param to_type: The object type associated to
+        :param hs_id: The ID of the object associated from
+
+        :return: The IDs of the objects of to_type associated with the object
+        """
+
+        return list(self.types(hs_object, to_type, hs_id))
+
+    def types(self, hs_object, to_type: str, hs_id: Union[int, str] = None) -> Dict[str, List[Dict]]:
+        """
+        :return: {ID: association types} for the objects of to_type associated with the object
+        """
+
+        from_type, from_id = self._key(hs_object, hs_id)
+        to_type = self._type(to_type)
+        with self._lock:
+            if self._connection is not None:
+                rows = self._connection.execute("SELECT to_id, types FROM association_edges "
+                                                "WHERE from_type = ? AND from_id = ? AND to_type = ?",
+                                                (from_type, from_id, to_type))
+                return {to_id: json.loads(types) for to_id, types in rows}
+
+            return dict(self._forward.get((from_type, from_id, to_type), {}))
+
+    def sources(self, hs_object, from_type: str, hs_id: Union[int, str] = None) -> List[str]:
+        """
+        Looks associations up the other way: of the objects of from_type read so far, those associated with this one
+
+        :param hs_object: The object associated to, or its object type if hs_id is given
+        :param from_type: The object type associated from
+        :param hs_id: The ID of the object associated to
+
+        :return: The IDs of the objects of from_type associated with the object
+        """
+
+        to_type, to_id = self._key(hs_object, hs_id)
+        from_type = self._type(from_type)
+        with self._lock:
+            if self._connection is not None:
+                rows = self._connection.execute("SELECT from_id FROM association_edges "
+                                                "WHERE to_type = ? AND to_id = ? AND from_type = ?",
+                                                (to_type, to_id, from_type))
+                return [row[0] for row in rows]
+
+            return list(self._reverse.get((to_type, to_id, from_type), set()))
+
+    def put(self, hs_object):
+        """ Holds an object fetched with the associations """
+
+        with self._lock:
+            self._objects[self._key(hs_object)] = hs_object
+
+    def get(self, object_type: str, hs_id: Union[int, str]):
+        """
+        :return: The object held for the object type and ID, or None
+        """
+
+        with self._lock:
+            return self._objects.get((self._type(object_type), str(hs_id)))
+
+    def objects(self, object_type: str) -> List:
+        """
+        :return: Every object of the object type held
+        """
+
+        object_type = self._type(object_type)
+        with self._lock:
+            return [hs_object for (held_type, _), hs_object in self._objects.items() if held_type == object_type]
+
+    def related(self, hs_object, to_type: str) -> List:
+        """
+        :return: The objects held that are associated with the object, in either direction
+        """
+
+        ids = dict.fromkeys(self.targets(hs_object, to_type) + self.sources(hs_object, to_type))
+        return [held for held in (self.get(to_type, hs_id) for hs_id in ids) if held is not None]
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
@@ -1,20 +1,91 @@
 from datetime import datetime
 import json
-from typing import Dict, Generator, List, Union
+from threading import Lock
+from typing import Any, Callable, Dict, Generator, Iterable, List, Tuple, Union
 
 from HubSpot import Interface
+from requests import HTTPError
+
+from .Batch import BATCH_SIZE, BatchError, BatchResult, chunked
 from .HSObjects import HubSpotObject
+from .Pager import Pager, next_after
+from .Query import MAX_FILTERS, MAX_FILTERS_PER_GROUP, MAX_PAGE_SIZE
+from .Records import record_class
+from .Schema import PropertySchema, SchemaRegistry, encode, fetch_schema
+from ..Parallel import parallel_merge
+
+
+# The search endpoint stops paging after this many results
+SEARCH_LIMIT = 10000
+
+# The most hs_object_id filters search_all adds to each filter group to narrow it to a range
+RANGE_FILTERS = 2
 
 
 class HSFactory:
+    pager_class = Pager
 
-    def __init__(self, interface: Interface, association, base_url: str):
+    def __init__(self, interface: Interface, association, base_url: str, schemas: SchemaRegistry = None):
         self.interface = interface
         self.association = association
         self.base_url = base_url
+        self.schemas = schemas if schemas is not None else SchemaRegistry()
+        # Record classes hold the interface, so they are kept here and go when the factory does
+        self._record_classes: Dict[HubSpotObject.__class__, type] = dict()
+        self._record_classes_lock = Lock()
+
+    def _builder(self, hs_class: HubSpotObject.__class__, compact: bool = False):
+        if compact:
+            with self._record_classes_lock:
+                cls = self._record_classes.get(hs_class)
+                if cls is None:
+                    cls = self._record_classes[hs_class] = record_class(hs_class, self.interface, self.association)
+
+            return cls
+
+        def build(result: Dict) -> HubSpotObject:
+            return hs_class(self.interface, self.association, result)
+
+        return build
+
+    def _response_builder(self, hs_class: HubSpotObject.__class__):
+        build = self._builder(hs_class)
+
+        def build_response(response) -> HubSpotObject:
+            return build(response.json())
+
+        return build_response
+
+    @staticmethod
+    def _decoding(page: Callable, schema: Union[PropertySchema, None]) -> Callable:
+        if schema is None:
+            return page
+
+        def decoded_page(response) -> Tuple[List[Dict], Union[str, None]]:
+            results, after = page(response)
+            return schema.decode(results), after
+
+        return decoded_page
+
+    @staticmethod
+    def _page(response) -> Tuple[List[Dict], Union[str, None]]:
+        response = response.json()
+
+        return response["results"], next_after(response)
+
+    @classmethod
+    def _search_page(cls, response) -> Tuple[List[Dict], Union[str, None]]:
+        results, after = cls._page(response)
+
+        # HubSpot hands out a cursor for the page past the limit, but refuses to serve it
+        if after is not None and after.isdigit() and int(after) >= SEARCH_LIMIT:
+            after = None
+
+        return results, after
 
     def list_all(self, hs_class: HubSpotObject.__class__, limit: int = 10, properties: List = None,
-                 _after: Union[str, None] = None) -> Generator[HubSpotObject, None, None]:
+                 _after: Union[str, None] = None, prefetch: int = 2, compact: bool = False,
+                 typed: bool = False, _offset: int = 0) -> Pager:
         """
         Returns a list of the respective objects from Hubspot
 
@@ -22,30 +93,117 @@ class HSFactory:
         :param limit: The Number of results per page
         :param properties: The Properties to return for each object
         :param _after: The Next Page to query
+        :param prefetch: The Number of pages to fetch ahead in the background
+        :param compact: Build memory lean HubSpotRecords rather than HubSpot Objects
+        :param typed: Read property values as their types in the property schema, a page at a time.  The schema is
+                      fetched with the first page if it isn't held
+        :param _offset: The Number of records of the _after page already seen
 
-        :return: A Generator of HubSpot Objects
+        :return: A Pager of HubSpot Objects.  pager.after and pager.offset mark where to resume from
         """
 
+        fetch_page = self._list_fetcher(hs_class, limit, properties, typed)
+
+        return self.pager_class(fetch_page, self._builder(hs_class, compact), _after, prefetch, _offset)
+
+    def _list_fetcher(self, hs_class: HubSpotObject.__class__, limit: int, properties: Union[List, None],
+                      typed: bool = False, **kwargs) -> Callable[[Union[str, None]], Tuple[List, Union[str, None]]]:
         endpoint = f"{self.base_url}/v{hs_class.api_version}/objects/{hs_class.object_type}"
-        params = {
-            "limit": limit,
-        }
 
-        if _after is not None:
-            params.update({"after": _after})
+        def fetch_page(after: Union[str, None]):
+            params = {
+                "limit": limit,
+            }
 
-        if properties is not None:
-            params.update({"properties": properties})
+            if after is not None:
+                params.update({"after": after})
 
-        response = self.interface.call(endpoint, params=params)
-        response = response.json()
+            if properties is not None:
+                params.update({"properties": properties})
+
+            return self.interface.run(self._fetch_page(hs_class, endpoint, self._page, typed, params=params,
+                                                       **kwargs))
+
+        return fetch_page
+
+    def _fetch_page(self, hs_class: HubSpotObject.__class__, url: str, page: Callable, typed: bool,
+                    **kwargs) -> Generator[Any, Any, Tuple[List[Dict], Union[str, None]]]:
+        """ Fetches a page, after the schema to read it with if typed and not held.  Steps for interface.run """
+
+        schema = (yield from self._schema(hs_class)) if typed else None
+
+        return (yield self.interface.call_then(url, self._decoding(page, schema), **kwargs))
+
+    def schema(self, hs_class: HubSpotObject.__class__) -> PropertySchema:
+        """
+        :return: The properties HubSpot defines for this object type.  Fetched once and then held in the registry
+        """
+
+        return self.interface.run(self._schema(hs_class))
+
+    def _schema(self, hs_class: HubSpotObject.__class__) -> Generator[Any, Any, PropertySchema]:
+        schema = self.schemas.get(hs_class)
+        if schema is None:
+            schema = yield fetch_schema(self.interface, self.base_url, hs_class)
+            self.schemas.put(schema)
+
+        return schema
+
+    def _query_schema(self, hs_class: HubSpotObject.__class__, fetch: bool
+                      ) -> Generator[Any, Any, Union[PropertySchema, None]]:
+        """
+        The schema to check a query's property names against.  Only a schema fetched by this process is used, as one
+        held from an earlier run may not know properties added since.  Steps for interface.run
+
+        :param fetch: Fetch the schema if this process hasn't
+
+        :return: The schema, or None if the names are not to be checked
+        """
+
+        schema = self.schemas.get(hs_class)
+        if schema is not None and self.schemas.fresh(hs_class):
+            return schema
+
+        if not fetch:
+            return None
+
+        schema = yield fetch_schema(self.interface, self.base_url, hs_class)
+        self.schemas.put(schema)
+
+        return schema
 
-        for result in response["results"]:
-            yield hs_class(self.interface, self.association, _data=result)
+    def _prepare_properties(self, hs_class: HubSpotObject.__class__, properties: Dict) -> Generator[Any, Any, Dict]:
+        """
+        Fills in hs_timestamp, checks the required properties are there and encodes the values.  Steps for
+        interface.run
+
+        Names and values are checked against the schema only if it is held.  A schema held from an earlier run may not
+        know properties or options added since, so it is fetched again, once, before anything is rejected
+        """
 
-        if "after" in response:
-            for result in self.list_all(hs_class, limit, properties, response["after"]):
-                yield result
+        properties = dict(properties)
+        if "hs_timestamp" in hs_class.required_properties and "hs_timestamp" not in properties:
+            properties.update({"hs_timestamp": str(datetime.utcnow()).replace(" ", "T") + "Z"})
+
+        required_props = hs_class.required_properties.split(",")
+        if required_props != [""] and not all([required_prop in properties for required_prop in required_props]):
+            raise Exception(f"Missing Required Properties.  Required properties: {required_props}")
+
+        schema = self.schemas.get(hs_class)
+        encoded = encode(properties, schema)
+        if schema is not None:
+            try:
+                schema.validate(encoded)
+            except Exception:
+                if self.schemas.fresh(hs_class):
+                    raise
+
+                schema = yield fetch_schema(self.interface, self.base_url, hs_class)
+                self.schemas.put(schema)
+                encoded = encode(properties, schema)
+                schema.validate(encoded)
+
+        return encoded
 
     def new(self, hs_class: HubSpotObject.__class__, **kwargs) -> HubSpotObject:
         """
@@ -57,21 +215,17 @@ class HSFactory:
         :return: An object representing the newly created object in HubSpot
         """
 
-        if "hs_timestamp" in hs_class.required_properties and "hs_timestamp" not in kwargs:
-            kwargs.update({"hs_timestamp": str(datetime.utcnow()).replace(" ", "T") + "Z"})
+        return self.interface.run(self._new(hs_class, kwargs))
 
-        required_props = hs_class.required_properties.split(",")
-        if required_props != [""] and not all([required_prop in kwargs for required_prop in required_props]):
-            raise Exception(f"Missing Required Properties.  Required properties: {required_props}")
+    def _new(self, hs_class: HubSpotObject.__class__, properties: Dict) -> Generator[Any, Any, HubSpotObject]:
+        properties = yield from self._prepare_properties(hs_class, properties)
 
         endpoint = f"{self.base_url}/v{hs_class.api_version}/objects/{hs_class.object_type}"
         data = json.dumps(
-            {"properties": kwargs}
+            {"properties": properties}
         )
 
-        response = self.interface.call(endpoint, method="post", data=data)
-
-        return hs_class(self.interface, self.association, response.json())
+        return (yield self.interface.call_then(endpoint, self._response_builder(hs_class), method="post", data=data))
 
     def get(self, hs_class: HubSpotObject.__class__, hs_id: int) -> HubSpotObject:
         """
@@ -83,33 +237,568 @@ class HSFactory:
         :return: an object representing the HS object
         """
 
-        response = self.interface.call(f"{self.base_url}/v{hs_class.api_version}/{hs_class.object_type}/{hs_id}")
+        url = f"{self.base_url}/v{hs_class.api_version}/objects/{hs_class.object_type}/{hs_id}"
+
+        def load() -> HubSpotObject:
+            return self.interface.call_then(url, self._response_builder(hs_class))
+
+        cache = getattr(self.interface, "cache", None)
+        if cache is None:
+            return load()
 
-        return hs_class(self.interface, self.association, response.json())
+        return cache.get_or_load(hs_class.object_type, str(hs_id), load)
 
-    def search(self, hs_class: HubSpotObject.__class__, filters: Dict, _after=None):
+    def search(self, hs_class: HubSpotObject.__class__, filters: Dict, _after: Union[str, None] = None,
+               prefetch: int = 2, compact: bool = False, typed: bool = False, _offset: int = 0) -> Pager:
         """
         Searches Hubspot for the specified critieriea
 
         :param hs_class: The HubSpot Class we are looking for
-        :param filters: The Filters for the HubSpot Class
+        :param filters: The Filters for the HubSpot Class.  Left unchanged
+        :param _after: The Next Page to query
+        :param prefetch: The Number of pages to fetch ahead in the background
+        :param compact: Build memory lean HubSpotRecords rather than HubSpot Objects
+        :param typed: Read property values as their types in the property schema, a page at a time
+        :param _offset: The Number of records of the _after page already seen
 
-        :return: a Generator of objects representing the filters HS Objects
+        :return: a Pager of objects representing the filters HS Objects.  pager.after and pager.offset mark where to
+                 resume from
 
         Filters should be in the format of FilterGroups[Filters].  See HubSpot for more information
         https://developers.hubspot.com/docs/api/crm/search#filter-search-results
         """
 
         url = f"{self.base_url}/v{hs_class.api_version}/objects/{hs_class.object_type}/search"
-        if _after is not None:
-            filters.update({"after": _after})
-        data = json.dumps(filters)
-
-        response = self.interface.call(url, method="POST", data=data)
-        data = response.json()
-        for hs_data in data["results"]:
-            yield hs_class(self.interface, self.association, hs_data)
-
-        if "paging" in data:
-            for result in self.search(hs_class, filters, data["paging"]["next"]["after"]):
-                yield result
+
+        def fetch_page(after: Union[str, None]):
+            body = dict(filters)
+            if after is not None:
+                body.update({"after": after})
+
+            return self.interface.run(self._fetch_page(hs_class, url, self._search_page, typed, method="POST",
+                                                       data=json.dumps(body)))
+
+        return self.pager_class(fetch_page, self._builder(hs_class, compact), _after, prefetch, _offset)
+
+    @staticmethod
+    def _and_filters(filters: Dict, extra: List[Dict]) -> Dict:
+        """ Adds filters to every filter group, so they apply whichever group matches """
+
+        body = dict(filters)
+        groups = filters.get("filterGroups") or [{"filters": []}]
+        body.update({"filterGroups": [{**group, "filters": list(group.get("filters", [])) + extra}
+                                      for group in groups]})
+
+        return body
+
+    @staticmethod
+    def _check_room(filters: Dict):
+        """ Raises if adding the range filters to every filter group would take the search past HubSpot's limits """
+
+        groups = filters.get("filterGroups") or [{"filters": []}]
+        if any(len(group.get("filters", [])) + RANGE_FILTERS > MAX_FILTERS_PER_GROUP for group in groups):
+            raise Exception(f"search_all adds {RANGE_FILTERS} hs_object_id filters to every filter group, so a group "
+                            f"can hold at most {MAX_FILTERS_PER_GROUP - RANGE_FILTERS} filters of its own")
+
+        if sum(len(group.get("filters", [])) + RANGE_FILTERS for group in groups) > MAX_FILTERS:
+            raise Exception(f"search_all adds {RANGE_FILTERS} hs_object_id filters to every filter group, which takes "
+                            f"the search past HubSpot's limit of {MAX_FILTERS} filters")
+
+    def _id_bound(self, hs_class: HubSpotObject.__class__, filters: Dict, direction: str
+                  ) -> Generator[Any, Any, Tuple[int, Union[int, None]]]:
+        """
+        The total matching the filters and the lowest or highest id among them.  Steps for interface.run
+
+        :return: (total, id), where id is None if nothing matches
+        """
+
+        url = f"{self.base_url}/v{hs_class.api_version}/objects/{hs_class.object_type}/search"
+        body = {**filters, "sorts": [{"propertyName": "hs_object_id", "direction": direction}],
+                "properties": ["hs_object_id"], "limit": 1}
+        body.pop("after", None)
+
+        response = yield self.interface.call_then(url, lambda response: response.json(), method="POST",
+                                                  data=json.dumps(body))
+        results = response["results"]
+
+        return response.get("total", 0), int(results[0]["id"]) if results else None
+
+    @staticmethod
+    def _ranges(low: int, high: int, partitions: int) -> List[Tuple[int, Union[int, None]]]:
+        """ Splits low to high into partitions (low, high) ranges, the last of them open ended """
+
+        partitions = max(1, min(partitions, high - low + 1))
+        step = (high - low + 1) // partitions
+        edges = [low + step * index for index in range(partitions)] + [None]
+
+        return list(zip(edges, edges[1:]))
+
+    def _range_body(self, filters: Dict, low: int, high: Union[int, None], last: Union[str, None]) -> Dict:
+        """ The search for the objects in low <= hs_object_id < high after the last one seen, in id order """
+
+        bounds = [{"propertyName": "hs_object_id", "operator": "GTE", "value": str(low)}
+                  if last is None else
+                  {"propertyName": "hs_object_id", "operator": "GT", "value": str(last)}]
+        if high is not None:
+            bounds.append({"propertyName": "hs_object_id", "operator": "LT", "value": str(high)})
+
+        body = self._and_filters(filters, bounds)
+        body.update({"sorts": [{"propertyName": "hs_object_id", "direction": "ASCENDING"}]})
+
+        return body
+
+    def _search_range(self, hs_class: HubSpotObject.__class__, filters: Dict, low: int,
+                      high: Union[int, None], compact: bool = False, typed: bool = False
+                      ) -> Iterable[HubSpotObject]:
+        """
+        Searches for objects with low <= hs_object_id < high in hs_object_id order, starting a new search after the
+        last id seen each time one reaches the result cap
+        """
+
+        last = None
+        while True:
+            seen = 0
+            body = self._range_body(filters, low, high, last)
+            # Closed if the caller stops early, so the prefetch thread lets go of its page
+            with self.search(hs_class, body, compact=compact, typed=typed) as pager:
+                for hs_object in pager:
+                    yield hs_object
+                    last = hs_object.hs_id
+                    seen += 1
+
+            if seen < SEARCH_LIMIT:
+                return
+
+    def search_all(self, hs_class: HubSpotObject.__class__, filters: Dict, partitions: int = 1,
+                   max_workers: int = 1, compact: bool = False, typed: bool = False) -> Iterable[HubSpotObject]:
+        """
+        Searches Hubspot for the specified critieriea without stopping at the 10,000 result cap of search.
+
+        The query is split into hs_object_id ranges.  Each range is searched in id order, and a range that reaches the
+        cap carries on from the last id it saw, so nothing is cut off.  Any sorts in the filters are replaced.
+
+        :param hs_class: The HubSpot Class we are looking for
+        :param filters: The Filters for the HubSpot Class.  Left unchanged.  Each filter group can hold at most 4
+                        filters, leaving room for the 2 hs_object_id filters added to it.  Pages of 100 unless a limit
+                        is given
+        :param partitions: The Number of id ranges to split the query into
+        :param max_workers: The Number of ranges to search at once
+        :param compact: Build memory lean HubSpotRecords rather than HubSpot Objects
+        :param typed: Read property values as their types in the property schema, a page at a time
+
+        :return: a Generator of objects matching the filters, each yielded once.  In id order when searched one range
+                 at a time, in no particular order otherwise
+        """
+
+        self._check_room(filters)
+        filters = {"limit": MAX_PAGE_SIZE, **filters}
+
+        total, low = self.interface.run(self._id_bound(hs_class, filters, "ASCENDING"))
+        if low is None:
+            return
+
+        if total < SEARCH_LIMIT and partitions <= 1:
+            # Everything fits in one search
+            with self.search(hs_class, filters, compact=compact, typed=typed) as pager:
+                yield from pager
+            return
+
+        _, high = self.interface.run(self._id_bound(hs_class, filters, "DESCENDING"))
+        ranges = self._ranges(low, high, partitions)
+
+        if max_workers <= 1:
+            hs_objects = (hs_object for range_low, range_high in ranges
+                          for hs_object in self._search_range(hs_class, filters, range_low, range_high, compact,
+                                                              typed))
+        else:
+            hs_objects = parallel_merge([
+                lambda range_low=range_low, range_high=range_high: self._search_range(hs_class, filters, range_low,
+                                                                                      range_high, compact, typed)
+                for range_low, range_high in ranges
+            ], max_workers)
+
+        seen = set()
+        for hs_object in hs_objects:
+            if hs_object.hs_id in seen:
+                continue
+
+            seen.add(hs_object.hs_id)
+            yield hs_object
+
+    # Batches.  Each is written as steps for interface.run, so the AsyncClient runs the same code
+    def _batch(self, hs_class: HubSpotObject.__class__, action: str, items: Iterable[Tuple[int, Any, Dict]],
+               result: BatchResult, input_key: Callable[[Any], str] = None,
+               result_key: Callable[[Dict], str] = None, body: Dict = None, batch_size: int = BATCH_SIZE,
+               fold_keys: bool = False) -> Generator[Any, Any, BatchResult]:
+        """
+        Sends inputs to a batch endpoint in chunks and lines the responses back up with the inputs.  Steps for
+        interface.run
+
+        :param hs_class: The object type in question
+        :param action: The batch action, one of create, read, update, archive
+        :param items: (index, input, payload) for each input, where payload is sent to HubSpot for that input
+        :param result: The BatchResult to fill in
+        :param input_key: Returns the key HubSpot will use for an input in its results and errors
+        :param result_key: Returns the key of a result
+        :param body: Anything else to send with every chunk
+        :param batch_size: The Number of inputs per call
+        :param fold_keys: Match keys that differ only in case, for properties such as email that HubSpot lower cases
+
+        :return: the filled in BatchResult.  An input is never given both a result and an error; an input HubSpot's
+                 response can't be lined up with is given an error rather than a guess
+        """
+
+        url = f"{self.base_url}/v{hs_class.api_version}/objects/{hs_class.object_type}/batch/{action}"
+        build = self._builder(hs_class)
+
+        for chunk in chunked(items, batch_size):
+            data = json.dumps({**(body or {}), "inputs": [payload for _, _, payload in chunk]})
+
+            try:
+                response = yield self.interface.call(url, method="POST", data=data)
+            except HTTPError as e:
+                try:
+                    error = e.response.json()
+                except Exception:
+                    error = {"message": str(e)}
+
+                for index, item, _ in chunk:
+                    result.errors.append(BatchError(index, item, error.get("message", str(e)),
+                                                    error.get("category"), error.get("context", {})))
+                continue
+
+            response = response.json() if response.content else {}
+            self._line_up(chunk, response, result, build, input_key, result_key, fold_keys)
+
+        return result
+
+    @staticmethod
+    def _line_up(chunk: List[Tuple[int, Any, Dict]], response: Dict, result: BatchResult, build: Callable,
+                 input_key: Union[Callable[[Any], str], None], result_key: Union[Callable[[Dict], str], None],
+                 fold_keys: bool):
+        """ Fills in the results and errors of one chunk from HubSpot's response """
+
+        pending = {index: item for index, item, _ in chunk}
+
+        by_key, by_folded = dict(), dict()
+        for index, item, payload in chunk:
+            keys = [str(input_key(item))] if input_key is not None else []
+            if "objectWriteTraceId" in payload:
+                keys.append(payload["objectWriteTraceId"])
+            for key in keys:
+                by_key.setdefault(key, []).append(index)
+                by_folded.setdefault(key.casefold(), []).append(index)
+
+        def lookup(key) -> List[int]:
+            key = str(key)
+            if key in by_key or not fold_keys:
+                return by_key.get(key, [])
+
+            return by_folded.get(key.casefold(), [])
+
+        unattributed = []
+        for error in response.get("errors", []):
+            context = error.get("context", {})
+            keys = []
+            for name in ("ids", "objectWriteTraceId"):
+                value = context.get(name, [])
+                keys += value if isinstance(value, list) else [value]
+
+            indexes = [index for key in keys for index in lookup(key)]
+            if not indexes:
+                unattributed.append(error)
+
+            for index in indexes:
+                if index in pending:
+                    result.errors.append(BatchError(index, pending.pop(index), error.get("message", ""),
+                                                    error.get("category"), context))
+
+        results = response.get("results")
+        if results is None and not unattributed:
+            # Nothing comes back from a successful archive
+            for index in pending:
+                result.results[index] = True
+            return
+
+        unmatched = []
+        for hs_data in results or []:
+            key = result_key(hs_data) if result_key is not None else None
+            indexes = [index for index in lookup(key) if index in pending] if key is not None else []
+            if not indexes:
+                unmatched.append(hs_data)
+
+            for index in indexes:
+                result.results[index] = build(hs_data)
+                del pending[index]
+
+        if len(pending) == 1 and len(unmatched) == 1 and not unattributed:
+            # Only one input is left without a result, so the one result left over is its
+            index = next(iter(pending))
+            result.results[index] = build(unmatched.pop())
+            del pending[index]
+
+        for index, item in pending.items():
+            if unattributed:
+                error = unattributed[0] if len(unattributed) == 1 else {
+                    "message": " | ".join(error.get("message", "") for error in unattributed),
+                    "category": unattributed[0].get("category")
+                }
+                result.errors.append(BatchError(index, item, error.get("message", ""), error.get("category"),
+                                                error.get("context", {})))
+            elif unmatched:
+                result.errors.append(BatchError(index, item, "HubSpot's results could not be matched to this input",
+                                                "UNMATCHED", {"ids": [hs_data.get("id") for hs_data in unmatched]}))
+            else:
+                result.errors.append(BatchError(index, item, "HubSpot returned no result for this input",
+                                                "MISSING"))
+
+    def batch_new(self, hs_class: HubSpotObject.__class__, properties: Iterable[Dict],
+                  batch_size: int = BATCH_SIZE) -> BatchResult:
+        """
+        Creates many objects of this type in HubSpot, batch_size objects per call
+
+        :param hs_class: The object type in question
+        :param properties: The Properties to create each object with
+        :param batch_size: The Number of objects to create per call.  HubSpot allows up to 100
+
+        :return: A BatchResult with the created objects in the order they were given
+        """
+
+        return self.interface.run(self._batch_new(hs_class, properties, batch_size))
+
+    def _batch_new(self, hs_class: HubSpotObject.__class__, properties: Iterable[Dict],
+                   batch_size: int) -> Generator[Any, Any, BatchResult]:
+        properties = list(properties)
+        result = BatchResult(results=[None] * len(properties))
+
+        items = []
+        for index, props in enumerate(properties):
+            try:
+                props = yield from self._prepare_properties(hs_class, props)
+            except Exception as e:
+                result.errors.append(BatchError(index, props, str(e), "VALIDATION_ERROR"))
+                continue
+
+            items.append((index, props, {"properties": props, "objectWriteTraceId": str(index)}))
+
+        return (yield from self._batch(hs_class, "create", items, result,
+                                       result_key=lambda hs_data: hs_data.get("objectWriteTraceId"),
+                                       batch_size=batch_size))
+
+    def batch_get(self, hs_class: HubSpotObject.__class__, hs_ids: Iterable[Union[int, str]], properties: List = None,
+                  id_property: str = None, batch_size: int = BATCH_SIZE) -> BatchResult:
+        """
+        Gets many HubSpot Objects, batch_size objects per call
+
+        :param hs_class: The object type in question
+        :param hs_ids: the IDs of the objects to retrieve
+        :param properties: The Properties to return for each object
+        :param id_property: A unique property to look the objects up by instead of the HubSpot ID.  Values are
+                            matched to the objects found without regard to case
+        :param batch_size: The Number of objects to read per call.  HubSpot allows up to 100
+
+        :return: A BatchResult with the objects in the order the IDs were given
+        """
+
+        return self.interface.run(self._batch_get(hs_class, hs_ids, properties, id_property, batch_size))
+
+    def _batch_get(self, hs_class: HubSpotObject.__class__, hs_ids: Iterable[Union[int, str]],
+                   properties: Union[List, None], id_property: Union[str, None],
+                   batch_size: int) -> Generator[Any, Any, BatchResult]:
+        hs_ids = list(hs_ids)
+        result = BatchResult(results=[None] * len(hs_ids))
+
+        body = {"properties": list(properties or [])}
+        if id_property is not None:
+            body.update({"idProperty": id_property})
+            if id_property not in body["properties"]:
+                body["properties"].append(id_property)
+
+            def result_key(hs_data):
+                return hs_data["properties"].get(id_property)
+        else:
+            def result_key(hs_data):
+                return hs_data["id"]
+
+        items = [(index, hs_id, {"id": str(hs_id)}) for index, hs_id in enumerate(hs_ids)]
+
+        # HubSpot matches values of unique properties such as email without regard to case
+        return (yield from self._batch(hs_class, "read", items, result, str, result_key, body, batch_size,
+                                       fold_keys=id_property is not None))
+
+    @staticmethod
+    def _hs_id(hs_object: Union[HubSpotObject, int, str]) -> str:
+        return str(getattr(hs_object, "hs_id", hs_object))
+
+    def _invalidate(self, hs_class: HubSpotObject.__class__, items: Iterable[Tuple]):
+        cache = getattr(self.interface, "cache", None)
+        if cache is not None:
+            for item in items:
+                cache.invalidate(hs_class.object_type, self._hs_id(item[0]))
+
+    def batch_update(self, hs_class: HubSpotObject.__class__,
+                     updates: Iterable[Tuple[Union[HubSpotObject, int, str], Dict]],
+                     batch_size: int = BATCH_SIZE) -> BatchResult:
+        """
+        Updates many objects in HubSpot, batch_size objects per call.  Any HubSpot Objects given are updated inplace
+
+        :param hs_class: The object type in question
+        :param updates: (object or ID, properties) for each object to update
+        :param batch_size: The Number of objects to update per call.  HubSpot allows up to 100
+
+        :return: A BatchResult with the updated objects in the order they were given
+        """
+
+        return self.interface.run(self._batch_update(hs_class, updates, batch_size))
+
+    def _batch_update(self, hs_class: HubSpotObject.__class__,
+                      updates: Iterable[Tuple[Union[HubSpotObject, int, str], Dict]],
+                      batch_size: int) -> Generator[Any, Any, BatchResult]:
+        updates = list(updates)
+        result = BatchResult(results=[None] * len(updates))
+
+        schema = self.schemas.get(hs_class)
+        items = [(index, hs_object, {"id": self._hs_id(hs_object), "properties": encode(properties, schema)})
+                 for index, (hs_object, properties) in enumerate(updates)]
+
+        yield from self._batch(hs_class, "update", items, result, self._hs_id, lambda hs_data: hs_data["id"],
+                               batch_size=batch_size)
+        self._invalidate(hs_class, updates)
+
+        for index, (hs_object, _) in enumerate(updates):
+            if hasattr(hs_object, "_apply") and result.results[index] is not None:
+                hs_object._apply(result.results[index]._data["properties"])
+
+        return result
+
+    def batch_archive(self, hs_class: HubSpotObject.__class__, hs_objects: Iterable[Union[HubSpotObject, int, str]],
+                      batch_size: int = BATCH_SIZE) -> BatchResult:
+        """
+        Archives many objects in HubSpot, batch_size objects per call.  Any HubSpot Objects given are set to archived
+
+        :param hs_class: The object type in question
+        :param hs_objects: The objects or IDs to archive
+        :param batch_size: The Number of objects to archive per call.  HubSpot allows up to 100
+
+        :return: A BatchResult holding True for each archived object, in the order they were given
+        """
+
+        return self.interface.run(self._batch_archive(hs_class, hs_objects, batch_size))
+
+    def _batch_archive(self, hs_class: HubSpotObject.__class__,
+                       hs_objects: Iterable[Union[HubSpotObject, int, str]],
+                       batch_size: int) -> Generator[Any, Any, BatchResult]:
+        hs_objects = list(hs_objects)
+        result = BatchResult(results=[None] * len(hs_objects))
+
+        items = [(index, hs_object, {"id": self._hs_id(hs_object)}) for index, hs_object in enumerate(hs_objects)]
+
+        yield from self._batch(hs_class, "archive", items, result, self._hs_id, batch_size=batch_size)
+        self._invalidate(hs_class, [(hs_object, ) for hs_object in hs_objects])
+
+        for index, hs_object in enumerate(hs_objects):
+            if isinstance(hs_object, HubSpotObject) and result.results[index]:
+                hs_object.archived = True
+
+        return result
+
+    def _resolve(self, hs_class: HubSpotObject.__class__, keys: List[str], id_property: str,
+                 batch_size: int) -> Generator[Any, Any, Tuple[Dict[str, str], Dict[str, BatchError]]]:
+        """
+        Looks up which keys already belong to an object.  Steps for interface.run
+
+        :return: ({key: HubSpot ID} for the keys found, {key: error} for the keys that couldn't be looked up)
+        """
+
+        found = yield from self._batch_get(hs_class, keys, [id_property], id_property, batch_size)
+
+        errors = {keys[error.index]: error for error in found.errors if error.category != "OBJECT_NOT_FOUND"}
+        hs_ids = {key: hs_object.hs_id for key, hs_object in zip(keys, found.results) if hs_object is not None}
+
+        return hs_ids, errors
+
+    def upsert_many(self, hs_class: HubSpotObject.__class__, records: Iterable[Dict], id_property: str,
+                    batch_size: int = BATCH_SIZE) -> BatchResult:
+        """
+        Creates or updates many objects, matching them to existing objects by a unique property.  The existing objects
+        are looked up batch_size at a time, then the rest are created and the matches updated in batches, so running
+        the same load twice updates rather than duplicates.
+
+        :param hs_class: The object type in question
+        :param records: The Properties of each object, each including id_property
+        :param id_property: A property with unique values, such as email or a custom external id
+        :param batch_size: The Number of objects per call.  HubSpot allows up to 100
+
+        :return: A BatchResult with the created or updated objects in the order they were given.  Records sharing a
+                 value of id_property, regardless of case, are merged, later ones winning, and each gets the same
+                 object
+        """
+
+        return self.interface.run(self._upsert_many(hs_class, records, id_property, batch_size))
+
+    def _upsert_many(self, hs_class: HubSpotObject.__class__, records: Iterable[Dict], id_property: str,
+                     batch_size: int) -> Generator[Any, Any, BatchResult]:
+        records = list(records)
+        result = BatchResult(results=[None] * len(records))
+
+        # Every key is sent once, so duplicates in the input can't create two objects
+        merged: Dict[str, Dict] = dict()
+        indexes: Dict[str, List[int]] = dict()
+        folded: Dict[str, str] = dict()
+        for index, properties in enumerate(records):
+            key = properties.get(id_property)
+            if key in (None, ""):
+                result.errors.append(BatchError(index, properties, f"{id_property} is missing", "VALIDATION_ERROR"))
+                continue
+
+            # Values differing only in case are looked up as one, so they are merged too
+            key = folded.setdefault(str(key).casefold(), str(key))
+            merged[key] = {**merged.get(key, {}), **properties}
+            indexes.setdefault(key, []).append(index)
+
+        def fill(keys: List[str], outcome: BatchResult, retry: set = None):
+            for key, hs_object in zip(keys, outcome.results):
+                for index in indexes[key]:
+                    result.results[index] = hs_object
+            for error in outcome.errors:
+                key = keys[error.index]
+                if retry is not None and error.category == "CONFLICT":
+                    retry.add(key)
+                    continue
+                for index in indexes[key]:
+                    result.errors.append(BatchError(index, records[index], error.message, error.category,
+                                                    error.context))
+
+        keys = list(merged)
+        hs_ids, errors = yield from self._resolve(hs_class, keys, id_property, batch_size)
+        for key, error in errors.items():
+            for index in indexes[key]:
+                result.errors.append(BatchError(index, records[index], error.message, error.category, error.context))
+
+        updates = [key for key in keys if key in hs_ids]
+        fill(updates, (yield from self._batch_update(hs_class, [(hs_ids[key], merged[key]) for key in updates],
+                                                     batch_size)))
+
+        creates = [key for key in keys if key not in hs_ids and key not in errors]
+        conflicts = set()
+        fill(creates, (yield from self._batch_new(hs_class, [merged[key] for key in creates], batch_size)), conflicts)
+
+        if conflicts:
+            # Something else created these objects since they were looked up, so they are updated instead
+            conflicts = [key for key in creates if key in conflicts]
+            hs_ids, errors = yield from self._resolve(hs_class, conflicts, id_property, batch_size)
+            updates = [key for key in conflicts if key in hs_ids]
+            fill(updates, (yield from self._batch_update(hs_class, [(hs_ids[key], merged[key]) for key in updates],
+                                                         batch_size)))
+
+            for key in conflicts:
+                if key not in hs_ids:
+                    error = errors.get(key)
+                    for index in indexes[key]:
+                        result.errors.append(BatchError(index, records[index],
+                                                        error.message if error else f"{key} could not be created",
+                                                        error.category if error else "CONFLICT"))
+
+        result.errors.sort(key=lambda error: error.index)
+
+        return result
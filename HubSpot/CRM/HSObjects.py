@@ -4,6 +4,7 @@ from typing import Dict, List, NoReturn, Any, ClassVar, Union
 
 from ..Interface import Interface
 from ..Files.File import File
+from .Session import session_for
 
 
 @dataclass
@@ -28,6 +29,39 @@ class HubSpotObject:
     def __str__(self):
         return f"<{self.friendly_name} {self.hs_id}>"
 
+    def __setattr__(self, name: str, value: Any):
+        object.__setattr__(self, name, value)
+
+        # Anything that isn't a field of the dataclass is a property; assigning one marks it changed
+        if name not in self.__dataclass_fields__ and not name.startswith("_"):
+            self.__dict__.setdefault("_dirty", dict())[name] = None
+            session = session_for(self)
+            if session is not None:
+                session.add(self)
+
+    @property
+    def changes(self) -> Dict[str, Any]:
+        """ The properties assigned since the object was loaded or last saved, and their new values """
+
+        return {name: self.__dict__[name] for name in self.__dict__.get("_dirty", ())}
+
+    def _clean(self, changes: Dict = None) -> NoReturn:
+        dirty = self.__dict__.get("_dirty", {})
+        if changes is None:
+            dirty.clear()
+            return
+
+        # A property assigned again since the changes were taken is still changed
+        for name, value in changes.items():
+            if self.__dict__.get(name) == value:
+                dirty.pop(name, None)
+
+    def _apply(self, properties: Dict) -> NoReturn:
+        self.__dict__.update(properties)
+        dirty = self.__dict__.get("_dirty", {})
+        for name in properties:
+            dirty.pop(name, None)
+
     def update_hs(self, properties: Dict) -> NoReturn:
         """
         Updates the object in HubSpot with the given properties, and the local
@@ -38,10 +72,21 @@ class HubSpotObject:
         :return: NoReturn
         """
 
-        data = json.dumps(properties)
-        response = self.interface.call(self.endpoint, method="put", data=data)
+        # Schema reads HubSpotObject, so can only be imported once this module has loaded
+        from .Schema import encode
 
-        self.__dict__.update(response.json()["properties"])
+        data = json.dumps(encode(properties))
+
+        return self.interface.call_then(self.endpoint, self._updated, method="put", data=data)
+
+    def _updated(self, response) -> NoReturn:
+        self._apply(response.json()["properties"])
+        self._invalidate()
+
+    def _invalidate(self) -> NoReturn:
+        cache = getattr(self.interface, "cache", None)
+        if cache is not None:
+            cache.invalidate(self.object_type, str(self.hs_id))
 
     def archive(self) -> NoReturn:
         """
@@ -50,9 +95,11 @@ class HubSpotObject:
         :return: No Return
         """
 
-        response = self.interface.call(self.endpoint, method="delete")
+        return self.interface.call_then(self.endpoint, self._archived, method="delete")
 
+    def _archived(self, response) -> NoReturn:
         self.archived = True
+        self._invalidate()
 
     def associate(self, hs_object: Union["HubSpotObject", File], *args, **kwargs) -> NoReturn:
         """
@@ -62,10 +109,15 @@ class HubSpotObject:
 
         :return: No Return
 
-        See Associations.create_association for more arguments
+        Inside a session the association is created when the session ends.  See Associations.create_association for
+        more arguments
         """
 
-        self.association.create_association(self, hs_object, *args, **kwargs)
+        session = session_for(self)
+        if session is not None:
+            return session.associate(self, hs_object, *args, **kwargs)
+
+        return self.association.create_association(self, hs_object, *args, **kwargs)
 
     def remove_association(self, hs_object: "HubSpotObject") -> NoReturn:
         """
@@ -74,9 +126,15 @@ class HubSpotObject:
         :param hs_object: the object to remove the association from
 
         :return: NoReturn
+
+        Inside a session the association is removed when the session ends
         """
 
-        self.association.remove_association(self, hs_object)
+        session = session_for(self)
+        if session is not None:
+            return session.remove_association(self, hs_object)
+
+        return self.association.remove_association(self, hs_object)
 
 
 def _not_implemented(*args, **kwargs):
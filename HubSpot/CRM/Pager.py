@@ -0,0 +1,257 @@
+import asyncio
+from contextvars import copy_context
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Tuple, Union
+
+
+def next_after(response: Dict) -> Union[str, None]:
+    """
+    Reads the cursor of the next page from a HubSpot response
+
+    :param response: The decoded response of a paged listing
+
+    :return: The cursor of the next page, or None if this was the last page
+    """
+
+    try:
+        return response["paging"]["next"]["after"]
+    except (KeyError, TypeError):
+        return response.get("after")
+
+
+def _put(pages: Queue, item: Tuple, stop: Event):
+    while not stop.is_set():
+        try:
+            pages.put(item, timeout=0.1)
+            return
+        except Full:
+            continue
+
+
+def _fetch_pages(fetch_page: Callable, after: Union[str, None], pages: Queue, stop: Event):
+    try:
+        while not stop.is_set():
+            results, cursor = fetch_page(after)
+            _put(pages, ("page", results, cursor), stop)
+
+            if cursor is None:
+                return
+
+            after = cursor
+    except BaseException as e:
+        _put(pages, ("error", e, None), stop)
+
+
+class Pager:
+    """
+    Iterates over a cursor paged HubSpot listing without recursion.
+
+    While the caller works through one page, the following pages are fetched on a background thread.  At most
+    `prefetch` pages are held in memory; the background thread waits once the buffer is full.
+
+    A Pager is an iterator, so next(pager) works as it did on the generators listings used to return.  pager.after and
+    pager.offset mark the record after the last one yielded: the cursor of its page and how far into the page it is.
+    They are kept once the listing is finished, so resuming then only picks up records added since.
+
+    Close a Pager that is not iterated to the end, or use it in a with block.  Until it is closed, or garbage
+    collected, the background thread holds on to the page it fetched last:
+
+        with client.crm.list_objects(DEAL) as deals:
+            first = next(deals)
+    """
+
+    def __init__(self, fetch_page: Callable[[Union[str, None]], Tuple[List[Dict], Union[str, None]]],
+                 build: Callable[[Dict], Any] = None, after: Union[str, None] = None, prefetch: int = 2,
+                 offset: int = 0):
+        """
+        :param fetch_page: Fetches the page at the given cursor, returning its results and the cursor of the next page
+        :param build: Turns each raw result into the object that is yielded.  Raw results are yielded if not given
+        :param after: The cursor of the page to start from
+        :param prefetch: The Number of pages to fetch ahead.  0 fetches each page only when it is needed
+        :param offset: The Number of records at the start of the first page to skip, as already seen
+        """
+
+        self.fetch_page = fetch_page
+        self.build = build
+        self.prefetch = prefetch
+        self.after = after
+        self.offset = offset
+        self._iterator = None
+        self._stop = Event()
+        self._thread = None
+
+    def __repr__(self):
+        return f"<Pager after={self.after} offset={self.offset}>"
+
+    def __iter__(self) -> Iterator[Any]:
+        return self
+
+    def __next__(self) -> Any:
+        if self._iterator is None:
+            self._iterator = self._iterate()
+
+        return next(self._iterator)
+
+    def _iterate(self) -> Iterator[Any]:
+        skip = self.offset
+        for results, cursor in self._pages():
+            for result in results[skip:]:
+                hs_object = self.build(result) if self.build is not None else result
+                self.offset += 1
+                yield hs_object
+
+            skip = 0
+            if cursor is not None:
+                self.after, self.offset = cursor, 0
+
+    def resume(self) -> "Pager":
+        """
+        :return: A new Pager carrying on from the record after the last one this Pager yielded
+        """
+
+        self.close()
+
+        return Pager(self.fetch_page, self.build, self.after, self.prefetch, self.offset)
+
+    def _pages(self) -> Iterator[Tuple[List[Dict], Union[str, None]]]:
+        if self.prefetch <= 0:
+            after = self.after
+            while True:
+                results, after = self.fetch_page(after)
+                yield results, after
+                if after is None:
+                    return
+
+        pages = Queue(maxsize=self.prefetch)
+        # Run in the caller's context, so the pages are fetched in the lane of any priority block around the listing
+        self._thread = Thread(target=copy_context().run,
+                              args=(_fetch_pages, self.fetch_page, self.after, pages, self._stop), name="Pager",
+                              daemon=True)
+        self._thread.start()
+
+        try:
+            while True:
+                try:
+                    kind, results, cursor = pages.get(timeout=0.1)
+                except Empty:
+                    if self._thread.is_alive():
+                        continue
+                    kind, results, cursor = pages.get_nowait()
+
+                if kind == "error":
+                    raise results
+
+                yield results, cursor
+
+                if cursor is None:
+                    return
+        finally:
+            self.close()
+
+    def close(self):
+        """ Stops fetching pages in the background """
+
+        self._stop.set()
+
+    def __del__(self):
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class AsyncPager:
+    """
+    The asyncio counterpart of Pager.  Iterate it with async for, or step through it with anext.
+
+    While the caller works through one page, the following pages are fetched by a background task.  At most
+    `prefetch` pages are held in memory.  after and offset mark the record after the last one yielded, as on Pager.
+    """
+
+    def __init__(self, fetch_page: Callable[[Union[str, None]], Awaitable[Tuple[List[Dict], Union[str, None]]]],
+                 build: Callable[[Dict], Any] = None, after: Union[str, None] = None, prefetch: int = 2,
+                 offset: int = 0):
+        """
+        :param fetch_page: Fetches the page at the given cursor, returning its results and the cursor of the next page
+        :param build: Turns each raw result into the object that is yielded.  Raw results are yielded if not given
+        :param after: The cursor of the page to start from
+        :param prefetch: The Number of pages to fetch ahead.  0 fetches each page only when it is needed
+        :param offset: The Number of records at the start of the first page to skip, as already seen
+        """
+
+        self.fetch_page = fetch_page
+        self.build = build
+        self.prefetch = prefetch
+        self.after = after
+        self.offset = offset
+        self._iterator = None
+
+    def __repr__(self):
+        return f"<AsyncPager after={self.after} offset={self.offset}>"
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self
+
+    async def __anext__(self) -> Any:
+        if self._iterator is None:
+            self._iterator = self._iterate()
+
+        return await self._iterator.__anext__()
+
+    async def _iterate(self) -> AsyncIterator[Any]:
+        skip = self.offset
+        async for results, cursor in self._pages():
+            for result in results[skip:]:
+                hs_object = self.build(result) if self.build is not None else result
+                self.offset += 1
+                yield hs_object
+
+            skip = 0
+            if cursor is not None:
+                self.after, self.offset = cursor, 0
+
+    def resume(self) -> "AsyncPager":
+        """
+        :return: A new AsyncPager carrying on from the record after the last one this one yielded
+        """
+
+        return AsyncPager(self.fetch_page, self.build, self.after, self.prefetch, self.offset)
+
+    async def _pages(self) -> AsyncIterator[Tuple[List[Dict], Union[str, None]]]:
+        if self.prefetch <= 0:
+            after = self.after
+            while True:
+                results, after = await self.fetch_page(after)
+                yield results, after
+                if after is None:
+                    return
+
+        pages = asyncio.Queue(maxsize=self.prefetch)
+
+        async def fetch_pages(after):
+            try:
+                while True:
+                    results, after = await self.fetch_page(after)
+                    await pages.put(("page", results, after))
+                    if after is None:
+                        return
+            except Exception as e:
+                await pages.put(("error", e, None))
+
+        task = asyncio.ensure_future(fetch_pages(self.after))
+        try:
+            while True:
+                kind, results, cursor = await pages.get()
+                if kind == "error":
+                    raise results
+
+                yield results, cursor
+
+                if cursor is None:
+                    return
+        finally:
+            task.cancel()
@@ -50,7 +50,13 @@ class PipelineFactory:
         """
 
         url = f"{self.base_url}/{hs_class.object_type}"
-        response = self.interface.call(url)
 
-        for result in response.json()["results"]:
-            yield Pipeline(self.interface, result, url)
+        def load() -> List["Pipeline"]:
+            response = self.interface.call(url)
+            return [Pipeline(self.interface, result, url) for result in response.json()["results"]]
+
+        cache = getattr(self.interface, "cache", None)
+        pipelines = load() if cache is None else cache.get_or_load("pipelines", hs_class.object_type, load)
+
+        for pipeline in pipelines:
+            yield pipeline
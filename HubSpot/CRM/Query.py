@@ -0,0 +1,257 @@
+from copy import deepcopy
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Union
+
+from .HSObjects import HubSpotObject
+
+# Lookups accepted by where(), as in where(amount__gt=1000), and the HubSpot operator each compiles to
+OPERATORS = {
+    "eq": "EQ",
+    "neq": "NEQ",
+    "lt": "LT",
+    "lte": "LTE",
+    "gt": "GT",
+    "gte": "GTE",
+    "between": "BETWEEN",
+    "in": "IN",
+    "not_in": "NOT_IN",
+    "has_property": "HAS_PROPERTY",
+    "not_has_property": "NOT_HAS_PROPERTY",
+    "contains_token": "CONTAINS_TOKEN",
+    "not_contains_token": "NOT_CONTAINS_TOKEN",
+}
+
+# Limits HubSpot puts on a single search request
+MAX_FILTER_GROUPS = 5
+MAX_FILTERS_PER_GROUP = 6
+MAX_FILTERS = 18
+MAX_SORTS = 1
+MAX_PAGE_SIZE = 100
+
+
+def _value(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return str(int(value.timestamp() * 1000))
+
+    if isinstance(value, date):
+        return str(int(datetime(value.year, value.month, value.day, tzinfo=timezone.utc).timestamp() * 1000))
+
+    return str(value)
+
+
+class Query:
+    """
+    Builds a CRM search and compiles it to HubSpot's filterGroups, sorts and properties.
+
+    Each method returns a new Query, so a query can be built up in steps and reused.  Conditions given to one where()
+    call are ANDed together, as are successive where() calls; or_where() starts a new filter group that is ORed with
+    the others.
+
+        client.crm.query(DEAL).where(amount__gt=1000, dealstage__in=["won", "lost"]).select("dealname", "amount")
+
+    Iterating a Query runs the search.
+    """
+
+    def __init__(self, hs_factory, hs_class: HubSpotObject.__class__, known_properties: Iterable[str] = None):
+        """
+        :param hs_factory: The HSFactory to search with
+        :param hs_class: The object type to search for
+        :param known_properties: The property names this object type has.  Property names are not checked if not
+                                 given
+        """
+
+        self.hs_factory = hs_factory
+        self.hs_class = hs_class
+        self.known_properties = set(known_properties) if known_properties is not None else None
+        self._groups: List[List[Dict]] = []
+        self._properties: List[str] = []
+        self._sorts: List[Dict] = []
+        self._query: Union[str, None] = None
+        self._page_size = MAX_PAGE_SIZE
+
+    def __repr__(self):
+        return f"<Query {self.hs_class.object_type} {self.compile()}>"
+
+    def _clone(self) -> "Query":
+        query = self.__class__(self.hs_factory, self.hs_class)
+        query.known_properties = self.known_properties
+        query._groups = deepcopy(self._groups)
+        query._properties = list(self._properties)
+        query._sorts = list(self._sorts)
+        query._query = self._query
+        query._page_size = self._page_size
+
+        return query
+
+    def _check_property(self, name: str):
+        if self.known_properties is not None and name not in self.known_properties:
+            raise Exception(f"{self.hs_class.object_type} has no property {name}")
+
+    def _filter(self, name: str, lookup: str, value: Any) -> Dict:
+        if lookup not in OPERATORS:
+            raise Exception(f"Unknown lookup {lookup}.  Must be one of {sorted(OPERATORS)}")
+
+        self._check_property(name)
+        operator = OPERATORS[lookup]
+        hs_filter = {"propertyName": name, "operator": operator}
+
+        if operator in ("HAS_PROPERTY", "NOT_HAS_PROPERTY"):
+            if value is not True:
+                raise Exception(f"{name}__{lookup} takes True")
+        elif operator in ("IN", "NOT_IN"):
+            if isinstance(value, (str, bytes)) or not isinstance(value, Iterable):
+                raise Exception(f"{name}__{lookup} takes a list of values")
+            hs_filter.update({"values": [_value(item) for item in value]})
+        elif operator == "BETWEEN":
+            if not isinstance(value, (list, tuple)) or len(value) != 2:
+                raise Exception(f"{name}__{lookup} takes a (low, high) pair")
+            hs_filter.update({"value": _value(value[0]), "highValue": _value(value[1])})
+        else:
+            hs_filter.update({"value": _value(value)})
+
+        return hs_filter
+
+    def _conditions(self, conditions: Dict[str, Any]) -> List[Dict]:
+        filters = []
+        for key, value in conditions.items():
+            name, _, lookup = key.rpartition("__")
+            if not name or lookup not in OPERATORS:
+                name, lookup = key, "eq"
+
+            filters.append(self._filter(name, lookup, value))
+
+        return filters
+
+    def _add(self, filters: List[Dict], new_group: bool) -> "Query":
+        query = self._clone()
+        if new_group or not query._groups:
+            query._groups.append([])
+
+        query._groups[-1].extend(filters)
+        query._validate()
+
+        return query
+
+    def where(self, **conditions) -> "Query":
+        """
+        ANDs conditions onto the current filter group.  Keys are property names, optionally followed by a lookup, e.g.
+        amount__gt=1000 or dealstage__in=["won", "lost"].  A property on its own is an equality check
+        """
+
+        return self._add(self._conditions(conditions), new_group=False)
+
+    def or_where(self, **conditions) -> "Query":
+        """ Starts a new filter group, ORed with the groups before it """
+
+        return self._add(self._conditions(conditions), new_group=True)
+
+    def filter(self, name: str, lookup: str, value: Any = True) -> "Query":
+        """ ANDs a single condition onto the current filter group, for property names that aren't valid keywords """
+
+        return self._add([self._filter(name, lookup, value)], new_group=False)
+
+    def select(self, *properties: str) -> "Query":
+        """ Sets the properties returned for each object """
+
+        for name in properties:
+            self._check_property(name)
+
+        query = self._clone()
+        query._properties = list(dict.fromkeys(properties))
+
+        return query
+
+    def order_by(self, *properties: str) -> "Query":
+        """ Sorts by the given properties.  Prefix a property with - to sort descending """
+
+        query = self._clone()
+        query._sorts = []
+        for name in properties:
+            direction = "DESCENDING" if name.startswith("-") else "ASCENDING"
+            name = name.lstrip("-")
+            self._check_property(name)
+            query._sorts.append({"propertyName": name, "direction": direction})
+
+        query._validate()
+
+        return query
+
+    def search(self, text: str) -> "Query":
+        """ Adds a free text search across the default searchable properties """
+
+        query = self._clone()
+        query._query = text
+
+        return query
+
+    def page_size(self, size: int) -> "Query":
+        """ Sets the Number of results fetched per call.  Defaults to the most HubSpot allows, 100 """
+
+        if not 0 < size <= MAX_PAGE_SIZE:
+            raise Exception(f"page size must be between 1 and {MAX_PAGE_SIZE}")
+
+        query = self._clone()
+        query._page_size = size
+
+        return query
+
+    def _validate(self):
+        groups = [group for group in self._groups if group]
+        if len(groups) > MAX_FILTER_GROUPS:
+            raise Exception(f"HubSpot allows at most {MAX_FILTER_GROUPS} filter groups")
+
+        if any(len(group) > MAX_FILTERS_PER_GROUP for group in groups):
+            raise Exception(f"HubSpot allows at most {MAX_FILTERS_PER_GROUP} filters in a group")
+
+        if sum(len(group) for group in groups) > MAX_FILTERS:
+            raise Exception(f"HubSpot allows at most {MAX_FILTERS} filters in a search")
+
+        if len(self._sorts) > MAX_SORTS:
+            raise Exception(f"HubSpot allows at most {MAX_SORTS} sort per search")
+
+    def compile(self) -> Dict:
+        """
+        :return: The search request body
+        """
+
+        body = {"limit": self._page_size}
+
+        groups = [group for group in self._groups if group]
+        if groups:
+            body.update({"filterGroups": [{"filters": list(group)} for group in groups]})
+
+        if self._sorts:
+            body.update({"sorts": list(self._sorts)})
+
+        if self._properties:
+            body.update({"properties": list(self._properties)})
+
+        if self._query is not None:
+            body.update({"query": self._query})
+
+        return body
+
+    def __iter__(self) -> Iterator[HubSpotObject]:
+        return iter(self.hs_factory.search(self.hs_class, self.compile()))
+
+    def all(self, partitions: int = 1, max_workers: int = 1) -> Iterable[HubSpotObject]:
+        """
+        Runs the search without stopping at the 10,000 result cap.  Sorting is replaced by hs_object_id order
+
+        See HSFactory.search_all
+        """
+
+        return self.hs_factory.search_all(self.hs_class, self.compile(), partitions, max_workers)
+
+    def first(self) -> Union[HubSpotObject, None]:
+        """
+        :return: The first matching object, or None if nothing matches
+        """
+
+        with self.hs_factory.search(self.hs_class, {**self.compile(), "limit": 1}, prefetch=0) as pager:
+            return next(pager, None)
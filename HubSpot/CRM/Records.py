@@ -0,0 +1,248 @@
+import json
+from threading import Lock
+from typing import Any, Dict, NoReturn, Tuple, Union
+
+from .HSObjects import HubSpotObject
+from .Schema import encode
+from .Session import session_for
+
+_MISSING = object()
+
+
+class PropertyTable:
+    """
+    The property names of one object type, each given a fixed position.  Shared by every record of that type, so
+    records only hold their values.
+    """
+
+    __slots__ = ("names", "positions", "_last", "_lock")
+
+    def __init__(self):
+        self.names = []
+        self.positions: Dict[str, int] = dict()
+        # (keys, positions) of the last layout, kept together so threads never pair one's keys with another's positions
+        self._last: Tuple[Tuple[str, ...], Tuple[int, ...]] = ((), ())
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def position(self, name: str) -> int:
+        position = self.positions.get(name)
+        if position is None:
+            with self._lock:
+                position = self.positions.get(name)
+                if position is None:
+                    position = len(self.names)
+                    self.names.append(name)
+                    self.positions[name] = position
+
+        return position
+
+    def layout(self, keys: Tuple[str, ...]) -> Tuple[int, ...]:
+        """
+        :return: The position of each key.  Results of one listing share their keys, so the last layout is reused
+        """
+
+        last_keys, last_positions = self._last
+        if keys == last_keys:
+            return last_positions
+
+        positions = tuple(self.position(key) for key in keys)
+        self._last = (keys, positions)
+
+        return positions
+
+
+class HubSpotRecord:
+    """
+    A memory lean stand in for a HubSpot Object, for holding very large result sets.
+
+    Records keep their property values in a single list, laid out by a PropertyTable shared by every record of the
+    type.  Everything else that is the same for every record (the interface, association, friendly name and object
+    type) lives on the record class, made once per type by each client.  Properties are read as attributes, as on
+    HubSpot Objects, and update_hs, archive, associate and remove_association work the same way.
+    """
+
+    __slots__ = ("hs_id", "archived", "_values", "_dirty")
+
+    hs_class: HubSpotObject.__class__ = None
+    interface: Any = None
+    association: Any = None
+    table: PropertyTable = None
+    friendly_name: str = ""
+    object_type: str = None
+    api_version: int = 3
+
+    def __init__(self, data: Dict):
+        properties = data.get("properties", {})
+        values = [_MISSING] * len(self.table)
+        for position, value in zip(self.table.layout(tuple(properties)), properties.values()):
+            if position >= len(values):
+                values.extend([_MISSING] * (position + 1 - len(values)))
+            values[position] = value
+
+        self.hs_id = data["id"]
+        self.archived = data.get("archived", False)
+        self._values = values
+        self._dirty = None
+
+    def __getattr__(self, name: str) -> Any:
+        position = self.table.positions.get(name)
+        if position is not None and position < len(self._values) and self._values[position] is not _MISSING:
+            return self._values[position]
+
+        raise AttributeError(f"{self.friendly_name} has no property {name}")
+
+    def __setattr__(self, name: str, value: Any):
+        if name in HubSpotRecord.__slots__:
+            object.__setattr__(self, name, value)
+            return
+
+        self._set(name, value)
+        if self._dirty is None:
+            self._dirty = dict()
+        self._dirty[name] = None
+
+        session = session_for(self)
+        if session is not None:
+            session.add(self)
+
+    def _set(self, name: str, value: Any):
+        position = self.table.position(name)
+        if position >= len(self._values):
+            self._values.extend([_MISSING] * (position + 1 - len(self._values)))
+        self._values[position] = value
+
+    def __str__(self):
+        return f"<{self.friendly_name} {self.hs_id}>"
+
+    __repr__ = __str__
+
+    @property
+    def endpoint(self) -> str:
+        return f"/crm/v{self.api_version}/objects/{self.object_type}/{self.hs_id}"
+
+    @property
+    def properties(self) -> Dict[str, Any]:
+        """ The properties of the record as a new dict """
+
+        return {name: value for name, value in zip(self.table.names, self._values) if value is not _MISSING}
+
+    @property
+    def changes(self) -> Dict[str, Any]:
+        """ The properties assigned since the record was loaded or last saved, and their new values """
+
+        return {name: getattr(self, name) for name in self._dirty or ()}
+
+    def _clean(self, changes: Dict = None) -> NoReturn:
+        if changes is None:
+            self._dirty = None
+            return
+
+        for name, value in changes.items():
+            if self._dirty and getattr(self, name, _MISSING) == value:
+                self._dirty.pop(name, None)
+
+    def _apply(self, properties: Dict) -> NoReturn:
+        for name, value in properties.items():
+            self._set(name, value)
+            if self._dirty:
+                self._dirty.pop(name, None)
+
+    @property
+    def _data(self) -> Dict:
+        return {"id": self.hs_id, "properties": self.properties, "archived": self.archived}
+
+    def to_object(self) -> HubSpotObject:
+        """ Makes a full HubSpot Object of this record """
+
+        return self.hs_class(self.interface, self.association, self._data)
+
+    def update_hs(self, properties: Dict) -> NoReturn:
+        """
+        Updates the object in HubSpot with the given properties, and the local
+        record is updated inplace.
+
+        :param properties: The properties to update
+
+        :return: NoReturn
+        """
+
+        data = json.dumps(encode(properties))
+
+        return self.interface.call_then(self.endpoint, self._updated, method="put", data=data)
+
+    def _updated(self, response) -> NoReturn:
+        self._apply(response.json()["properties"])
+        self._invalidate()
+
+    def _invalidate(self) -> NoReturn:
+        cache = getattr(self.interface, "cache", None)
+        if cache is not None:
+            cache.invalidate(self.object_type, str(self.hs_id))
+
+    def archive(self) -> NoReturn:
+        """
+        Archives the object in hubspot, and archived is set to true in local record
+
+        :return: No Return
+        """
+
+        return self.interface.call_then(self.endpoint, self._archived, method="delete")
+
+    def _archived(self, response) -> NoReturn:
+        self.archived = True
+        self._invalidate()
+
+    def associate(self, hs_object: Union[HubSpotObject, "HubSpotRecord"], *args, **kwargs) -> NoReturn:
+        """
+        Creates an association from this record to the hs_object
+
+        Inside a session the association is created when the session ends.  See Associations.create_association for
+        more arguments
+        """
+
+        session = session_for(self)
+        if session is not None:
+            return session.associate(self, hs_object, *args, **kwargs)
+
+        return self.association.create_association(self, hs_object, *args, **kwargs)
+
+    def remove_association(self, hs_object: Union[HubSpotObject, "HubSpotRecord"]) -> NoReturn:
+        """
+        Removes the association of this record to the defined object.  Inside a session it is removed when the session
+        ends
+        """
+
+        session = session_for(self)
+        if session is not None:
+            return session.remove_association(self, hs_object)
+
+        return self.association.remove_association(self, hs_object)
+
+
+def record_class(hs_class: HubSpotObject.__class__, interface, association) -> type:
+    """
+    Makes the record class for this object type.  Records of a type share their class, so make it once and keep it for
+    as long as the interface is used, as HSFactory does
+
+    :param hs_class: The object type in question
+    :param interface: The interface records use to talk to HubSpot
+    :param association: The Associations records use to associate
+
+    :return: a subclass of HubSpotRecord
+    """
+
+    friendly_name = hs_class.__dataclass_fields__["friendly_name"].default
+
+    return type(f"{hs_class.__name__}Record", (HubSpotRecord, ), {
+        "__slots__": (),
+        "hs_class": hs_class,
+        "interface": interface,
+        "association": association,
+        "table": PropertyTable(),
+        "friendly_name": friendly_name if isinstance(friendly_name, str) else hs_class.__name__,
+        "object_type": hs_class.object_type,
+        "api_version": hs_class.api_version,
+    })
@@ -0,0 +1,387 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import sqlite3
+from threading import Lock
+from time import time
+from typing import Any, Callable, Dict, Iterable, List, Union
+
+from .HSObjects import HubSpotObject
+
+
+def _number(value: str) -> Union[int, float]:
+    number = float(value)
+
+    return int(number) if number.is_integer() and "." not in value and "e" not in value.lower() else number
+
+
+def _bool(value: str) -> bool:
+    return value.lower() == "true"
+
+
+def _datetime(value: str) -> datetime:
+    # HubSpot sends datetimes as ISO 8601, but some older properties hold epoch milliseconds
+    if value.isdigit():
+        return datetime.fromtimestamp(int(value) / 1000, tz=timezone.utc)
+
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(timezone.utc)
+
+
+def _date(value: str) -> date:
+    if value.isdigit():
+        return datetime.fromtimestamp(int(value) / 1000, tz=timezone.utc).date()
+
+    return date.fromisoformat(value[:10])
+
+
+# How a value of each HubSpot property type is read.  Any other type is kept as a string
+CONVERTERS: Dict[str, Callable[[str], Any]] = {
+    "number": _number,
+    "bool": _bool,
+    "datetime": _datetime,
+    "date": _date,
+}
+
+
+def _encode(value: Any, hs_type: str = None) -> Any:
+    if isinstance(value, datetime):
+        if hs_type == "date":
+            return value.date().isoformat()
+
+        # Naive datetimes are taken as UTC, as HubSpot's are
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+    if isinstance(value, date):
+        return f"{value.isoformat()}T00:00:00.000Z" if hs_type == "datetime" else value.isoformat()
+
+    if isinstance(value, bool):
+        return "true" if value else "false"
+
+    if isinstance(value, Decimal):
+        return format(value, "f")
+
+    return value
+
+
+def encode(properties: Dict[str, Any], schema: "PropertySchema" = None) -> Dict[str, Any]:
+    """
+    Writes property values the way HubSpot reads them, so values read with typed=True can be sent back.  Datetimes are
+    sent as ISO 8601 in UTC, dates as YYYY-MM-DD, booleans as true or false and Decimals as plain numbers
+
+    :param properties: The properties of an object to be created or updated
+    :param schema: The schema of the object type.  Used to send a datetime to a date property as its date, and a date
+                   to a datetime property as midnight UTC
+
+    :return: A copy of properties that json.dumps can write
+    """
+
+    if schema is None:
+        return {name: _encode(value) for name, value in properties.items()}
+
+    return {name: _encode(value, schema.type(name)) for name, value in properties.items()}
+
+
+class PropertySchema:
+    """
+    The properties HubSpot defines for one object type, as returned by /crm/v3/properties/{objectType}
+    """
+
+    def __init__(self, hs_class: HubSpotObject.__class__, properties: Iterable[Dict]):
+        """
+        :param hs_class: The object type the properties belong to
+        :param properties: The property definitions, as HubSpot returns them
+        """
+
+        self.hs_class = hs_class
+        self.properties: Dict[str, Dict] = {prop["name"]: prop for prop in properties}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.properties
+
+    def __iter__(self):
+        return iter(self.properties)
+
+    def __len__(self):
+        return len(self.properties)
+
+    def type(self, name: str) -> str:
+        """
+        :return: The HubSpot type of the property, string if it isn't known
+        """
+
+        return self.properties.get(name, {}).get("type", "string")
+
+    def convert(self, name: str, value: Union[str, None]) -> Any:
+        """
+        :return: The value read as the property's type.  Empty values are None
+        """
+
+        if value is None or value == "":
+            return None
+
+        converter = CONVERTERS.get(self.type(name))
+
+        return converter(value) if converter is not None else value
+
+    def column(self, name: str, values: List[Union[str, None]]) -> List[Any]:
+        """
+        :return: A column of values for one property, each read as the property's type
+        """
+
+        converter = CONVERTERS.get(self.type(name))
+        if converter is None:
+            return [value if value != "" else None for value in values]
+
+        return [converter(value) if value is not None and value != "" else None for value in values]
+
+    def decode(self, results: List[Dict]) -> List[Dict]:
+        """
+        Reads the properties of a page of results as their types, inplace.  Each property is read for the whole page
+        at once, so the converter for it is looked up once per page rather than once per value
+
+        :param results: The results as HubSpot returns them
+
+        :return: results
+        """
+
+        names = dict.fromkeys(name for result in results for name in result.get("properties", {}))
+        for name in names:
+            column = self.column(name, [result.get("properties", {}).get(name) for result in results])
+            for result, value in zip(results, column):
+                if name in result.get("properties", {}):
+                    result["properties"][name] = value
+
+        return results
+
+    def columns(self, results: List[Dict], names: Iterable[str] = None, numpy: bool = False) -> Dict[str, Any]:
+        """
+        Reads a page of results into columns
+
+        :param results: The results as HubSpot returns them
+        :param names: The properties to read.  Every property in the results if not given
+        :param numpy: Return number columns as float64 arrays and datetime and date columns as datetime64 arrays,
+                      with empty values as NaN and NaT.  Other columns are lists either way
+
+        :return: {"id": ids, property name: values}
+        """
+
+        if names is None:
+            names = dict.fromkeys(name for result in results for name in result.get("properties", {}))
+
+        columns = {"id": [result["id"] for result in results]}
+        for name in names:
+            raw = [result.get("properties", {}).get(name) for result in results]
+            columns[name] = self._array(name, raw) if numpy else self.column(name, raw)
+
+        return columns
+
+    def _array(self, name: str, values: List[Union[str, None]]):
+        try:
+            import numpy
+        except ImportError:
+            raise Exception("numpy columns require numpy.  Install it with pip install numpy")
+
+        hs_type = self.type(name)
+        if hs_type == "number":
+            return numpy.array([float(value) if value else numpy.nan for value in values], dtype="float64")
+        if hs_type == "datetime":
+            return numpy.array([int(_datetime(value).timestamp() * 1000) if value else "NaT" for value in values],
+                               dtype="datetime64[ms]")
+        if hs_type == "date":
+            return numpy.array([_date(value) if value else "NaT" for value in values], dtype="datetime64[D]")
+
+        return self.column(name, values)
+
+    def validate(self, properties: Dict[str, Any]):
+        """
+        Checks property names and values against the schema, raising for any HubSpot would reject
+
+        :param properties: The properties of an object to be created or updated
+        """
+
+        unknown = [name for name in properties if name not in self.properties]
+        if unknown:
+            raise Exception(f"{self.hs_class.object_type} has no properties {unknown}")
+
+        for name, value in properties.items():
+            if value is None or value == "":
+                continue
+
+            hs_type = self.type(name)
+            if hs_type in CONVERTERS and not isinstance(value, (int, float, bool, date)):
+                try:
+                    CONVERTERS[hs_type](str(value))
+                except ValueError:
+                    raise Exception(f"{value!r} is not a valid {hs_type} for {name}")
+
+            options = [option["value"] for option in self.properties[name].get("options") or []]
+            if hs_type == "enumeration" and options:
+                # Multiple checkbox values are separated by ;
+                bad = [item for item in str(value).split(";") if item and item not in options]
+                if bad:
+                    raise Exception(f"{bad} are not options of {name}.  Must be one of {options}")
+
+
+def default_path(access_token: str) -> Path:
+    """
+    :param access_token: The App Access token of the portal
+
+    :return: Where the schemas of the portal are kept between runs, in the user's cache directory.  Portals have their
+             own custom properties, so each token gets its own file, named by a hash of the token
+    """
+
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+
+    digest = hashlib.sha256(access_token.encode()).hexdigest()[:16]
+
+    return Path(base) / "HubSpot" / f"schemas-{digest}.sqlite"
+
+
+class SchemaRegistry:
+    """
+    Holds the property schemas of each object type, so they are fetched from HubSpot once.
+
+    Schemas are kept in memory, and in sqlite when given a path so they last between runs.  A schema older than the
+    TTL is fetched again the next time it is loaded.  Clients keep their schemas in the user's cache directory unless
+    given a registry, see for_token.
+    """
+
+    def __init__(self, path: Union[str, Path] = None, ttl: float = 86400):
+        """
+        :param path: The sqlite database to keep schemas in.  Only kept in memory if not given
+        :param ttl: The Number of seconds a schema is kept for
+        """
+
+        self.path = str(path) if path is not None else None
+        self.ttl = ttl
+        self._schemas: Dict[str, tuple] = dict()
+        # The object types whose held schema was put by this process, rather than read from an earlier run
+        self._fresh = set()
+        self._lock = Lock()
+        self._connection = None
+        if self.path is not None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            with self._connection:
+                self._connection.execute(
+                    "CREATE TABLE IF NOT EXISTS property_schemas ("
+                    "object_type TEXT PRIMARY KEY, "
+                    "properties TEXT NOT NULL, "
+                    "fetched REAL NOT NULL)"
+                )
+
+    @classmethod
+    def for_token(cls, access_token: str, ttl: float = 86400) -> "SchemaRegistry":
+        """
+        :param access_token: The App Access token of the portal
+        :param ttl: The Number of seconds a schema is kept for
+
+        :return: A registry kept at default_path(access_token).  Kept in memory only if the file can't be opened
+        """
+
+        path = default_path(access_token)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            return cls(path, ttl)
+        except (OSError, sqlite3.Error) as e:
+            logging.warning(f"Property schemas can not be kept in {path}, so are only held in memory: {e}")
+            return cls(ttl=ttl)
+
+    def get(self, hs_class: HubSpotObject.__class__) -> Union[PropertySchema, None]:
+        """
+        :return: The schema of the object type if it is held and not expired, without calling HubSpot
+        """
+
+        with self._lock:
+            entry = self._schemas.get(hs_class.object_type)
+            if entry is None and self._connection is not None:
+                row = self._connection.execute("SELECT properties, fetched FROM property_schemas WHERE object_type = ?",
+                                               (hs_class.object_type, )).fetchone()
+                if row is not None:
+                    entry = self._schemas[hs_class.object_type] = (
+                        PropertySchema(hs_class, json.loads(row[0])), row[1]
+                    )
+
+        if entry is None or entry[1] + self.ttl <= time():
+            return None
+
+        return entry[0]
+
+    def put(self, schema: PropertySchema):
+        fetched = time()
+        with self._lock:
+            self._schemas[schema.hs_class.object_type] = (schema, fetched)
+            self._fresh.add(schema.hs_class.object_type)
+            if self._connection is not None:
+                with self._connection:
+                    self._connection.execute("INSERT OR REPLACE INTO property_schemas VALUES (?, ?, ?)",
+                                             (schema.hs_class.object_type,
+                                              json.dumps(list(schema.properties.values())), fetched))
+
+    def fresh(self, hs_class: HubSpotObject.__class__) -> bool:
+        """
+        :return: True if the held schema of the object type was fetched by this process.  A schema read from an earlier
+                 run may be missing properties and options added in HubSpot since
+        """
+
+        with self._lock:
+            return hs_class.object_type in self._fresh
+
+    def get_or_load(self, hs_class: HubSpotObject.__class__, load: Callable[[], PropertySchema]) -> PropertySchema:
+        """
+        Returns the held schema, loading and holding it if there isn't one
+        """
+
+        schema = self.get(hs_class)
+        if schema is None:
+            schema = load()
+            self.put(schema)
+
+        return schema
+
+    def invalidate(self, hs_class: HubSpotObject.__class__ = None):
+        """ Forgets the schema of an object type, or of every object type """
+
+        with self._lock:
+            if hs_class is None:
+                self._schemas.clear()
+                self._fresh.clear()
+            else:
+                self._schemas.pop(hs_class.object_type, None)
+                self._fresh.discard(hs_class.object_type)
+
+            if self._connection is not None:
+                with self._connection:
+                    if hs_class is None:
+                        self._connection.execute("DELETE FROM property_schemas")
+                    else:
+                        self._connection.execute("DELETE FROM property_schemas WHERE object_type = ?",
+                                                 (hs_class.object_type, ))
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+
+
+def fetch_schema(interface, base_url: str, hs_class: HubSpotObject.__class__) -> PropertySchema:
+    """
+    Fetches the property definitions of an object type from HubSpot
+
+    :param interface: The interface to call HubSpot with
+    :param base_url: The base url of the CRM api
+    :param hs_class: The object type in question
+
+    :return: The PropertySchema of the object type.  Awaitable on an AsyncInterface
+    """
+
+    return interface.call_then(f"{base_url}/v3/properties/{hs_class.object_type}",
+                               lambda response: PropertySchema(hs_class, response.json()["results"]))
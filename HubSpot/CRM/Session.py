@@ -0,0 +1,181 @@
+from contextvars import ContextVar
+from typing import Any, Dict, Generator, List, NoReturn, Tuple, Union
+
+from .Batch import BATCH_SIZE, BatchError
+
+# The session changes are collected into, while a `with crm.session()` block is running
+current_session: ContextVar = ContextVar("current_session", default=None)
+
+
+class Session:
+    """
+    A unit of work: collects property changes and associations, and sends them when the session ends.
+
+        with client.crm.session() as session:
+            deal.amount = "1500"
+            deal.dealstage = "closedwon"
+            deal.associate(company)
+
+    Assigning a property of an object, or associating it, inside the block records the change rather than calling
+    HubSpot.  When the block ends, only the changed properties are sent, in as few batch updates as possible, grouped
+    by object type, and associations are created and removed in batches.  If the block raises nothing is sent.
+
+    Objects are recorded in the thread the session was started in; objects changed in other threads can be added with
+    add.  If any change fails, the failures are in session.errors and an Exception is raised.  Failed changes stay
+    pending, so calling flush again retries them.
+    """
+
+    def __init__(self, crm):
+        """
+        :param crm: The CRM whose objects the session collects changes for
+        """
+
+        self.crm = crm
+        self.errors: List[BatchError] = []
+        self._objects: Dict[int, Any] = dict()
+        self._associations: Dict[Tuple, Tuple] = dict()
+        self._token = None
+
+    def __repr__(self):
+        return f"<Session objects={len(self.dirty)} associations={len(self._associations)}>"
+
+    def __enter__(self) -> "Session":
+        self._token = current_session.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        current_session.reset(self._token)
+        self._token = None
+
+        if exc_type is None:
+            self.flush()
+
+    def owns(self, hs_object) -> bool:
+        """
+        :return: True if the object belongs to this session's CRM
+        """
+
+        return getattr(hs_object, "interface", None) is self.crm.hs_factory.interface
+
+    def add(self, *hs_objects) -> NoReturn:
+        """ Has the session send the changed properties of these objects when it is flushed """
+
+        for hs_object in hs_objects:
+            self._objects[id(hs_object)] = hs_object
+
+    @property
+    def dirty(self) -> List:
+        """ The objects with changes waiting to be sent """
+
+        return [hs_object for hs_object in self._objects.values() if hs_object.changes]
+
+    @staticmethod
+    def _key(hs_obj_1, hs_obj_2) -> Tuple:
+        return (getattr(hs_obj_1, "object_type", "files"), str(hs_obj_1.hs_id),
+                getattr(hs_obj_2, "object_type", "files"), str(hs_obj_2.hs_id))
+
+    def associate(self, hs_obj_1, hs_obj_2, definer: str = "HUBSPOT_DEFINED", association_type: Union[int, str] = None
+                  ) -> NoReturn:
+        """
+        Records an association to create when the session is flushed.  See Associations.create_association
+        """
+
+        self._associations[self._key(hs_obj_1, hs_obj_2)] = ("create", hs_obj_1, hs_obj_2, definer.upper(),
+                                                             association_type)
+
+    def remove_association(self, hs_obj_1, hs_obj_2) -> NoReturn:
+        """
+        Records an association to remove when the session is flushed.  Cancels an association to create between the
+        same objects instead, if one is pending
+        """
+
+        key = self._key(hs_obj_1, hs_obj_2)
+        if self._associations.get(key, (None, ))[0] == "create":
+            del self._associations[key]
+        else:
+            self._associations[key] = ("remove", hs_obj_1, hs_obj_2, None, None)
+
+    def discard(self) -> NoReturn:
+        """ Forgets every pending change.  Objects keep the values assigned to them """
+
+        for hs_object in self._objects.values():
+            hs_object._clean()
+        self._objects.clear()
+        self._associations.clear()
+        self.errors = []
+
+    def _flush_updates(self) -> Generator[Any, Any, List[BatchError]]:
+        groups = dict()
+        for hs_object in self.dirty:
+            hs_class = getattr(hs_object, "hs_class", hs_object.__class__)
+            groups.setdefault(hs_class, []).append((hs_object, hs_object.changes))
+
+        errors = []
+        for hs_class, updates in groups.items():
+            result = yield from self.crm.hs_factory._batch_update(hs_class, updates, BATCH_SIZE)
+            failed = {error.index for error in result.errors}
+            for error in result.errors:
+                errors.append(BatchError(error.index, updates[error.index][0], error.message, error.category,
+                                         error.context))
+
+            for index, (hs_object, changes) in enumerate(updates):
+                if index not in failed:
+                    hs_object._clean(changes)
+
+        for key, hs_object in list(self._objects.items()):
+            if not hs_object.changes:
+                del self._objects[key]
+
+        return errors
+
+    def _flush_associations(self) -> Generator[Any, Any, List[BatchError]]:
+        groups = dict()
+        for key, (action, hs_obj_1, hs_obj_2, definer, association_type) in self._associations.items():
+            groups.setdefault((action, definer), []).append((key, (hs_obj_1, hs_obj_2, association_type)))
+
+        errors = []
+        for (action, definer), items in groups.items():
+            associations = [association for _, association in items]
+            if action == "create":
+                result = yield from self.crm.association._batch_create(associations, definer, BATCH_SIZE)
+            else:
+                result = yield from self.crm.association._batch_remove(associations, BATCH_SIZE)
+
+            failed = {error.index for error in result.errors}
+            errors.extend(result.errors)
+            for index, (key, _) in enumerate(items):
+                if index not in failed:
+                    del self._associations[key]
+
+        return errors
+
+    def flush(self) -> NoReturn:
+        """
+        Sends every pending change.  Changes that fail stay pending
+
+        :raises Exception: if any change failed.  The failures are in session.errors, each holding the object or the
+                           association it was for
+
+        :return: Awaitable on the AsyncClient
+        """
+
+        return self.crm.hs_factory.interface.run(self._flush())
+
+    def _flush(self) -> Generator[Any, Any, None]:
+        updates = yield from self._flush_updates()
+        associations = yield from self._flush_associations()
+
+        self.errors = updates + associations
+        if self.errors:
+            raise Exception(f"{len(self.errors)} changes failed and are still pending: "
+                            + "; ".join(f"{error.input}: {error.message}" for error in self.errors[:5]))
+
+
+def session_for(hs_object) -> Union[Session, None]:
+    """
+    :return: The running session the object belongs to, if there is one
+    """
+
+    session = current_session.get()
+
+    return session if session is not None and session.owns(hs_object) else None
@@ -0,0 +1,299 @@
+from datetime import datetime, timezone
+import json
+from itertools import islice
+from pathlib import Path
+import re
+import sqlite3
+from threading import Lock
+from time import time
+from typing import Dict, Generator, Iterable, List, Tuple, Union
+
+from .HSObjects import HubSpotObject
+
+# Contacts keep their last modified date under a different name to every other object
+MODIFIED_PROPERTIES = {
+    "contacts": "lastmodifieddate",
+}
+
+
+def modified_property(hs_class: HubSpotObject.__class__) -> str:
+    return MODIFIED_PROPERTIES.get(hs_class.object_type, "hs_lastmodifieddate")
+
+
+def _epoch_ms(value: str) -> int:
+    if value.isdigit():
+        return int(value)
+
+    return int(datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(timezone.utc).timestamp() * 1000)
+
+
+class LocalMirror:
+    """
+    A local sqlite copy of HubSpot Objects, with one table per object type.
+
+    Each table holds the id, archived flag, last modified date and the properties of each object as JSON.  Sync
+    checkpoints are kept alongside, so an interrupted sync picks up where it stopped.
+    """
+
+    def __init__(self, path: Union[str, Path] = ":memory:"):
+        """
+        :param path: The sqlite database to keep the mirror in.  Kept in memory if not given
+        """
+
+        self.path = str(path)
+        self._lock = Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._tables = set()
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS sync_checkpoints ("
+                "object_type TEXT PRIMARY KEY, "
+                "high_water TEXT, "
+                "after TEXT, "
+                "updated REAL NOT NULL)"
+            )
+
+    @staticmethod
+    def table(hs_class: HubSpotObject.__class__) -> str:
+        """
+        :return: The name of the table holding objects of this type
+        """
+
+        return re.sub(r"[^a-z0-9_]", "_", hs_class.object_type.lower())
+
+    def _ensure_table(self, hs_class: HubSpotObject.__class__) -> str:
+        table = self.table(hs_class)
+        if table not in self._tables:
+            with self._connection:
+                self._connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    "id TEXT PRIMARY KEY, "
+                    "archived INTEGER NOT NULL, "
+                    "modified TEXT, "
+                    "properties TEXT NOT NULL)"
+                )
+                self._connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_modified ON {table} (modified)")
+            self._tables.add(table)
+
+        return table
+
+    def upsert(self, hs_class: HubSpotObject.__class__, results: Iterable[Dict],
+               checkpoint: Tuple[Union[str, None], Union[str, None]] = None) -> int:
+        """
+        Inserts or replaces objects, and optionally saves a checkpoint in the same transaction
+
+        :param hs_class: The object type in question
+        :param results: The objects as HubSpot returns them
+        :param checkpoint: (high water mark, cursor) to save for this object type
+
+        :return: The Number of objects written
+        """
+
+        modified = modified_property(hs_class)
+        rows = [(str(result["id"]), int(bool(result.get("archived", False))),
+                 result.get("properties", {}).get(modified), json.dumps(result.get("properties", {})))
+                for result in results]
+
+        with self._lock:
+            table = self._ensure_table(hs_class)
+            with self._connection:
+                self._connection.executemany(f"INSERT OR REPLACE INTO {table} VALUES (?, ?, ?, ?)", rows)
+                if checkpoint is not None:
+                    self._save_checkpoint(hs_class, *checkpoint)
+
+        return len(rows)
+
+    def _save_checkpoint(self, hs_class: HubSpotObject.__class__, high_water: Union[str, None],
+                         after: Union[str, None]):
+        self._connection.execute("INSERT OR REPLACE INTO sync_checkpoints VALUES (?, ?, ?, ?)",
+                                 (hs_class.object_type, high_water, after, time()))
+
+    def save_checkpoint(self, hs_class: HubSpotObject.__class__, high_water: Union[str, None],
+                        after: Union[str, None] = None):
+        """
+        :param hs_class: The object type in question
+        :param high_water: The last modified date everything up to has been synced
+        :param after: The search cursor of a sync in progress
+        """
+
+        with self._lock, self._connection:
+            self._save_checkpoint(hs_class, high_water, after)
+
+    def checkpoint(self, hs_class: HubSpotObject.__class__) -> Tuple[Union[str, None], Union[str, None]]:
+        """
+        :return: (high water mark, cursor) saved for this object type.  Both are None if it was never synced
+        """
+
+        with self._lock:
+            row = self._connection.execute("SELECT high_water, after FROM sync_checkpoints WHERE object_type = ?",
+                                           (hs_class.object_type, )).fetchone()
+
+        return (row["high_water"], row["after"]) if row is not None else (None, None)
+
+    def reset(self, hs_class: HubSpotObject.__class__):
+        """ Forgets the checkpoint for this object type, so the next sync pulls everything again """
+
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM sync_checkpoints WHERE object_type = ?", (hs_class.object_type, ))
+
+    @staticmethod
+    def _row(row: sqlite3.Row) -> Dict:
+        return {"id": row["id"], "archived": bool(row["archived"]), "properties": json.loads(row["properties"])}
+
+    def get(self, hs_class: HubSpotObject.__class__, hs_id: Union[int, str]) -> Union[Dict, None]:
+        """
+        :return: The mirrored object as HubSpot returned it, or None if it isn't in the mirror
+        """
+
+        with self._lock:
+            table = self._ensure_table(hs_class)
+            row = self._connection.execute(f"SELECT * FROM {table} WHERE id = ?", (str(hs_id), )).fetchone()
+
+        return self._row(row) if row is not None else None
+
+    def objects(self, hs_class: HubSpotObject.__class__, where: str = None, params: Iterable = ()
+                ) -> Generator[Dict, None, None]:
+        """
+        Reads mirrored objects
+
+        :param hs_class: The object type in question
+        :param where: An SQL condition on the id, archived, modified or properties columns.  Properties can be
+                      reached with json_extract, e.g. "json_extract(properties, '$.amount') > ?"
+        :param params: The parameters of the condition
+
+        :return: A Generator of the objects as HubSpot returned them
+        """
+
+        with self._lock:
+            table = self._ensure_table(hs_class)
+            sql = f"SELECT * FROM {table}" + (f" WHERE {where}" if where else "")
+            rows = self._connection.execute(sql, tuple(params)).fetchall()
+
+        for row in rows:
+            yield self._row(row)
+
+    def count(self, hs_class: HubSpotObject.__class__) -> int:
+        with self._lock:
+            table = self._ensure_table(hs_class)
+            return self._connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def query(self, sql: str, params: Iterable = ()) -> List[sqlite3.Row]:
+        """ Runs any SQL against the mirror """
+
+        with self._lock:
+            return self._connection.execute(sql, tuple(params)).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class SyncEngine:
+    """
+    Brings a LocalMirror up to date with HubSpot by searching for objects modified since the last sync.
+
+    Each page is a new search for the objects modified at or after the latest modified date seen so far, sorted by
+    that date, so an object changed while the sync runs moves later without shifting the others past a page boundary.
+    Objects at the latest date are read again by the next page, which the upsert absorbs.  A full page of objects
+    sharing one modified date is paged through by id instead.  No search goes past its first page, so the 10,000
+    result cap of search is never reached.  The checkpoint is saved with every page.  Objects archived in HubSpot are
+    not returned by search, so they stay in the mirror.
+    """
+
+    def __init__(self, hs_factory, mirror: LocalMirror, page_size: int = 100):
+        """
+        :param hs_factory: The HSFactory to search with
+        :param mirror: The mirror to keep up to date
+        :param page_size: The Number of objects to fetch per call.  HubSpot allows up to 100
+        """
+
+        self.hs_factory = hs_factory
+        self.mirror = mirror
+        self.page_size = page_size
+
+    def _filters(self, hs_class: HubSpotObject.__class__, high_water: Union[str, None], properties: List,
+                 strict: bool = False) -> Dict:
+        modified = modified_property(hs_class)
+        filters = {
+            "sorts": [{"propertyName": modified, "direction": "ASCENDING"}],
+            "properties": sorted(set(properties) | {modified}),
+            "limit": self.page_size,
+        }
+
+        if high_water is not None:
+            filters.update({"filterGroups": [{"filters": [
+                {"propertyName": modified, "operator": "GT" if strict else "GTE", "value": str(_epoch_ms(high_water))}
+            ]}]})
+
+        return filters
+
+    def _tie_filters(self, hs_class: HubSpotObject.__class__, high_water: str, after: str, properties: List) -> Dict:
+        """ The objects modified at exactly high_water with an id above after, in id order """
+
+        modified = modified_property(hs_class)
+        value = str(_epoch_ms(high_water))
+
+        return {
+            "sorts": [{"propertyName": "hs_object_id", "direction": "ASCENDING"}],
+            "properties": sorted(set(properties) | {modified}),
+            "limit": self.page_size,
+            "filterGroups": [{"filters": [
+                {"propertyName": modified, "operator": "GTE", "value": value},
+                {"propertyName": modified, "operator": "LTE", "value": value},
+                {"propertyName": "hs_object_id", "operator": "GT", "value": after},
+            ]}],
+        }
+
+    def _page(self, hs_class: HubSpotObject.__class__, filters: Dict) -> List[Dict]:
+        """ The first page of a search, fetched without prefetching the next """
+
+        with self.hs_factory.search(hs_class, filters, prefetch=0) as pager:
+            return [hs_object._data for hs_object in islice(pager, self.page_size)]
+
+    def sync(self, hs_class: HubSpotObject.__class__, properties: List = None) -> int:
+        """
+        Pulls every object of this type modified since the last sync into the mirror
+
+        :param hs_class: The object type in question
+        :param properties: The Properties to mirror.  Only HubSpot's defaults if not given
+
+        :return: The Number of objects written to the mirror, counting those read again
+        """
+
+        modified = modified_property(hs_class)
+        properties = properties or []
+        # after is the last id read of the objects sharing the high water mark, while they are paged through by id
+        high_water, after = self.mirror.checkpoint(hs_class)
+        strict = False
+        written = 0
+
+        while True:
+            if after is not None:
+                page = self._page(hs_class, self._tie_filters(hs_class, high_water, after, properties))
+                after = page[-1]["id"] if len(page) >= self.page_size else None
+                # Once they are all read, carry on after the high water mark rather than reading them again
+                strict = after is None
+                written += self.mirror.upsert(hs_class, page, (high_water, after))
+                continue
+
+            page = self._page(hs_class, self._filters(hs_class, high_water, properties, strict))
+            strict = False
+
+            latest = high_water
+            for result in page:
+                value = result["properties"].get(modified)
+                if value is not None and (latest is None or _epoch_ms(value) > _epoch_ms(latest)):
+                    latest = value
+
+            if len(page) >= self.page_size and latest == high_water:
+                # A whole page shares the high water mark, so starting from it again would read the same page
+                after = "0"
+
+            # Everything modified before the latest date on the page has been read
+            written += self.mirror.upsert(hs_class, page, (latest, after))
+
+            if len(page) < self.page_size:
+                return written
+
+            high_water = latest
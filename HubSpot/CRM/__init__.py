@@ -1,6 +1,17 @@
 from .Associations import Associations
+from .AssociationTypes import AssociationTypeResolver
+from .AsyncCRM import AsyncCRM, AsyncQuery
+from .Batch import BatchError, BatchResult
 from .CRM import CRM
+from .Export import Exporter
+from .Graph import AssociationIndex
 from .HSFactory import HSFactory
 from .HSObjects import (COMPANY, CONTACT, DEAL, FEEDBACK_SUBMISSION, LINE_ITEM, PRODUCT, TICKET, CALL,
                         EMAIL, MEETING, NOTE, TASK, HubSpotObject, _hs_engagement)
+from .Pager import AsyncPager, Pager
 from .Pipeline import Pipeline, PipelineFactory
+from .Query import Query
+from .Records import HubSpotRecord, PropertyTable, record_class
+from .Schema import PropertySchema, SchemaRegistry
+from .Session import Session
+from .Sync import LocalMirror, SyncEngine
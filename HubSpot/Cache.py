@@ -0,0 +1,166 @@
+from collections import OrderedDict
+from threading import Event, Lock
+from time import monotonic
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class _Load:
+    """ A load in progress that other callers for the same key wait on """
+
+    def __init__(self):
+        self.done = Event()
+        self.value = None
+        self.error = None
+
+
+class ObjectCache:
+    """
+    A thread safe, size bounded cache with a TTL per kind of entry and least recently used eviction.
+
+    Entries are grouped by kind, e.g. the object type of a HubSpot Object or "pipelines".  When several threads miss
+    on the same key at once only one of them loads it; the others wait for and share its result.
+
+    Cached objects are shared between callers, so changes made to one are seen by everyone holding it.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300, ttls: Dict[str, float] = None):
+        """
+        :param max_size: The Number of entries to keep before the least recently used is evicted
+        :param ttl: The Number of seconds an entry is kept for
+        :param ttls: The Number of seconds entries are kept for by kind, e.g. {"companies": 600, "pipelines": 3600}
+        """
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self.ttls = dict(ttls or {})
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]" = OrderedDict()
+        self._loads: Dict[Tuple[str, Hashable], _Load] = dict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _lookup(self, entry_key: Tuple[str, Hashable]) -> Tuple[bool, Any]:
+        entry = self._entries.get(entry_key)
+        if entry is None:
+            return False, None
+
+        expires, value = entry
+        if expires <= monotonic():
+            del self._entries[entry_key]
+            return False, None
+
+        self._entries.move_to_end(entry_key)
+        return True, value
+
+    def _store(self, entry_key: Tuple[str, Hashable], value: Any):
+        self._entries[entry_key] = (monotonic() + self.ttls.get(entry_key[0], self.ttl), value)
+        self._entries.move_to_end(entry_key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, kind: str, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            found, value = self._lookup((kind, key))
+
+        return value if found else default
+
+    def set(self, kind: str, key: Hashable, value: Any):
+        with self._lock:
+            self._store((kind, key), value)
+
+    def get_or_load(self, kind: str, key: Hashable, load: Callable[[], Any]) -> Any:
+        """
+        Returns the cached entry, loading it on a miss
+
+        :param kind: The kind of entry
+        :param key: The key of the entry within its kind
+        :param load: Loads the entry.  Only one caller loads a missing key at a time
+
+        :return: The entry
+        """
+
+        entry_key = (kind, key)
+        with self._lock:
+            found, value = self._lookup(entry_key)
+            if found:
+                self.hits += 1
+                return value
+
+            self.misses += 1
+            pending = self._loads.get(entry_key)
+            loader = pending is None
+            if loader:
+                pending = self._loads[entry_key] = _Load()
+            else:
+                self.coalesced += 1
+
+        if not loader:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+
+            return pending.value
+
+        try:
+            pending.value = load()
+        except BaseException as e:
+            pending.error = e
+            raise
+        else:
+            with self._lock:
+                # Don't store what was loaded if the key was invalidated while loading
+                if self._loads.get(entry_key) is pending:
+                    self._store(entry_key, pending.value)
+        finally:
+            with self._lock:
+                if self._loads.get(entry_key) is pending:
+                    del self._loads[entry_key]
+            pending.done.set()
+
+        return pending.value
+
+    def invalidate(self, kind: str, key: Hashable = None):
+        """
+        Drops an entry, or every entry of a kind if no key is given
+
+        :param kind: The kind of entry
+        :param key: The key of the entry within its kind
+        """
+
+        with self._lock:
+            if key is not None:
+                self._entries.pop((kind, key), None)
+                self._loads.pop((kind, key), None)
+                return
+
+            for entry_key in [entry_key for entry_key in self._entries if entry_key[0] == kind]:
+                del self._entries[entry_key]
+            for entry_key in [entry_key for entry_key in self._loads if entry_key[0] == kind]:
+                del self._loads[entry_key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._loads.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        :return: The hits, misses, evictions and current size of the cache.  coalesced counts the misses that waited
+                 on another caller's load rather than making a request
+        """
+
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "coalesced": self.coalesced,
+                "size": len(self._entries),
+            }
@@ -1,28 +1,111 @@
-from typing import List, Union
-from .CRM import CRM, HubSpotObject, NOTE
+import copy
+from typing import Any, Callable, Dict, Generator, Iterable, List, Union
+from .CRM import CRM, HubSpotObject, NOTE, SchemaRegistry, _hs_engagement
+from .CRM.AssociationTypes import HUBSPOT_DEFINED_TYPES, association_class
+from .Cache import ObjectCache
 from .Interface import Interface
+from .Metrics import Instrument
+from .Pool import ConnectionPool
+from .RateLimiter import DailyQuota
+from .Retry import RetryPolicy
 from .Files import Files, File
 
 
 class Client:
-    def __init__(self, access_token: str, rate_limit: str = 10):
+    def __init__(self, access_token: str, rate_limit: int = 10, rate_window: float = 1.0, burst: int = None,
+                 retry_policy: RetryPolicy = None, cache: ObjectCache = None, schemas: SchemaRegistry = None,
+                 pool: ConnectionPool = None, instruments: List[Instrument] = None, lanes: Dict[str, float] = None,
+                 daily_limit: int = None, portal: str = None):
         """
         :param access_token: App Access token
+        :param rate_limit: The Number of requests allowed per rate_window
+        :param rate_window: The length of the rate limit window in seconds
+        :param burst: The Number of requests that may be made back to back.  Defaults to rate_limit
+        :param retry_policy: How rate limited (429) and server error (5xx) responses are retried
+        :param cache: Caches get_object and list_pipelines lookups.  Off unless given
+        :param schemas: Holds the property schema of each object type.  Kept between runs in the user's cache
+                        directory, a file per access token, if not given.  Pass SchemaRegistry() to hold them in memory
+                        only
+        :param pool: The HTTP connections to use.  Pass the same ConnectionPool to several Clients to share one pool
+                     between them.  Each Client gets its own pool if not given
+        :param instruments: Receive an event for every call made, e.g. a MetricsAggregator
+        :param lanes: The priority lanes sharing the rate limit and their weights, as {lane: weight}.  Defaults to
+                      interactive 8, default 3 and bulk 1.  See with_priority
+        :param daily_limit: The Number of calls the access token may make per day.  Calls past it raise an Exception
+                            rather than being sent.  Not enforced if not given
+        :param portal: A name for the portal, recorded on every CallEvent
         """
 
         interface = Interface(
             access_token=access_token,
             base_url="https://api.hubspot.com",
-            rate_limit=rate_limit
+            rate_limit=rate_limit,
+            rate_window=rate_window,
+            burst=burst,
+            retry_policy=retry_policy,
+            cache=cache,
+            pool=pool,
+            instruments=instruments,
+            lanes=lanes,
+            quota=DailyQuota(daily_limit) if daily_limit is not None else None,
+            portal=portal
         )
-        self.crm = CRM(interface)
+        self.interface = interface
+        self.crm = CRM(interface, schemas if schemas is not None else SchemaRegistry.for_token(access_token))
         self.files = Files(interface)
 
-    def attach_file_crm(self, files: Union[List[File], File], crm_obj: HubSpotObject, time: int = None):
+    def with_priority(self, priority: str) -> "Client":
+        """
+        Returns a view of this client whose calls wait for the rate limit in the priority lane.  The view shares the
+        connections, rate limit, cache, schemas and association labels of this client.
+
+            web = client.with_priority("interactive")
+            nightly = client.with_priority("bulk")
+
+        :param priority: The lane, e.g. interactive, default or bulk
+
+        :return: a Client
+        """
+
+        view = copy.copy(self)
+        view.interface = self.interface.view(priority)
+        view.crm = self.crm.view(view.interface)
+        view.files = Files(view.interface)
+
+        return view
+
+    @property
+    def queues(self):
+        """ {lane: {"weight", "depth", "served", "wait"}} for each priority lane.  See Scheduler.stats """
+
+        return self.interface.scheduler.stats()
+
+    def map(self, operation: Union[str, Callable], arguments: Iterable[Any], max_workers: int = 8,
+            ordered: bool = True, return_exceptions: bool = False) -> Generator[Any, None, None]:
+        """
+        Runs many operations at once on a pool of threads, all sharing this client's connection and rate limit.
+
+        :param operation: The name of a CRM method such as get_object, the name of a HubSpot Object method such as
+                          update_hs, archive or associate, or any callable
+        :param arguments: The arguments for each operation.  A tuple is unpacked into positional arguments
+        :param max_workers: The Number of operations to run at once
+        :param ordered: Yield results in the order of the arguments.  Otherwise (index, result) is yielded as each
+                        operation finishes
+        :param return_exceptions: Yield the exception raised by an operation in place of its result
+
+        :return: a Generator of results
+
+        See CRM.parallel for more
+        """
+
+        return self.crm.parallel(operation, arguments, max_workers, ordered, return_exceptions)
+
+    def attach_file_crm(self, files: Union[List[File], File], crm_obj: Union[List[HubSpotObject], HubSpotObject],
+                        time: int = None):
         """ Associates the file with the CRM Object.  Note, this is not for engagements
 
         :param files: the File to associate with the CRM Object
-        :param crm_obj: The CRM object to associate the file with
+        :param crm_obj: The CRM object, or list of CRM objects, to associate the file with
         :param time: The time for the note to be attached to the object
 
         :return: the Note which facilitated the association
@@ -37,6 +120,13 @@ class Client:
         else:
             raise Exception("files must be a File or list of Files")
 
+        # Checked before the note is created, so a bad target doesn't leave a note behind
+        for target in crm_obj if isinstance(crm_obj, list) else [crm_obj]:
+            if getattr(target, "hs_id", None) is None:
+                raise Exception(f"{target!r} is not an object in HubSpot")
+            if (_hs_engagement, association_class(target)) not in HUBSPOT_DEFINED_TYPES:
+                raise Exception(f"Notes can not be associated with {type(target).__name__}")
+
         params = {
             "hs_attachment_ids": attachment_ids
         }
@@ -45,4 +135,11 @@ class Client:
 
         note = self.crm.new_object(NOTE, **params)
 
-        note.associate(crm_obj)
+        if isinstance(crm_obj, list):
+            result = self.crm.batch_create_association([(note, obj) for obj in crm_obj])
+            if result.errors:
+                raise Exception(" | ".join(str(error) for error in result.errors))
+        else:
+            note.associate(crm_obj)
+
+        return note
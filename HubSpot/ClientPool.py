@@ -0,0 +1,145 @@
+from typing import Any, Callable, Dict, Generator, Iterable, List, Tuple
+
+from .Cache import ObjectCache
+from .Client import Client
+from .CRM import SchemaRegistry
+from .Metrics import Instrument
+from .Parallel import parallel_map
+from .Pool import ConnectionPool
+from .Retry import RetryPolicy
+
+
+class ClientPool:
+    """
+    Clients for many portals sharing one set of connections.
+
+    Each portal keeps the rate limit, daily quota and priority lanes of its own access token, so work fanned out across
+    portals runs at the sum of their limits without going over any one of them.
+
+        with ClientPool(instruments=[metrics]) as clients:
+            clients.add("emea", emea_token, rate_limit=100, rate_window=10, daily_limit=250000)
+            clients.add("apac", apac_token, rate_limit=190, rate_window=10, daily_limit=500000)
+
+            for portal, deals in clients.map(lambda client: list(client.crm.list_objects(DEAL, limit=100))):
+                ...
+    """
+
+    def __init__(self, pool: ConnectionPool = None, pool_maxsize: int = 32, instruments: List[Instrument] = None,
+                 lanes: Dict[str, float] = None, retry_policy: RetryPolicy = None):
+        """
+        :param pool: The connections to share.  One holding pool_maxsize connections is made if not given
+        :param pool_maxsize: The Number of connections to keep open to HubSpot, across every portal.  Set it to at
+                             least the Number of threads calling HubSpot at once
+        :param instruments: Receive an event for every call to every portal.  CallEvent.portal names the portal
+        :param lanes: The priority lanes of each portal and their weights, as for Client
+        :param retry_policy: How every portal retries rate limited and server error responses
+        """
+
+        self.pool = pool if pool is not None else ConnectionPool(pool_maxsize=pool_maxsize)
+        self.instruments = list(instruments or [])
+        self.lanes = lanes
+        self.retry_policy = retry_policy
+        self._clients: Dict[str, Client] = dict()
+
+    def add(self, portal: str, access_token: str, rate_limit: int = 10, rate_window: float = 1.0, burst: int = None,
+            daily_limit: int = None, cache: ObjectCache = None, schemas: SchemaRegistry = None) -> Client:
+        """
+        Adds a portal to the pool
+
+        :param portal: The name to look the portal's client up by
+        :param access_token: The portal's App Access token
+        :param rate_limit: The Number of requests the token is allowed per rate_window
+        :param rate_window: The length of the rate limit window in seconds
+        :param burst: The Number of requests that may be made back to back.  Defaults to rate_limit
+        :param daily_limit: The Number of calls the token may make per day.  Not enforced if not given
+        :param cache: Caches the portal's get_object and list_pipelines lookups.  Off unless given
+        :param schemas: Holds the portal's property schemas.  Portals have their own custom properties, so don't share
+                        one registry between portals
+
+        :return: the portal's Client
+        """
+
+        if portal in self._clients:
+            raise Exception(f"The portal {portal!r} is already in the pool")
+
+        client = Client(access_token, rate_limit, rate_window, burst, self.retry_policy, cache, schemas, self.pool,
+                        self.instruments, self.lanes, daily_limit, portal)
+        self._clients[portal] = client
+
+        return client
+
+    def remove(self, portal: str):
+        """ Takes a portal out of the pool.  The shared connections stay open """
+
+        self._clients.pop(portal)
+
+    def __getitem__(self, portal: str) -> Client:
+        try:
+            return self._clients[portal]
+        except KeyError:
+            raise Exception(f"The portal {portal!r} is not in the pool") from None
+
+    def __contains__(self, portal: str) -> bool:
+        return portal in self._clients
+
+    def __iter__(self):
+        return iter(self._clients)
+
+    def __len__(self):
+        return len(self._clients)
+
+    def map(self, operation: Callable[[Client], Any], portals: Iterable[str] = None, max_workers: int = None,
+            return_exceptions: bool = False) -> Generator[Tuple[str, Any], None, None]:
+        """
+        Runs an operation against many portals at once, one thread per portal.  Each portal's calls are held to its
+        own rate limit, so together they run at the sum of the limits.
+
+        :param operation: Called with each portal's Client
+        :param portals: The portals to run the operation against.  Defaults to every portal
+        :param max_workers: The Number of portals to run at once.  Defaults to all of them
+        :param return_exceptions: Yield the exception raised for a portal in place of its result
+
+        :return: a Generator of (portal, result), in the order of the portals
+        """
+
+        portals = list(portals if portals is not None else self._clients)
+
+        def run(portal: str) -> Tuple[str, Any]:
+            try:
+                return portal, operation(self[portal])
+            except Exception as e:
+                if return_exceptions:
+                    return portal, e
+                raise
+
+        return parallel_map(run, portals, max_workers or max(len(portals), 1))
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """
+        :return: {portal: {"remaining", "daily_remaining", "queues"}}, where remaining is what HubSpot last reported
+                 as left in the current interval, daily_remaining what is left today and queues the state of each
+                 priority lane
+        """
+
+        status = dict()
+        for portal, client in self._clients.items():
+            interface = client.interface
+            daily_remaining = interface.rate_limit_status.daily_remaining
+            if interface.quota is not None:
+                daily_remaining = interface.quota.remaining
+
+            status[portal] = {"remaining": interface.remaining, "daily_remaining": daily_remaining,
+                              "queues": interface.scheduler.stats()}
+
+        return status
+
+    def close(self):
+        """ Closes the shared connections """
+
+        self.pool.close()
+
+    def __enter__(self) -> "ClientPool":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -1,9 +1,11 @@
 import base64
 from pathlib import Path
 import json
-from typing import BinaryIO, Union
+from typing import BinaryIO, Callable, Union
 
+from ..Pool import TRANSFER_TIMEOUT
 from .File import File
+from .Multipart import MultipartStream
 
 
 class FileFactory:
@@ -49,9 +51,11 @@ class FileFactory:
 
     def upload_file(self, file: Union[BinaryIO, Path], access: str, folder: Union[int, str],
                     file_name: str = None, charset_hunch: str = None,  ttl: str = None,
-                    overwrite: bool = None, dedup_strat: str = None, dedup_scope: str = None) -> File:
+                    overwrite: bool = None, dedup_strat: str = None, dedup_scope: str = None,
+                    progress: Callable[[int, Union[int, None]], None] = None) -> File:
         """
-        Uploads a file to HubSpot and returns a File Object representing the uploaded file
+        Uploads a file to HubSpot and returns a File Object representing the uploaded file.  The file is streamed
+        from disk as it is sent rather than read into memory.
 
         :param file: The Binary of the file to be uploaded or a pathlib.Path object representing the file
         :param access: Set the Access privs. Must be one of: PRIVATE, PUBLIC_INDEXABLE, PUBLIC_NOT_INDEXABLE
@@ -62,24 +66,31 @@ class FileFactory:
         :param overwrite: determines if the file will be over written
         :param dedup_strat: what happens if a duplicate is found.  Must be one of ENTIRE_PORTAL, EXACT_FOLDER, NONE
         :param dedup_scope: the scope of looking for duplicates. Must be one of REJECT, RETURN_EXISTING
+        :param progress: Called with (bytes sent, total bytes) as the upload goes.  Total is None if unknown
 
         :return: a File Object representing the uploaded file
         """
 
-        files = {
-            "file": file.read_bytes() if isinstance(file, Path) else file,
-            "fileName": file_name if file_name else file.name,
-            "options": self._validate_options(access, ttl, overwrite, dedup_strat, dedup_scope)
-        }
+        file_name = file_name if file_name else Path(getattr(file, "name", "file")).name
+        fields = [
+            ("fileName", file_name),
+            ("options", self._validate_options(access, ttl, overwrite, dedup_strat, dedup_scope))
+        ]
 
         if isinstance(folder, int):
-            files.update({"folderId": folder})
+            fields.append(("folderId", folder))
         elif isinstance(folder, str):
-            files.update({"folderPath": folder})
+            fields.append(("folderPath", folder))
 
         if charset_hunch:
-            files.update({"charsetHunch": charset_hunch})
+            fields.append(("charsetHunch", charset_hunch))
 
-        response = self.interface.call(self.base_url, method="POST", files=files)
+        body = MultipartStream(fields, "file", file, file_name, progress)
+        headers = {"Content-Type": body.content_type}
 
-        return File(self.interface, response.json())
+        try:
+            return self.interface.call_then(self.base_url, lambda response: File(self.interface, response.json()),
+                                            method="POST", data=body, headers=headers,
+                                            timeout=TRANSFER_TIMEOUT)
+        finally:
+            body.close()
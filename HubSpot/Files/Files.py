@@ -1,18 +1,23 @@
 from pathlib import Path
-from typing import BinaryIO, Union
+from threading import Lock
+from typing import BinaryIO, Callable, Iterable, List, Union
 
 from .FileFactory import FileFactory
 from .File import File
+from .UploadIndex import UploadIndex
+from ..Parallel import parallel_map
 
 
 class Files:
     def __init__(self, interface):
+        self.interface = interface
         self.file_factory = FileFactory(interface)
 
     # HubSpot Files
     def upload(self, file: Union[BinaryIO, Path], access: str, folder: Union[str, int],
                     file_name: str = None, charset_hunch: str = None,  ttl: str = None,
-                    overwrite: bool = None, dedup_strat: str = None, dedup_scope: str = None) -> File:
+                    overwrite: bool = None, dedup_strat: str = None, dedup_scope: str = None,
+                    progress: Callable[[int, Union[int, None]], None] = None) -> File:
         """
         Uploads a file to HubSpot and returns a File Object representing the uploaded file
 
@@ -25,9 +30,63 @@ class Files:
         :param overwrite: determines if the file will be over written
         :param dedup_strat: what happens if a duplicate is found.  Must be one of ENTIRE_PORTAL, EXACT_FOLDER, NONE
         :param dedup_scope: the scope of looking for duplicates. Must be one of REJECT, RETURN_EXISTING
+        :param progress: Called with (bytes sent, total bytes) as the upload goes.  Total is None if unknown
 
         :return: a File Object representing the uploaded file
         """
 
         return self.file_factory.upload_file(file, access, folder, file_name, charset_hunch,
-                                             ttl, overwrite, dedup_strat, dedup_scope)
+                                             ttl, overwrite, dedup_strat, dedup_scope, progress)
+
+    def upload_many(self, paths: Iterable[Path], access: str, folder: Union[str, int], max_workers: int = 4,
+                    index: Union[UploadIndex, str, Path] = None, return_exceptions: bool = False,
+                    **kwargs) -> List[File]:
+        """
+        Uploads many files to HubSpot at once and returns File Objects representing them, in the order given
+
+        :param paths: pathlib.Path objects representing the files
+        :param access: Set the Access privs. Must be one of: PRIVATE, PUBLIC_INDEXABLE, PUBLIC_NOT_INDEXABLE
+        :param folder: The folder to upload the files to.  May be the path or folder id
+        :param max_workers: The Number of files to upload at once
+        :param index: An UploadIndex, or the path of one, recording what has been uploaded.  Files whose content is
+                      already in the index for this folder are not sent again
+        :param return_exceptions: Return the exception for a file that failed in place of its File, rather than
+                                  raising it
+        :param kwargs: Anything else upload takes, applied to every file
+
+        :return: a list of File Objects representing the uploaded files
+        """
+
+        # An index opened here from a path is closed once the uploads finish
+        owned = index is not None and not isinstance(index, UploadIndex)
+        if owned:
+            index = UploadIndex(index)
+
+        locks = dict()
+        locks_lock = Lock()
+
+        def upload(path: Path) -> File:
+            path = Path(path)
+            if index is None:
+                return self.upload(path, access, folder, **kwargs)
+
+            content_hash = index.hash_file(path)
+            with locks_lock:
+                lock = locks.setdefault(content_hash, Lock())
+
+            # Identical files in the same call wait for the first one rather than being uploaded side by side
+            with lock:
+                known = index.get(content_hash, folder)
+                if known is not None:
+                    return File(self.interface, known)
+
+                file = self.upload(path, access, folder, **kwargs)
+                index.put(content_hash, folder, {"id": file.hs_id, **file._data})
+
+            return file
+
+        try:
+            return list(parallel_map(upload, paths, max_workers, return_exceptions=return_exceptions))
+        finally:
+            if owned:
+                index.close()
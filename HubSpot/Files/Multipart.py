@@ -0,0 +1,167 @@
+import io
+import mimetypes
+import os
+from pathlib import Path
+from typing import BinaryIO, Callable, List, Tuple, Union
+from urllib.parse import quote
+from uuid import uuid4
+
+
+class MultipartStream:
+    """
+    A multipart/form-data body that is read from disk as it is sent, rather than built in memory.
+
+    Only one chunk of a file is held at a time, so memory stays flat however large the file is.  The length is worked
+    out up front where the file size can be found, so the request is sent with a Content-Length; otherwise requests
+    falls back to a chunked upload.  The stream can be rewound with seek(0) to retry the upload as long as the file
+    can be.
+    """
+
+    def __init__(self, fields: List[Tuple[str, Union[str, int]]], file_field: str, file: Union[BinaryIO, Path],
+                 file_name: str, progress: Callable[[int, Union[int, None]], None] = None):
+        """
+        :param fields: (name, value) of each form field sent before the file
+        :param file_field: The name of the form field holding the file
+        :param file: The file to send, or a pathlib.Path to open
+        :param file_name: The name of the file
+        :param progress: Called with (bytes sent, total bytes) as the body is read.  Total is None if unknown
+        """
+
+        self.boundary = uuid4().hex
+        self.progress = progress
+        self._path = file if isinstance(file, Path) else None
+        self._file = None if self._path is not None else file
+        self._start = self._file.tell() if self._file is not None and self._seekable(self._file) else 0
+
+        content_type = mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+        head = b"".join(
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{self._quote(name)}"\r\n\r\n'
+            f'{value}\r\n'.encode() for name, value in fields
+        )
+        head += (f'--{self.boundary}\r\nContent-Disposition: form-data; name="{self._quote(file_field)}"; '
+                 f'{self._file_name(file_name)}\r\nContent-Type: {content_type}\r\n\r\n').encode()
+        tail = f"\r\n--{self.boundary}--\r\n".encode()
+
+        self._segments = [head, None, tail]
+        file_size = self._file_size()
+        self.len = len(head) + file_size + len(tail) if file_size is not None else None
+        self.sent = 0
+        self._segment = 0
+        self._offset = 0
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    @staticmethod
+    def _quote(value: str) -> str:
+        # Quotes and line breaks would end the header early, so they are percent encoded as browsers do
+        return str(value).replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
+
+    @classmethod
+    def _file_name(cls, file_name: str) -> str:
+        if file_name.isascii():
+            return f'filename="{cls._quote(file_name)}"'
+
+        # Names outside ASCII are also given in RFC 5987 form, with an ASCII fallback for servers that don't read it
+        fallback = cls._quote(file_name.encode("ascii", "replace").decode())
+        return f'filename="{fallback}"; filename*=UTF-8\'\'{quote(file_name, safe="")}'
+
+    @staticmethod
+    def _seekable(file) -> bool:
+        try:
+            return file.seekable()
+        except (AttributeError, ValueError, io.UnsupportedOperation):
+            return False
+
+    def _file_size(self) -> Union[int, None]:
+        if self._path is not None:
+            return self._path.stat().st_size
+
+        try:
+            return os.fstat(self._file.fileno()).st_size - self._start
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            pass
+
+        if self._seekable(self._file):
+            end = self._file.seek(0, io.SEEK_END)
+            self._file.seek(self._start)
+            return end - self._start
+
+        return None
+
+    def _open(self) -> BinaryIO:
+        if self._file is None:
+            self._file = self._path.open("rb")
+
+        return self._file
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = 1 << 16
+
+        chunk = b""
+        while len(chunk) < size and self._segment < len(self._segments):
+            segment = self._segments[self._segment]
+            if segment is None:
+                data = self._open().read(size - len(chunk))
+                if not data:
+                    self._segment += 1
+                    continue
+            else:
+                data = segment[self._offset:self._offset + size - len(chunk)]
+                self._offset += len(data)
+                if self._offset >= len(segment):
+                    self._segment += 1
+                    self._offset = 0
+
+            chunk += data
+
+        if chunk and self._segment >= len(self._segments) and self._path is not None:
+            self.close()
+
+        self.sent += len(chunk)
+        if self.progress is not None and chunk:
+            self.progress(self.sent, self.len)
+
+        return chunk
+
+    def __iter__(self):
+        while True:
+            chunk = self.read()
+            if not chunk:
+                return
+
+            yield chunk
+
+    def seekable(self) -> bool:
+        return self._path is not None or self._seekable(self._file)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        """ Only rewinding to the start is supported, so a failed upload can be sent again """
+
+        if offset != 0 or whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("MultipartStream can only be rewound to the start")
+
+        if self._file is not None and self._path is None:
+            if not self._seekable(self._file):
+                raise io.UnsupportedOperation("The file being uploaded can not be rewound")
+            self._file.seek(self._start)
+        elif self._file is not None:
+            self._file.seek(0)
+
+        self.sent = 0
+        self._segment = 0
+        self._offset = 0
+
+        return 0
+
+    def tell(self) -> int:
+        return self.sent
+
+    def close(self):
+        """ Closes the file if it was opened from a path """
+
+        if self._path is not None and self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,110 @@
+import hashlib
+import json
+from pathlib import Path
+import sqlite3
+from threading import Lock
+from time import time
+from typing import BinaryIO, Dict, Union
+
+
+class UploadIndex:
+    """
+    A local record of the files already uploaded to HubSpot, keyed on the hash of their content and the folder they
+    were uploaded to.  Kept in sqlite, so it lasts between runs when given a path.
+
+    The index only knows what was uploaded through it.  If a file is deleted in HubSpot, remove it here as well.
+    """
+
+    def __init__(self, path: Union[str, Path] = ":memory:"):
+        """
+        :param path: The sqlite database to keep the index in.  Kept in memory if not given
+        """
+
+        self.path = str(path)
+        self._lock = Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS uploads ("
+                "content_hash TEXT NOT NULL, "
+                "folder TEXT NOT NULL, "
+                "file_id TEXT NOT NULL, "
+                "data TEXT NOT NULL, "
+                "uploaded REAL NOT NULL, "
+                "PRIMARY KEY (content_hash, folder))"
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM uploads").fetchone()[0]
+
+    @staticmethod
+    def hash_file(file: Union[BinaryIO, Path], chunk_size: int = 1 << 20) -> str:
+        """
+        Hashes the content of a file, reading it a chunk at a time.  A file-like object is put back where it started
+
+        :param file: The file or pathlib.Path to hash
+        :param chunk_size: The Number of bytes to read at a time
+
+        :return: the sha256 hex digest of the content
+        """
+
+        digest = hashlib.sha256()
+        if isinstance(file, Path):
+            with file.open("rb") as opened:
+                for chunk in iter(lambda: opened.read(chunk_size), b""):
+                    digest.update(chunk)
+            return digest.hexdigest()
+
+        start = file.tell()
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+        file.seek(start)
+
+        return digest.hexdigest()
+
+    def get(self, content_hash: str, folder: Union[int, str]) -> Union[Dict, None]:
+        """
+        :param content_hash: The hash of the file content
+        :param folder: The folder path or id the file was uploaded to
+
+        :return: The HubSpot response for the earlier upload, or None if this content hasn't been uploaded there
+        """
+
+        with self._lock:
+            row = self._connection.execute("SELECT data FROM uploads WHERE content_hash = ? AND folder = ?",
+                                           (content_hash, str(folder))).fetchone()
+
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, content_hash: str, folder: Union[int, str], data: Dict):
+        """
+        Records an upload
+
+        :param content_hash: The hash of the file content
+        :param folder: The folder path or id the file was uploaded to
+        :param data: The HubSpot response for the upload
+        """
+
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO uploads VALUES (?, ?, ?, ?, ?)",
+                                     (content_hash, str(folder), str(data["id"]), json.dumps(data), time()))
+
+    def remove(self, content_hash: str, folder: Union[int, str] = None):
+        """
+        Forgets an upload, in one folder or in every folder
+
+        :param content_hash: The hash of the file content
+        :param folder: The folder path or id the file was uploaded to
+        """
+
+        with self._lock, self._connection:
+            if folder is None:
+                self._connection.execute("DELETE FROM uploads WHERE content_hash = ?", (content_hash, ))
+            else:
+                self._connection.execute("DELETE FROM uploads WHERE content_hash = ? AND folder = ?",
+                                         (content_hash, str(folder)))
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
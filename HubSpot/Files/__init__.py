@@ -1,3 +1,5 @@
 from .File import File
 from .FileFactory import FileFactory
-from .Files import Files
\ No newline at end of file
+from .Files import Files
+from .Multipart import MultipartStream
+from .UploadIndex import UploadIndex
@@ -1,34 +1,135 @@
+import copy
 import logging
-from requests import Session, Response
-from time import sleep
+from requests import Response
+from time import perf_counter, sleep
+from typing import Any, Callable, Dict, Generator, List, Union
+
+from .Cache import ObjectCache
+from .Metrics import CallEvent, Instrument, body_size, endpoint_template
+from .Pool import ConnectionPool
+from .RateLimiter import DailyQuota, RateLimiter, RateLimitStatus
+from .Retry import RetryPolicy, rewindable
+from .Scheduler import Scheduler, current_priority
 
 
 class Interface:
 
-    def __init__(self, access_token: str, base_url: str, rate_limit=10):
+    def __init__(self, access_token: str, base_url: str, rate_limit=10, rate_window: float = 1.0, burst: int = None,
+                 retry_policy: RetryPolicy = None, cache: ObjectCache = None, pool: ConnectionPool = None,
+                 instruments: List[Instrument] = None, lanes: Dict[str, float] = None, quota: DailyQuota = None,
+                 portal: str = None):
         self.refresh_token = None
         self.auth_header = {"Authorization": f"Bearer {access_token}"}
         self.default_headers = {
             "Content-Type": "Application/JSON",
             **self.auth_header
         }
-        self.session = Session()
-        self.session.headers.update(self.default_headers)
+        # Headers are sent with each request rather than set on the session, so the pool can be shared between
+        # interfaces with different access tokens
+        self.pool = pool if pool is not None else ConnectionPool()
+        self.session = self.pool.session
         self.base_url = base_url
         self.rate_limit = rate_limit
+        self.rate_limiter = RateLimiter(rate_limit, rate_window, burst)
+        self.rate_limit_status = RateLimitStatus()
+        self.scheduler = Scheduler(self.rate_limiter, lanes)
+        self.quota = quota
+        # Names the portal in CallEvents, when calls to several portals are measured together
+        self.portal = portal
+        # The lane of calls that don't name one.  See view
+        self.priority = None
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.cache = cache
+        self.instruments: List[Instrument] = list(instruments or [])
 
-    def call(self, endpoint: str, method: str = "GET", **kwargs) -> Response:
+    @property
+    def remaining(self):
+        """ The Number of requests HubSpot reported as left in the current interval, or None if not yet known """
+
+        return self.rate_limit_status.remaining
+
+    def view(self, priority: str) -> "Interface":
+        """
+        :return: An interface sharing everything with this one, connections and rate limit included, whose calls go
+                 through the priority lane unless they name another
+        """
+
+        self.scheduler.lane(priority)
+        view = copy.copy(self)
+        view.priority = priority
+
+        return view
+
+    def _observe(self, response: Response):
+        if self.rate_limit_status.update(response.headers):
+            self.rate_limiter.observe(self.rate_limit_status)
+            if self.quota is not None:
+                self.quota.observe(self.rate_limit_status)
+
+    def _start(self, endpoint: str, method: str, data: Any) -> CallEvent:
+        event = CallEvent(endpoint_template(endpoint), method, endpoint, portal=self.portal,
+                          request_bytes=body_size(data))
+        for instrument in self.instruments:
+            instrument.request(event)
+
+        return event
+
+    def _finish(self, event: CallEvent, start: float):
+        event.total = perf_counter() - start
+        for instrument in self.instruments:
+            instrument.response(event)
+
+    def _call(self, endpoint: str, method: str, event: CallEvent, priority: str = None, **kwargs) -> Response:
         logging.debug(f"callling ({method}) {endpoint}")
-        sleep(1)
 
         url = f"{self.base_url}{endpoint}"
+        headers = dict(self.default_headers)
         if "files" in kwargs.keys():
-            content_type = self.session.headers = self.auth_header
+            # Drop the JSON content type, so requests can set the multipart boundary
+            headers.update({"Content-Type": None})
+        kwargs["headers"] = {**headers, **kwargs.get("headers", {})}
+        kwargs.setdefault("timeout", self.pool.timeout)
 
-        response = self.session.request(method=method, url=url, **kwargs)
+        # A lane named by the call wins over a priority block, which wins over the lane of a view
+        lane = self.scheduler.lane(priority or current_priority.get() or self.priority).name
+        event.lane = lane
 
-        if "files" in kwargs.keys():
-            self.session.headers.update(self.default_headers)
+        attempt = 0
+        while True:
+            if self.quota is not None:
+                self.quota.take()
+            event.limiter_wait += self.scheduler.acquire(lane)
+
+            sent = perf_counter()
+            response = self.session.request(method=method, url=url, **kwargs)
+            event.latency += perf_counter() - sent
+            event.status = response.status_code
+            event.response_bytes += len(response.content)
+
+            self._observe(response)
+
+            if not self.retry_policy.should_retry(response.status_code, attempt, method, endpoint):
+                break
+
+            if not rewindable(kwargs.get("data")):
+                # The stream was used up by the failed attempt, so the error it got is the one to raise
+                logging.debug(f"({method}) {endpoint} returned {response.status_code}, its body can't be sent again")
+                break
+
+            delay = self.retry_policy.delay(attempt, response.headers)
+            logging.debug(f"({method}) {endpoint} returned {response.status_code}, retrying in {delay:.2f}s")
+            attempt += 1
+            event.retries = attempt
+            if response.status_code == 429:
+                # Every caller sharing the limiter backs off, not just this one
+                self.rate_limiter.pause(delay)
+            else:
+                sleep(delay)
+                event.retry_wait += delay
+
+            if hasattr(kwargs.get("data"), "seek"):
+                # Streamed bodies were used up by the failed attempt
+                kwargs["data"].seek(0)
 
         try:
             response.raise_for_status()
@@ -41,3 +142,56 @@ class Interface:
             raise e
 
         return response
+
+    def _send(self, endpoint: str, method: str, handler: Union[Callable[[Response], Any], None], **kwargs) -> Any:
+        start = perf_counter()
+        event = self._start(endpoint, method, kwargs.get("data"))
+        try:
+            response = self._call(endpoint, method, event, **kwargs)
+
+            return event.handle(response, handler) if handler is not None else response
+        except Exception as e:
+            event.error = type(e).__name__
+            raise
+        finally:
+            self._finish(event, start)
+
+    def call(self, endpoint: str, method: str = "GET", **kwargs) -> Response:
+        """
+        Calls the endpoint.  Pass priority to wait for the rate limiter in a lane other than the interface's, e.g.
+        priority="interactive"
+        """
+
+        return self._send(endpoint, method, None, **kwargs)
+
+    @staticmethod
+    def run(steps: Generator) -> Any:
+        """
+        Runs an operation of several calls written as a generator, which yields each call and is sent its result:
+
+            def steps():
+                response = yield interface.call(endpoint)
+                return response.json()
+
+        On the AsyncInterface each call yielded is awaited instead, so the operation is written once for both
+
+        :return: whatever the generator returns
+        """
+
+        value = None
+        while True:
+            try:
+                value = steps.send(value)
+            except StopIteration as stop:
+                return stop.value
+
+    def call_then(self, endpoint: str, handler: Callable[[Response], Any], method: str = "GET", **kwargs) -> Any:
+        """
+        Calls the endpoint and passes the response to the handler.  Code written against call_then works unchanged
+        on the AsyncInterface, where it returns an awaitable instead.  As with call, priority names the lane to wait
+        for the rate limiter in
+
+        :return: whatever the handler returns
+        """
+
+        return self._send(endpoint, method, handler, **kwargs)
@@ -0,0 +1,294 @@
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass, field
+import logging
+import re
+from threading import Lock
+from time import perf_counter, time
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+_ID = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint_template(endpoint: str) -> str:
+    """
+    :return: The endpoint with the ids taken out, e.g. /crm/v3/objects/deals/{id}, so calls to the same endpoint are
+             counted together
+    """
+
+    return _ID.sub("/{id}", endpoint.split("?", 1)[0])
+
+
+def body_size(body: Any) -> int:
+    if isinstance(body, (str, bytes, bytearray)):
+        return len(body.encode() if isinstance(body, str) else body)
+
+    return getattr(body, "len", None) or 0
+
+
+@dataclass
+class CallEvent:
+    """
+    What happened during one call to HubSpot, retries included.  Times are in seconds.
+
+    latency is the time spent waiting on HubSpot over every attempt, limiter_wait the time held back by the rate
+    limiter and retry_wait the time spent backing off after server errors.  For call_then, handler_time is the time
+    spent in the handler, of which parse_time was spent decoding JSON.  total is the whole call.  lane is the priority
+    lane the call waited for the rate limiter in, and portal the name of the portal called, if it was given one
+    """
+    endpoint: str
+    method: str
+    path: str
+    lane: Union[str, None] = None
+    portal: Union[str, None] = None
+    started: float = field(default_factory=time)
+    status: Union[int, None] = None
+    error: Union[str, None] = None
+    request_bytes: int = 0
+    response_bytes: int = 0
+    retries: int = 0
+    latency: float = 0.0
+    limiter_wait: float = 0.0
+    retry_wait: float = 0.0
+    parse_time: float = 0.0
+    handler_time: float = 0.0
+    total: float = 0.0
+
+    def handle(self, response, handler: Callable[[Any], Any]) -> Any:
+        """ Passes the response to a call_then handler, timing the handler and the JSON decoding it does """
+
+        handling = perf_counter()
+        try:
+            return handler(TimedResponse(response, self))
+        finally:
+            self.handler_time = perf_counter() - handling
+
+
+class TimedResponse:
+    """
+    The response a call_then handler is given.  Its JSON is decoded once, on the first call to json, and the time
+    taken is added to the event's parse_time.  Everything else is read from the response
+    """
+
+    def __init__(self, response, event: CallEvent):
+        self._response = response
+        self._event = event
+        self._json = None
+        self._decoded = False
+
+    def __repr__(self):
+        return repr(self._response)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._response, name)
+
+    def json(self, **kwargs) -> Any:
+        if not self._decoded:
+            start = perf_counter()
+            try:
+                self._json = self._response.json(**kwargs)
+                self._decoded = True
+            finally:
+                self._event.parse_time += perf_counter() - start
+
+        return self._json
+
+
+class Instrument:
+    """
+    Receives an event for every call an Interface makes.  Subclass it and override either hook.
+
+    Hooks run on the thread making the call, so they should be quick and thread safe.
+    """
+
+    def request(self, event: CallEvent):
+        """ Called before the first attempt of a call, with only endpoint, method and request_bytes filled in """
+
+    def response(self, event: CallEvent):
+        """ Called once the call has finished, successfully or not, with every field filled in """
+
+
+# Upper bounds in seconds of the histogram buckets; everything slower lands in the last bucket
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """ Counts observations into fixed buckets, so percentiles can be estimated in constant memory """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.min = min(self.min, value) if self.count else value
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """
+        :param q: The percentile to estimate, between 0 and 100
+
+        :return: The estimate, interpolated within the bucket it falls in
+        """
+
+        if not self.count:
+            return 0.0
+
+        rank = q / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                # Nothing observed lies outside min and max, so the bucket is narrowed to them
+                low = max(self.buckets[index - 1] if index > 0 else 0.0, self.min)
+                high = min(self.buckets[index] if index < len(self.buckets) else self.max, self.max)
+                return low + (high - low) * (rank - seen) / count
+            seen += count
+
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {"count": self.count, "mean": self.mean, "min": self.min, "p50": self.percentile(50),
+                "p90": self.percentile(90), "p99": self.percentile(99), "max": self.max}
+
+
+class EndpointStats:
+    """ Counters and histograms for the calls to one endpoint """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.statuses = Counter()
+        self.latency = Histogram(buckets)
+        self.limiter_wait = Histogram(buckets)
+        self.retry_wait = Histogram(buckets)
+        self.parse_time = Histogram(buckets)
+        self.total = Histogram(buckets)
+
+    def add(self, event: CallEvent):
+        self.calls += 1
+        self.errors += event.error is not None or (event.status or 0) >= 400
+        self.retries += event.retries
+        self.request_bytes += event.request_bytes
+        self.response_bytes += event.response_bytes
+        self.statuses[event.status if event.status is not None else event.error] += 1
+        self.latency.observe(event.latency)
+        self.limiter_wait.observe(event.limiter_wait)
+        self.retry_wait.observe(event.retry_wait)
+        self.parse_time.observe(event.parse_time)
+        self.total.observe(event.total)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "statuses": dict(self.statuses),
+            "latency": self.latency.summary(),
+            "limiter_wait": self.limiter_wait.summary(),
+            "retry_wait": self.retry_wait.summary(),
+            "parse_time": self.parse_time.summary(),
+            "total": self.total.summary(),
+        }
+
+
+class MetricsExporter:
+    """ Sends a snapshot of the metrics somewhere.  Subclass it to feed your monitoring system """
+
+    def export(self, snapshot: Dict[str, Dict[str, Any]]):
+        """
+        :param snapshot: {"METHOD endpoint": summary}, as returned by MetricsAggregator.snapshot
+        """
+
+        raise NotImplementedError
+
+
+class LoggingExporter(MetricsExporter):
+    """ Logs one line per endpoint """
+
+    def __init__(self, logger: logging.Logger = None, level: int = logging.INFO):
+        self.logger = logger if logger is not None else logging.getLogger("HubSpot.metrics")
+        self.level = level
+
+    def export(self, snapshot: Dict[str, Dict[str, Any]]):
+        for key, stats in snapshot.items():
+            self.logger.log(self.level, f"{key} calls={stats['calls']} errors={stats['errors']} "
+                                        f"retries={stats['retries']} "
+                                        f"latency_p50={stats['latency']['p50']:.3f}s "
+                                        f"latency_p99={stats['latency']['p99']:.3f}s "
+                                        f"limiter_wait={stats['limiter_wait']['mean']:.3f}s "
+                                        f"parse={stats['parse_time']['mean']:.4f}s "
+                                        f"bytes_in={stats['response_bytes']}")
+
+
+class MetricsAggregator(Instrument):
+    """
+    Keeps counters and histograms of every call, per method and endpoint, in memory.
+
+        metrics = MetricsAggregator()
+        client = Client(token, instruments=[metrics])
+        ...
+        metrics.snapshot()["GET /crm/v3/objects/deals/{id}"]["latency"]["p99"]
+
+    Latency is the time spent waiting on HubSpot, limiter_wait the time spent held back by the rate limiter,
+    retry_wait the time spent backing off before retries and parse_time the time spent decoding JSON.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, exporters: List[MetricsExporter] = None):
+        """
+        :param buckets: The upper bounds in seconds of the histogram buckets
+        :param exporters: Where export sends snapshots
+        """
+
+        self.buckets = buckets
+        self.exporters = list(exporters or [])
+        self._stats: Dict[str, EndpointStats] = dict()
+        self._lock = Lock()
+
+    def response(self, event: CallEvent):
+        key = f"{event.method.upper()} {event.endpoint}"
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = EndpointStats(self.buckets)
+            stats.add(event)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        :return: {"METHOD endpoint": counters and histogram summaries}
+        """
+
+        with self._lock:
+            return {key: stats.summary() for key, stats in self._stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def export(self, reset: bool = False):
+        """
+        Sends a snapshot to every exporter
+
+        :param reset: Start counting from zero afterwards
+        """
+
+        snapshot = self.snapshot()
+        if reset:
+            self.reset()
+
+        for exporter in self.exporters:
+            exporter.export(snapshot)
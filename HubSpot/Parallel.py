@@ -0,0 +1,228 @@
+import asyncio
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from itertools import islice
+from queue import Full, Queue
+from threading import Event
+from typing import Any, AsyncGenerator, AsyncIterable, Awaitable, Callable, Generator, Iterable, List, Tuple
+
+
+def _arguments(argument: Any) -> Tuple:
+    return argument if isinstance(argument, tuple) else (argument, )
+
+
+def _outcome(future: Future, return_exceptions: bool) -> Any:
+    if return_exceptions and future.exception() is not None:
+        return future.exception()
+
+    return future.result()
+
+
+def parallel_map(func: Callable, arguments: Iterable[Any], max_workers: int = 8, ordered: bool = True,
+                 return_exceptions: bool = False) -> Generator[Any, None, None]:
+    """
+    Calls func once per argument on a pool of threads.
+
+    Only a few calls more than max_workers are queued at a time, so arguments may be a long or endless generator.
+    Each call runs in a copy of the caller's context, so a priority block around the map covers its calls.
+
+    :param func: The function to call
+    :param arguments: The arguments for each call.  A tuple is unpacked into positional arguments
+    :param max_workers: The Number of calls to run at once
+    :param ordered: Yield results in the order of the arguments.  Otherwise (index, result) is yielded as each call
+                    finishes, where index is the position of the argument
+    :param return_exceptions: Yield the exception raised by a call in place of its result, rather than raising it
+
+    :return: a Generator of results
+    """
+
+    arguments = enumerate(arguments)
+    window = max_workers * 2
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        def submit(index_argument):
+            index, argument = index_argument
+            future = executor.submit(copy_context().run, func, *_arguments(argument))
+            future.index = index
+            return future
+
+        if ordered:
+            pending = deque(submit(item) for item in islice(arguments, window))
+            while pending:
+                future = pending.popleft()
+                outcome = _outcome(future, return_exceptions)
+                pending.extend(submit(item) for item in islice(arguments, 1))
+                yield outcome
+            return
+
+        pending = {submit(item) for item in islice(arguments, window)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            pending |= {submit(item) for item in islice(arguments, len(done))}
+            for future in done:
+                yield future.index, _outcome(future, return_exceptions)
+
+
+async def async_parallel_map(func: Callable[..., Awaitable], arguments: Iterable[Any], max_workers: int = 8,
+                             ordered: bool = True, return_exceptions: bool = False) -> AsyncGenerator[Any, None]:
+    """
+    The asyncio counterpart of parallel_map.  Each call runs as a task, at most max_workers at a time; the tasks left
+    running are cancelled if the caller stops early.
+
+    :param func: Returns an awaitable for each argument, e.g. a coroutine function
+    :param arguments: The arguments for each call.  A tuple is unpacked into positional arguments
+    :param max_workers: The Number of calls to run at once
+    :param ordered: Yield results in the order of the arguments.  Otherwise (index, result) is yielded as each call
+                    finishes, where index is the position of the argument
+    :param return_exceptions: Yield the exception raised by a call in place of its result, rather than raising it
+
+    :return: an AsyncGenerator of results
+    """
+
+    arguments = enumerate(arguments)
+    indexes = dict()
+
+    def submit(index_argument):
+        index, argument = index_argument
+        task = asyncio.ensure_future(func(*_arguments(argument)))
+        indexes[task] = index
+        return task
+
+    async def outcome(task):
+        try:
+            return await task
+        except Exception as e:
+            if return_exceptions:
+                return e
+            raise
+
+    pending = deque(submit(item) for item in islice(arguments, max_workers))
+    try:
+        if ordered:
+            while pending:
+                task = pending[0]
+                result = await outcome(task)
+                pending.popleft()
+                pending.extend(submit(item) for item in islice(arguments, 1))
+                yield result
+            return
+
+        while pending:
+            done, waiting = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            pending = deque(waiting)
+            pending.extend(submit(item) for item in islice(arguments, len(done)))
+            for task in done:
+                yield indexes.pop(task), await outcome(task)
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+_DONE = object()
+
+
+def parallel_merge(sources: List[Callable[[], Iterable[Any]]], max_workers: int = 4,
+                   buffer: int = 1000) -> Generator[Any, None, None]:
+    """
+    Drains several iterables on a pool of threads and yields their items as they arrive.
+
+    At most `buffer` items wait to be yielded; the threads wait once the buffer is full.
+
+    :param sources: Functions returning the iterables to drain
+    :param max_workers: The Number of iterables to drain at once
+    :param buffer: The Number of items to hold before the threads wait
+
+    :return: a Generator of the items of every iterable, in no particular order
+    """
+
+    items = Queue(maxsize=buffer)
+    stop = Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return
+            except Full:
+                continue
+
+    def drain(source):
+        items_of = None
+        try:
+            # Checked before each item is pulled, so a merge that was stopped fetches nothing more
+            if stop.is_set():
+                return
+
+            items_of = iter(source())
+            while not stop.is_set():
+                try:
+                    item = next(items_of)
+                except StopIteration:
+                    return
+                put((None, item))
+        except BaseException as e:
+            put((e, None))
+        finally:
+            if hasattr(items_of, "close"):
+                items_of.close()
+            put((_DONE, None))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for source in sources:
+            executor.submit(copy_context().run, drain, source)
+
+        try:
+            remaining = len(sources)
+            while remaining:
+                error, item = items.get()
+                if error is _DONE:
+                    remaining -= 1
+                elif error is not None:
+                    raise error
+                else:
+                    yield item
+        finally:
+            stop.set()
+
+
+async def async_parallel_merge(sources: List[Callable[[], AsyncIterable[Any]]], max_workers: int = 4,
+                               buffer: int = 1000) -> AsyncGenerator[Any, None]:
+    """
+    The asyncio counterpart of parallel_merge.  Each iterable is drained by a task, at most max_workers at a time;
+    the tasks are cancelled if the caller stops early.
+
+    :param sources: Functions returning the async iterables to drain
+    :param max_workers: The Number of iterables to drain at once
+    :param buffer: The Number of items to hold before the tasks wait
+
+    :return: an AsyncGenerator of the items of every iterable, in no particular order
+    """
+
+    items = asyncio.Queue(maxsize=buffer)
+    running = asyncio.Semaphore(max_workers)
+
+    async def drain(source):
+        try:
+            async with running:
+                async for item in source():
+                    await items.put((None, item))
+        except Exception as e:
+            await items.put((e, None))
+        else:
+            await items.put((_DONE, None))
+
+    tasks = [asyncio.ensure_future(drain(source)) for source in sources]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            error, item = await items.get()
+            if error is _DONE:
+                remaining -= 1
+            elif error is not None:
+                raise error
+            else:
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
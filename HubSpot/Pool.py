@@ -0,0 +1,98 @@
+import socket
+from typing import List, Tuple, Union
+
+from requests import Session
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+# Uploads and exports pass this rather than the pool's timeout: HubSpot can take minutes to answer a large upload
+TRANSFER_TIMEOUT = (5, 600)
+
+
+def keepalive_options(idle: int = 60, interval: int = 15, count: int = 4) -> List[Tuple[int, int, int]]:
+    """
+    Socket options that turn on TCP keep-alive, so connections idling in the pool are kept open and dead ones are
+    noticed.  Options the platform doesn't have are left out
+
+    :param idle: Seconds a connection is idle before the first probe
+    :param interval: Seconds between probes
+    :param count: The Number of unanswered probes before the connection is dropped
+
+    :return: The options, on top of urllib3's defaults
+    """
+
+    options = list(HTTPConnection.default_socket_options) + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+
+    # Linux calls the idle time TCP_KEEPIDLE, macOS calls it TCP_KEEPALIVE
+    idle_option = getattr(socket, "TCP_KEEPIDLE", getattr(socket, "TCP_KEEPALIVE", None))
+    if idle_option is not None:
+        options.append((socket.IPPROTO_TCP, idle_option, idle))
+    if hasattr(socket, "TCP_KEEPINTVL"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, interval))
+    if hasattr(socket, "TCP_KEEPCNT"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPCNT, count))
+
+    return options
+
+
+class _SocketOptionsAdapter(HTTPAdapter):
+    def __init__(self, socket_options: List[Tuple[int, int, int]] = None, **kwargs):
+        self.socket_options = socket_options
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.socket_options is not None:
+            kwargs["socket_options"] = self.socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+    def proxy_manager_for(self, *args, **kwargs):
+        if self.socket_options is not None:
+            kwargs["socket_options"] = self.socket_options
+        return super().proxy_manager_for(*args, **kwargs)
+
+
+class ConnectionPool:
+    """
+    The HTTP connections used to reach HubSpot: a requests Session with a tuned pool, timeouts, compression and TCP
+    keep-alive.
+
+    A pool holds no credentials, so one pool can be shared by several Clients, each with their own access token:
+
+        pool = ConnectionPool(pool_maxsize=32)
+        client_a = Client(token_a, pool=pool)
+        client_b = Client(token_b, pool=pool)
+    """
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10, pool_block: bool = False,
+                 timeout: Union[float, Tuple[float, float], None] = (5, 60), compress: bool = True,
+                 keepalive: bool = True, keepalive_idle: int = 60, keepalive_interval: int = 15,
+                 keepalive_count: int = 4):
+        """
+        :param pool_connections: The Number of hosts to keep connections to
+        :param pool_maxsize: The Number of connections kept open to each host.  Set it to at least the Number of
+                             threads calling HubSpot at once, or connections are opened and thrown away
+        :param pool_block: Wait for a free connection rather than opening one beyond pool_maxsize
+        :param timeout: Seconds to wait to connect and for each read, as (connect, read) or one value for both.  None
+                        waits forever.  Calls that stall for a minute are given up on by default.  Uploads and exports
+                        wait for TRANSFER_TIMEOUT instead
+        :param compress: Ask for gzip or deflate compressed responses
+        :param keepalive: Turn on TCP keep-alive for pooled connections
+        :param keepalive_idle: Seconds a connection is idle before the first keep-alive probe
+        :param keepalive_interval: Seconds between keep-alive probes
+        :param keepalive_count: The Number of unanswered probes before the connection is dropped
+        """
+
+        self.timeout = timeout
+        self.session = Session()
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate" if compress else "identity"})
+
+        socket_options = keepalive_options(keepalive_idle, keepalive_interval, keepalive_count) if keepalive else None
+        adapter = _SocketOptionsAdapter(socket_options, pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                        pool_block=pool_block)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def close(self):
+        """ Closes every pooled connection """
+
+        self.session.close()
@@ -0,0 +1,231 @@
+from dataclasses import dataclass
+from datetime import date, datetime, tzinfo
+from threading import Lock
+from time import monotonic, sleep
+from typing import Mapping, Union
+
+
+@dataclass
+class RateLimitStatus:
+    """ The rate limit budget last reported by HubSpot in the X-HubSpot-RateLimit-* response headers """
+    remaining: Union[int, None] = None
+    max: Union[int, None] = None
+    interval: Union[float, None] = None
+    daily: Union[int, None] = None
+    daily_remaining: Union[int, None] = None
+    updated: Union[float, None] = None
+
+    @staticmethod
+    def _header(headers: Mapping[str, str], name: str) -> Union[int, None]:
+        try:
+            return int(headers[f"X-HubSpot-RateLimit-{name}"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def update(self, headers: Mapping[str, str]) -> bool:
+        """
+        Updates the status from the response headers
+
+        :param headers: The response headers
+
+        :return: True if the response carried rate limit headers
+        """
+
+        remaining = self._header(headers, "Remaining")
+        if remaining is None:
+            return False
+
+        interval = self._header(headers, "Interval-Milliseconds")
+
+        self.remaining = remaining
+        self.max = self._header(headers, "Max")
+        self.interval = interval / 1000 if interval is not None else None
+        self.daily = self._header(headers, "Daily")
+        self.daily_remaining = self._header(headers, "Daily-Remaining")
+        self.updated = monotonic()
+
+        return True
+
+
+class RateLimiter:
+    """
+    A thread safe token bucket.
+
+    The bucket holds up to `burst` tokens and refills at `rate_limit` tokens every `window` seconds.  Each request
+    takes a token, and callers only wait once the bucket is empty.  Tokens are reserved up front, so callers that have
+    to wait are served in the order they asked.
+    """
+
+    def __init__(self, rate_limit: Union[int, float] = 10, window: float = 1.0, burst: int = None):
+        """
+        :param rate_limit: The Number of requests allowed per window
+        :param window: The length of the window in seconds
+        :param burst: The Number of requests that may be made back to back.  Defaults to rate_limit
+        """
+
+        if rate_limit <= 0 or window <= 0:
+            raise Exception("rate_limit and window must be greater than 0")
+
+        self.rate_limit = rate_limit
+        self.window = window
+        self.burst = burst if burst is not None else max(int(rate_limit), 1)
+        self._rate = rate_limit / window
+        self._tokens = float(self.burst)
+        self._updated = monotonic()
+        self._lock = Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def reserve(self, tokens: int = 1) -> float:
+        """
+        Takes tokens from the bucket without blocking.
+
+        :param tokens: The Number of tokens to take
+
+        :return: The Number of seconds the caller must wait before using the tokens
+        """
+
+        with self._lock:
+            self._refill(monotonic())
+            self._tokens -= tokens
+
+            if self._tokens >= 0:
+                return 0.0
+
+            return -self._tokens / self._rate
+
+    def try_reserve(self, tokens: int = 1) -> float:
+        """
+        Takes tokens from the bucket only if they are there now.
+
+        :param tokens: The Number of tokens to take
+
+        :return: 0 if the tokens were taken, otherwise the Number of seconds until they will be there
+        """
+
+        with self._lock:
+            self._refill(monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+
+            return (tokens - self._tokens) / self._rate
+
+    def acquire(self, tokens: int = 1) -> float:
+        """
+        Takes tokens from the bucket, blocking until they are available.
+
+        :param tokens: The Number of tokens to take
+
+        :return: The Number of seconds spent waiting
+        """
+
+        delay = self.reserve(tokens)
+        if delay:
+            sleep(delay)
+
+        return delay
+
+    def pause(self, seconds: float):
+        """
+        Empties the bucket so that the next token is handed out no sooner than the given time from now.
+
+        :param seconds: The Number of seconds to pause for
+        """
+
+        with self._lock:
+            self._refill(monotonic())
+            self._tokens = min(self._tokens, -seconds * self._rate)
+
+    def observe(self, status: RateLimitStatus):
+        """
+        Slows the bucket down to match the budget HubSpot reports, so requests ease off before HubSpot starts
+        rejecting them.
+
+        :param status: The budget reported by HubSpot
+        """
+
+        if status.remaining is None:
+            return
+
+        if status.remaining <= 0:
+            if status.max and status.interval:
+                self.pause(status.interval / status.max)
+            return
+
+        with self._lock:
+            self._refill(monotonic())
+            self._tokens = min(self._tokens, status.remaining)
+
+    @property
+    def available(self) -> float:
+        """ The Number of tokens currently in the bucket.  Negative when callers are queued. """
+
+        with self._lock:
+            self._refill(monotonic())
+            return self._tokens
+
+
+class DailyQuota:
+    """
+    Counts the calls made today against a daily limit, and refuses calls once it is used up rather than have HubSpot
+    reject them.  The count is corrected from the daily budget HubSpot reports, so calls made by other processes with
+    the same token are counted too.
+    """
+
+    def __init__(self, limit: int, reserve: int = 0, tz: tzinfo = None):
+        """
+        :param limit: The Number of calls allowed per day
+        :param reserve: The Number of calls to leave unused, e.g. for other integrations sharing the token
+        :param tz: The time zone the day starts in.  HubSpot uses the portal's time zone.  Local time if not given
+        """
+
+        self.limit = limit
+        self.reserve = reserve
+        self.tz = tz
+        self.used = 0
+        self._day = self._today()
+        self._lock = Lock()
+
+    def _today(self) -> date:
+        return datetime.now(self.tz).date()
+
+    def _roll(self):
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self.used = 0
+
+    def take(self):
+        """ Counts a call, raising an Exception if the day's quota is used up """
+
+        with self._lock:
+            self._roll()
+            if self.used >= self.limit - self.reserve:
+                raise Exception(f"The daily quota of {self.limit} calls is used up")
+
+            self.used += 1
+
+    def observe(self, status: RateLimitStatus):
+        """
+        Catches the count up with the daily budget HubSpot reports
+
+        :param status: The budget reported by HubSpot
+        """
+
+        if status.daily is None or status.daily_remaining is None:
+            return
+
+        with self._lock:
+            self._roll()
+            self.used = max(self.used, status.daily - status.daily_remaining)
+
+    @property
+    def remaining(self) -> int:
+        """ The Number of calls left today, after the reserve """
+
+        with self._lock:
+            self._roll()
+            return max(0, self.limit - self.reserve - self.used)
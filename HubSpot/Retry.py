@@ -0,0 +1,128 @@
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import io
+import random
+from typing import Iterable, Mapping, Union
+
+# Methods that change nothing more when sent twice
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "DELETE"))
+
+# POST endpoints that only read, so are as safe to send twice as a GET
+READ_ONLY_POSTS = ("/batch/read", "/search")
+
+
+def rewindable(body) -> bool:
+    """
+    :param body: The body of a request
+
+    :return: True if the body can be sent again.  A stream that can't be rewound was used up by the first attempt
+    """
+
+    if not hasattr(body, "read"):
+        return True
+
+    try:
+        return body.seekable()
+    except (AttributeError, ValueError, io.UnsupportedOperation):
+        return False
+
+
+class RetryPolicy:
+    """
+    Decides when a failed request is retried and how long to wait before trying again.
+
+    Waits use exponential backoff with full jitter.  When HubSpot sends a Retry-After header the wait is never shorter
+    than what it asked for.
+
+    A 429 is always retried, as HubSpot turned the request away before acting on it.  Server errors are only retried
+    for requests that are safe to send twice: a create that timed out on HubSpot's side may still have gone through,
+    so retrying it could make a duplicate.
+    """
+
+    def __init__(self, max_retries: int = 5, backoff: float = 0.5, max_backoff: float = 30.0,
+                 statuses: Iterable[int] = (429, 500, 502, 503, 504)):
+        """
+        :param max_retries: The Number of times a request is retried before giving up
+        :param backoff: The base wait in seconds, doubled for each attempt
+        :param max_backoff: The longest wait in seconds before jitter is applied
+        :param statuses: The HTTP status codes that are retried
+        """
+
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = frozenset(statuses)
+
+    @staticmethod
+    def idempotent(method: str, endpoint: str = "") -> bool:
+        """
+        :param method: The HTTP method of the request
+        :param endpoint: The path of the request
+
+        :return: True if sending the request twice does no more than sending it once
+        """
+
+        method = method.upper()
+        if method in IDEMPOTENT_METHODS:
+            return True
+
+        return method == "POST" and endpoint.split("?")[0].endswith(READ_ONLY_POSTS)
+
+    def should_retry(self, status: int, attempt: int, method: str = "GET", endpoint: str = "") -> bool:
+        """
+        :param status: The HTTP status of the response
+        :param attempt: The Number of retries already made
+        :param method: The HTTP method of the request
+        :param endpoint: The path of the request
+
+        :return: True when the request should be tried again
+        """
+
+        if status not in self.statuses or attempt >= self.max_retries:
+            return False
+
+        return status == 429 or self.idempotent(method, endpoint)
+
+    @staticmethod
+    def retry_after(headers: Mapping[str, str]) -> Union[float, None]:
+        """
+        Reads the Retry-After header, which may be given in seconds or as an HTTP date
+
+        :param headers: The response headers
+
+        :return: The Number of seconds to wait, or None if the header is missing or unreadable
+        """
+
+        value = headers.get("Retry-After")
+        if value is None:
+            return None
+
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+    def delay(self, attempt: int, headers: Mapping[str, str] = None) -> float:
+        """
+        :param attempt: The Number of retries already made
+        :param headers: The headers of the failed response
+
+        :return: The Number of seconds to wait before the next attempt
+        """
+
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        retry_after = self.retry_after(headers or {})
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        return delay
@@ -0,0 +1,153 @@
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Condition
+from time import monotonic
+from typing import Any, Dict, Union
+
+from .Metrics import Histogram
+from .RateLimiter import RateLimiter
+
+# Lanes and their weights.  While every lane has requests waiting, interactive gets 8 of every 12 requests, default 3
+# and bulk 1; a lane with nothing waiting leaves its share to the others
+DEFAULT_LANES = {"interactive": 8, "default": 3, "bulk": 1}
+
+current_priority: ContextVar[Union[str, None]] = ContextVar("current_priority", default=None)
+
+
+@contextmanager
+def priority(lane: str):
+    """
+    Sends the calls made inside the block through a lane, unless a call names its own
+
+        with priority("interactive"):
+            client.crm.get_object(DEAL, deal_id)
+    """
+
+    token = current_priority.set(lane)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+class Lane:
+    """ The requests waiting for the rate limiter at one priority """
+
+    def __init__(self, name: str, weight: float):
+        self.name = name
+        self.weight = weight
+        self.waiting = deque()
+        self.position = 0.0
+        self.served = 0
+        self.wait = Histogram()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"weight": self.weight, "depth": len(self.waiting), "served": self.served, "wait": self.wait.summary()}
+
+
+class Scheduler:
+    """
+    Hands out the rate limiter's tokens across priority lanes.
+
+    Requests only queue once the limiter runs dry.  Then each lane is served in proportion to its weight (stride
+    scheduling), so interactive calls get through promptly while bulk jobs use whatever is left over, and no lane with
+    a weight is starved.  Within a lane requests are served in the order they arrived.
+    """
+
+    def __init__(self, rate_limiter: RateLimiter, lanes: Dict[str, float] = None, default: str = "default"):
+        """
+        :param rate_limiter: The limiter whose tokens are shared out
+        :param lanes: {lane: weight}.  Defaults to DEFAULT_LANES
+        :param default: The lane of calls that don't name one
+        """
+
+        lanes = dict(lanes if lanes is not None else DEFAULT_LANES)
+        if default not in lanes:
+            raise Exception(f"The default lane {default!r} is not one of the lanes {list(lanes)}")
+        if any(weight <= 0 for weight in lanes.values()):
+            raise Exception("Lane weights must be greater than 0")
+
+        self.rate_limiter = rate_limiter
+        self.default = default
+        self.lanes = {name: Lane(name, weight) for name, weight in lanes.items()}
+        self._position = 0.0
+        self._condition = Condition()
+
+    def lane(self, name: Union[str, None] = None) -> Lane:
+        """
+        :return: The lane called name, or the lane picked by the priority context or the default lane if None
+        """
+
+        name = name if name is not None else current_priority.get() or self.default
+        lane = self.lanes.get(name)
+        if lane is None:
+            raise Exception(f"Unknown priority {name!r}.  Must be one of {list(self.lanes)}")
+
+        return lane
+
+    def _next(self) -> Union[Lane, None]:
+        waiting = [lane for lane in self.lanes.values() if lane.waiting]
+        if not waiting:
+            return None
+
+        return min(waiting, key=lambda lane: lane.position)
+
+    def acquire(self, lane: Union[str, None] = None, tokens: int = 1) -> float:
+        """
+        Takes tokens from the rate limiter, waiting in the lane's queue if it has run dry
+
+        :param lane: The lane to wait in.  See lane
+        :param tokens: The Number of tokens to take
+
+        :return: The Number of seconds spent waiting
+        """
+
+        lane = self.lane(lane)
+        start = monotonic()
+
+        with self._condition:
+            if self._next() is None and not self.rate_limiter.try_reserve(tokens):
+                self._served(lane, 0.0)
+                return 0.0
+
+            if not lane.waiting:
+                # A lane that was idle starts level with the others rather than spending credit it built up
+                lane.position = max(lane.position, self._position)
+
+            ticket = object()
+            lane.waiting.append(ticket)
+            # A newcomer may now be first in line
+            self._condition.notify_all()
+
+            while True:
+                if self._next() is lane and lane.waiting[0] is ticket:
+                    delay = self.rate_limiter.try_reserve(tokens)
+                    if not delay:
+                        break
+                    self._condition.wait(delay)
+                else:
+                    self._condition.wait()
+
+            lane.waiting.popleft()
+            self._position = lane.position
+            lane.position += tokens / lane.weight
+            waited = monotonic() - start
+            self._served(lane, waited)
+            self._condition.notify_all()
+
+        return waited
+
+    @staticmethod
+    def _served(lane: Lane, waited: float):
+        lane.served += 1
+        lane.wait.observe(waited)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        :return: {lane: {"weight", "depth", "served", "wait"}}, where depth is the Number of requests waiting now and
+                 wait summarises the seconds requests have waited
+        """
+
+        with self._condition:
+            return {name: lane.stats() for name, lane in self.lanes.items()}
@@ -1 +1,6 @@
+from .AsyncClient import AsyncClient
 from .Client import Client
+from .Pool import ConnectionPool
+from .Metrics import CallEvent, Instrument, LoggingExporter, MetricsAggregator, MetricsExporter
+from .Scheduler import Scheduler, priority
+from .ClientPool import ClientPool
@@ -0,0 +1,96 @@
+"""
+Compares the memory and construction time of HubSpot Objects against compact HubSpotRecords.
+
+Each kind is built in its own process, so the peak RSS of one doesn't hide the other.
+
+    python benchmarks/records.py --objects 200000 --properties 20
+"""
+
+import argparse
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+from itertools import islice
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+def results(count: int, properties: int):
+    for index in range(count):
+        yield {
+            "id": str(index + 1),
+            "archived": False,
+            "properties": {f"property_{number}": f"value {index} {number}" for number in range(properties)},
+        }
+
+
+def rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1 << 20 if sys.platform == "darwin" else 1 << 10
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def build(kind: str, count: int, properties: int, page_size: int = 100) -> dict:
+    from HubSpot.CRM import DEAL, record_class
+
+    if kind == "objects":
+        make = lambda result: DEAL(None, None, result)
+    else:
+        make = record_class(DEAL, None, None)
+
+    gc.collect()
+    before = rss_mb()
+
+    # Results arrive a page at a time and only the built objects are kept, as when paging through a listing
+    built = []
+    elapsed = 0.0
+    data = results(count, properties)
+    while True:
+        page = list(islice(data, page_size))
+        if not page:
+            break
+
+        start = perf_counter()
+        built.extend(make(result) for result in page)
+        elapsed += perf_counter() - start
+
+    gc.collect()
+    after = rss_mb()
+
+    return {
+        "kind": kind,
+        "objects": len(built),
+        "seconds": round(elapsed, 3),
+        "per_second": round(len(built) / elapsed),
+        "peak_rss_mb": round(after, 1),
+        "rss_growth_mb": round(after - before, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objects", type=int, default=200000)
+    parser.add_argument("--properties", type=int, default=20)
+    parser.add_argument("--kind", choices=("objects", "records"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.kind is not None:
+        print(json.dumps(build(args.kind, args.objects, args.properties)))
+        return
+
+    print(f"{args.objects} objects with {args.properties} properties each")
+    print(f"{'kind':<10}{'seconds':>10}{'per second':>14}{'peak RSS MB':>14}{'RSS growth MB':>16}")
+    for kind in ("objects", "records"):
+        output = subprocess.run([sys.executable, __file__, "--kind", kind, "--objects", str(args.objects),
+                                 "--properties", str(args.properties)], check=True, capture_output=True, text=True)
+        row = json.loads(output.stdout)
+        print(f"{row['kind']:<10}{row['seconds']:>10}{row['per_second']:>14}{row['peak_rss_mb']:>14}"
+              f"{row['rss_growth_mb']:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Times the client against the local HubSpot simulator, so changes can be measured without a live portal.
+
+For each portal size a simulator is started, and each operation is run in its own process so its peak RSS is its own.
+Throughput, latency percentiles and peak memory are printed and saved as JSON; pass an earlier results file to
+--compare to see what changed.
+
+    python benchmarks/run.py --sizes 1000 100000 1000000 --latency 0.01
+    python benchmarks/run.py --sizes 100000 --ops list_objects search --compare benchmarks/results/baseline.json
+"""
+
+import argparse
+from datetime import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from threading import Lock
+from time import perf_counter
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+OPERATIONS = ("list_objects", "search", "new_object", "associate", "list_pipelines", "upload")
+
+
+def rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1 << 20 if sys.platform == "darwin" else 1 << 10
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def run(operation: str, url: str, records: int, calls: int, rate_limit: int, file_kb: int) -> dict:
+    """ Runs one operation against the simulator at url and measures it """
+
+    from HubSpot import Client, Instrument
+    from HubSpot.CRM import COMPANY, DEAL
+
+    class Recorder(Instrument):
+        def __init__(self):
+            self.totals = []
+            self.retries = 0
+            self.lock = Lock()
+
+        def response(self, event):
+            with self.lock:
+                self.totals.append(event.total)
+                self.retries += event.retries
+
+    recorder = Recorder()
+    client = Client("benchmark", rate_limit=rate_limit, instruments=[recorder])
+    client.interface.base_url = url
+    properties = ["dealname", "amount", "dealstage", "closedate"]
+    filters = {"filterGroups": [{"filters": [{"propertyName": "amount", "operator": "GTE", "value": "5000"}]}],
+               "properties": properties, "limit": 100}
+
+    # Setup is done before the clock starts and its calls aren't counted
+    if operation == "search":
+        # The simulator works out the matches on the first search, which would otherwise be timed as the client's
+        next(iter(client.crm.search(DEAL, filters)))
+    if operation == "associate":
+        deals = list(client.crm.batch_get(DEAL, range(1, calls + 1)))
+        companies = list(client.crm.batch_get(COMPANY, range(1, calls + 1)))
+    if operation == "upload":
+        upload = Path(tempfile.mkdtemp()) / "benchmark.bin"
+        upload.write_bytes(os.urandom(file_kb * 1024))
+    recorder.totals.clear()
+
+    start = perf_counter()
+    if operation == "list_objects":
+        units = sum(1 for _ in client.crm.list_objects(DEAL, limit=100, properties=properties))
+    elif operation == "search":
+        units = sum(1 for _ in client.crm.search(DEAL, filters))
+    elif operation == "new_object":
+        for index in range(calls):
+            client.crm.new_object(DEAL, dealname=f"Benchmark {index}", amount="100")
+        units = calls
+    elif operation == "associate":
+        for deal, company in zip(deals, companies):
+            deal.associate(company)
+        units = len(deals)
+    elif operation == "list_pipelines":
+        units = sum(len(list(client.crm.list_pipelines(DEAL))) for _ in range(calls))
+    else:
+        for _ in range(calls):
+            client.files.upload(upload, "PRIVATE", "/benchmarks")
+        units = calls
+    elapsed = perf_counter() - start
+
+    return {
+        "operation": operation,
+        "records": records,
+        "units": units,
+        "calls": len(recorder.totals),
+        "retries": recorder.retries,
+        "seconds": round(elapsed, 3),
+        "units_per_second": round(units / elapsed, 1) if elapsed else 0.0,
+        "calls_per_second": round(len(recorder.totals) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(recorder.totals, 50) * 1000, 2),
+        "p99_ms": round(percentile(recorder.totals, 99) * 1000, 2),
+        "peak_rss_mb": round(rss_mb(), 1),
+    }
+
+
+def start_simulator(records: int, args) -> subprocess.Popen:
+    command = [sys.executable, os.path.join(HERE, "simulator.py"), "--records", str(records),
+               "--latency", str(args.latency), "--jitter", str(args.jitter),
+               "--throttle-rate", str(args.throttle_rate), "--error-rate", str(args.error_rate), "--seed", "0"]
+    if args.rate_limit is not None:
+        command += ["--rate-limit", str(args.rate_limit), "--rate-window", str(args.rate_window)]
+
+    return subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(rows: list, baseline_path: str):
+    with open(baseline_path) as baseline_file:
+        baseline = {(row["records"], row["operation"]): row for row in json.load(baseline_file)["results"]}
+
+    print(f"\nCompared with {baseline_path}")
+    print(f"{'records':>9} {'operation':<16}{'throughput':>12}{'p50':>10}{'p99':>10}{'peak RSS':>10}")
+    for row in rows:
+        before = baseline.get((row["records"], row["operation"]))
+        if before is None:
+            continue
+
+        def change(key):
+            return f"{(row[key] - before[key]) / before[key] * 100:+.1f}%" if before[key] else "n/a"
+
+        print(f"{row['records']:>9} {row['operation']:<16}{change('units_per_second'):>12}{change('p50_ms'):>10}"
+              f"{change('p99_ms'):>10}{change('peak_rss_mb'):>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000],
+                        help="The Number of records of each type in the simulated portal")
+    parser.add_argument("--ops", nargs="+", choices=OPERATIONS, default=list(OPERATIONS))
+    parser.add_argument("--calls", type=int, default=200,
+                        help="The Number of calls made by the operations that don't page through records")
+    parser.add_argument("--client-rate-limit", type=int, default=1000, help="Requests per second the client allows")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the simulator adds to each response")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=None, help="Requests per window before the simulator 429s")
+    parser.add_argument("--rate-window", type=float, default=10.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="The share of requests answered with a 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="The share of requests answered with a 502")
+    parser.add_argument("--file-kb", type=int, default=256, help="The size of each uploaded file")
+    parser.add_argument("--output", help="Where to save the results.  Defaults to benchmarks/results/<time>.json")
+    parser.add_argument("--compare", help="A results file to compare against")
+    parser.add_argument("--operation", choices=OPERATIONS, help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.operation is not None:
+        print(json.dumps(run(args.operation, args.url, args.sizes[0], args.calls, args.client_rate_limit,
+                             args.file_kb)))
+        return
+
+    rows = []
+    print(f"{'records':>9} {'operation':<16}{'units/s':>12}{'calls/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+          f"{'retries':>9}{'peak RSS MB':>13}")
+    for records in args.sizes:
+        simulator = start_simulator(records, args)
+        try:
+            url = simulator.stdout.readline().strip()
+            for operation in args.ops:
+                output = subprocess.run([sys.executable, __file__, "--operation", operation, "--url", url,
+                                         "--sizes", str(records), "--calls", str(args.calls),
+                                         "--client-rate-limit", str(args.client_rate_limit),
+                                         "--file-kb", str(args.file_kb)],
+                                        check=True, capture_output=True, text=True)
+                row = json.loads(output.stdout.strip().splitlines()[-1])
+                rows.append(row)
+                print(f"{records:>9} {operation:<16}{row['units_per_second']:>12}{row['calls_per_second']:>10}"
+                      f"{row['p50_ms']:>10}{row['p99_ms']:>10}{row['retries']:>9}{row['peak_rss_mb']:>13}")
+        finally:
+            simulator.terminate()
+            simulator.wait()
+
+    output_path = Path(args.output or os.path.join(HERE, "results", f"{datetime.now():%Y%m%d-%H%M%S}.json"))
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    settings = {key: value for key, value in vars(args).items() if key not in ("operation", "url", "output",
+                                                                                "compare")}
+    with open(output_path, "w") as output_file:
+        json.dump({"commit": git_commit(), "python": platform.python_version(), "platform": platform.platform(),
+                   "time": datetime.now().isoformat(timespec="seconds"), "settings": settings, "results": rows},
+                  output_file, indent=2)
+    print(f"\nSaved to {output_path}")
+
+    if args.compare:
+        compare(rows, args.compare)
+
+
+if __name__ == "__main__":
+    main()
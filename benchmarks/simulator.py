@@ -0,0 +1,762 @@
+"""
+A local stand in for the HubSpot API, for benchmarking without a live portal.
+
+It serves the CRM v3 object, search, batch and pipeline endpoints, the v4 association endpoints, property definitions
+and file uploads.  Objects are made up on demand from their id, so a portal of a million records costs no memory until
+records are changed.  Latency, rate limits and injected 429 and 5xx responses can be configured.
+
+    python benchmarks/simulator.py --records 100000 --latency 0.05 --rate-limit 100
+
+prints the url it is listening on and serves until interrupted.  HubSpotSimulator can also be started from Python.
+"""
+
+import argparse
+from collections import Counter, deque
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import re
+from threading import Lock, Thread
+from time import monotonic, sleep
+from typing import Dict, Iterable, List, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+
+SEARCH_LIMIT = 10000
+# The Number of associations of one object returned per page of a batch read
+ASSOCIATION_PAGE = 500
+STAGES = ["appointmentscheduled", "qualifiedtobuy", "closedwon", "closedlost"]
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+PROPERTIES = [
+    {"name": "hs_object_id", "type": "number"},
+    {"name": "createdate", "type": "datetime"},
+    {"name": "hs_lastmodifieddate", "type": "datetime"},
+    {"name": "lastmodifieddate", "type": "datetime"},
+    {"name": "name", "type": "string"},
+    {"name": "dealname", "type": "string"},
+    {"name": "email", "type": "string"},
+    {"name": "amount", "type": "number"},
+    {"name": "closedate", "type": "datetime"},
+    {"name": "dealstage", "type": "enumeration", "options": [{"value": stage} for stage in STAGES]},
+    {"name": "hs_timestamp", "type": "datetime"},
+    {"name": "hs_note_body", "type": "string"},
+    {"name": "hs_pipeline_stage", "type": "enumeration", "options": [{"value": "1"}, {"value": "2"}]},
+]
+
+OPERATORS = {
+    "EQ": lambda value, target: value == target,
+    "NEQ": lambda value, target: value != target,
+    "LT": lambda value, target: value is not None and _number(value) < _number(target),
+    "LTE": lambda value, target: value is not None and _number(value) <= _number(target),
+    "GT": lambda value, target: value is not None and _number(value) > _number(target),
+    "GTE": lambda value, target: value is not None and _number(value) >= _number(target),
+}
+
+
+# Properties HubSpot stores lower cased, so they are looked up without regard to case
+CASE_INSENSITIVE = frozenset(("email", ))
+
+
+def _stored(properties: Dict) -> Dict[str, str]:
+    return {key: str(value).lower() if key in CASE_INSENSITIVE else str(value) for key, value in properties.items()}
+
+
+def _number(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() * 1000
+
+
+def _iso(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}Z"
+
+
+def make_properties(object_type: str, hs_id: int) -> Dict[str, str]:
+    """ The properties of a record that hasn't been changed, worked out from its id """
+
+    created = _iso(EPOCH + timedelta(seconds=hs_id))
+    return {
+        "hs_object_id": str(hs_id),
+        "createdate": created,
+        "hs_lastmodifieddate": created,
+        "lastmodifieddate": created,
+        "name": f"{object_type} {hs_id}",
+        "dealname": f"{object_type} {hs_id}",
+        "email": f"user{hs_id}@example.com",
+        "amount": str(hs_id % 1000 * 10),
+        "closedate": created,
+        "dealstage": STAGES[hs_id % len(STAGES)],
+    }
+
+
+class Portal:
+    """
+    The data behind the simulator: `records` made up objects of each type, plus whatever has been created, changed,
+    archived or associated since
+    """
+
+    def __init__(self, records: int):
+        self.records = records
+        self.lock = Lock()
+        self.next_id: Dict[str, int] = dict()
+        self.changed: Dict[Tuple[str, int], Dict[str, str]] = dict()
+        self.archived = set()
+        self.associations: Dict[Tuple[str, int, str], Dict[int, List[Dict]]] = dict()
+        self.files = 0
+        self._searches: Dict[str, List[int]] = dict()
+        self._indexes: Dict[Tuple[str, str], Dict[str, int]] = dict()
+
+    def last_id(self, object_type: str) -> int:
+        return self.next_id.get(object_type, self.records + 1) - 1
+
+    def exists(self, object_type: str, hs_id: int) -> bool:
+        return 0 < hs_id <= self.last_id(object_type) and (object_type, hs_id) not in self.archived
+
+    def properties(self, object_type: str, hs_id: int) -> Dict[str, str]:
+        changed = self.changed.get((object_type, hs_id))
+        if changed is not None:
+            return changed
+
+        return make_properties(object_type, hs_id)
+
+    def record(self, object_type: str, hs_id: int, names: Union[List[str], None] = None) -> Dict:
+        properties = self.properties(object_type, hs_id)
+        if names is not None:
+            properties = {name: properties.get(name) for name in names}
+
+        created = properties.get("createdate") or _iso(EPOCH)
+        return {"id": str(hs_id), "properties": properties, "createdAt": created, "updatedAt": created,
+                "archived": False}
+
+    def _written(self):
+        self._searches.clear()
+        self._indexes.clear()
+
+    def create(self, object_type: str, properties: Dict[str, str]) -> int:
+        with self.lock:
+            hs_id = self.last_id(object_type) + 1
+            self.next_id[object_type] = hs_id + 1
+            now = _iso(datetime.now(timezone.utc))
+            self.changed[(object_type, hs_id)] = {"hs_object_id": str(hs_id), "createdate": now,
+                                                  "hs_lastmodifieddate": now, "lastmodifieddate": now,
+                                                  **_stored(properties)}
+            self._written()
+
+        return hs_id
+
+    def update(self, object_type: str, hs_id: int, properties: Dict[str, str]):
+        with self.lock:
+            now = _iso(datetime.now(timezone.utc))
+            self.changed[(object_type, hs_id)] = {**self.properties(object_type, hs_id),
+                                                  **_stored(properties),
+                                                  "hs_lastmodifieddate": now, "lastmodifieddate": now}
+            self._written()
+
+    def archive(self, object_type: str, hs_id: int):
+        with self.lock:
+            self.archived.add((object_type, hs_id))
+            self._written()
+
+    def ids(self, object_type: str, after: int = 0) -> Iterable[int]:
+        for hs_id in range(after + 1, self.last_id(object_type) + 1):
+            if (object_type, hs_id) not in self.archived:
+                yield hs_id
+
+    def find(self, object_type: str, name: str, value: str) -> Union[int, None]:
+        """ Looks an object up by a unique property, indexing the property on first use """
+
+        if name in ("hs_object_id", "id"):
+            return int(value) if value.isdigit() and self.exists(object_type, int(value)) else None
+
+        if name in CASE_INSENSITIVE:
+            value = value.lower()
+
+        with self.lock:
+            index = self._indexes.get((object_type, name))
+            if index is None:
+                index = self._indexes[(object_type, name)] = {
+                    self.properties(object_type, hs_id).get(name): hs_id for hs_id in self.ids(object_type)
+                }
+
+        return index.get(value)
+
+    def search(self, object_type: str, body: Dict) -> List[int]:
+        """ The ids matching a search, worked out once per distinct search until something changes """
+
+        key = json.dumps([object_type, body.get("filterGroups"), body.get("sorts"), body.get("query")],
+                         sort_keys=True)
+        with self.lock:
+            matches = self._searches.get(key)
+        if matches is not None:
+            return matches
+
+        groups = [group.get("filters", []) for group in body.get("filterGroups") or []]
+        query = (body.get("query") or "").lower()
+
+        def match(properties: Dict[str, str]) -> bool:
+            if query and not any(query in str(value).lower() for value in properties.values()):
+                return False
+            if not groups:
+                return True
+
+            return any(all(self._filter(properties, hs_filter) for hs_filter in group) for group in groups)
+
+        matches = [hs_id for hs_id in self.ids(object_type) if match(self.properties(object_type, hs_id))]
+        for sort in reversed(body.get("sorts") or []):
+            name = sort["propertyName"] if isinstance(sort, dict) else sort
+            descending = isinstance(sort, dict) and sort.get("direction") == "DESCENDING"
+            matches.sort(key=lambda hs_id: _number(self.properties(object_type, hs_id).get(name) or "0"),
+                         reverse=descending)
+
+        with self.lock:
+            self._searches[key] = matches
+
+        return matches
+
+    @staticmethod
+    def _filter(properties: Dict[str, str], hs_filter: Dict) -> bool:
+        value = properties.get(hs_filter["propertyName"])
+        operator = hs_filter["operator"]
+        if operator == "HAS_PROPERTY":
+            return value not in (None, "")
+        if operator == "NOT_HAS_PROPERTY":
+            return value in (None, "")
+        if operator == "IN":
+            return value in hs_filter["values"]
+        if operator == "NOT_IN":
+            return value not in hs_filter["values"]
+        if operator == "BETWEEN":
+            return value is not None and _number(hs_filter["value"]) <= _number(value) <= \
+                _number(hs_filter["highValue"])
+        if operator == "CONTAINS_TOKEN":
+            return value is not None and hs_filter["value"].strip("*").lower() in value.lower()
+        if operator == "NOT_CONTAINS_TOKEN":
+            return value is None or hs_filter["value"].strip("*").lower() not in value.lower()
+
+        return OPERATORS[operator](value, hs_filter.get("value"))
+
+    def associate(self, from_type: str, from_id: int, to_type: str, to_id: int, types: List[Dict]):
+        with self.lock:
+            self.associations.setdefault((from_type, from_id, to_type), dict())[to_id] = types
+            reverse = [{**association_type, "associationTypeId": association_type.get("associationTypeId")}
+                       for association_type in types]
+            self.associations.setdefault((to_type, to_id, from_type), dict())[from_id] = reverse
+
+    def dissociate(self, from_type: str, from_id: int, to_type: str, to_id: int):
+        with self.lock:
+            self.associations.get((from_type, from_id, to_type), {}).pop(to_id, None)
+            self.associations.get((to_type, to_id, from_type), {}).pop(from_id, None)
+
+    def associated(self, from_type: str, from_id: int, to_type: str) -> Dict[int, List[Dict]]:
+        return dict(self.associations.get((from_type, from_id, to_type), {}))
+
+
+class _Error(Exception):
+    def __init__(self, status: int, message: str, category: str = "VALIDATION_ERROR"):
+        super().__init__(message)
+        self.status = status
+        self.category = category
+
+
+class _Body(bytearray):
+    """ A request body, and its full size when only the start of it was kept """
+
+    size = 0
+
+    def take(self, stream, size: int, keep: int = None):
+        self.size += size
+        while size:
+            chunk = stream.read(min(size, 1 << 16))
+            if not chunk:
+                return
+            size -= len(chunk)
+            if keep is None or len(self) < keep:
+                self.extend(chunk)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, which Nagle's algorithm would hold back for a delayed ACK
+    disable_nagle_algorithm = True
+    simulator: "HubSpotSimulator" = None
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self, keep: int = None) -> bytes:
+        # Only the first keep bytes are held, so uploads of any size can be taken without filling memory
+        body = _Body()
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                size = int(self.rfile.readline().strip() or b"0", 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return body
+                body.take(self.rfile, size, keep)
+                self.rfile.readline()
+
+        body.take(self.rfile, int(self.headers.get("Content-Length") or 0), keep)
+        return body
+
+    def _send(self, status: int, payload=None, headers: Dict[str, str] = None):
+        content = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if content:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _handle(self, method: str):
+        simulator = self.simulator
+        url = urlparse(self.path)
+        raw = self._body(1 << 16 if url.path in simulator.streamed else None)
+        query = parse_qs(url.query)
+
+        status, headers = simulator.admit(method, url.path, self.headers.get("Authorization"))
+        if status is not None:
+            message = "You have reached your secondly limit." if status == 429 else "Internal error"
+            self._send(status, {"status": "error", "message": message,
+                                "category": "RATE_LIMITS" if status == 429 else "INTERNAL_ERROR"}, headers)
+            return
+
+        try:
+            for pattern, route_method, route in simulator.routes:
+                found = pattern.fullmatch(url.path)
+                if found and route_method == method:
+                    status, payload = route(found, query, raw)
+                    self._send(status, payload, headers)
+                    return
+
+            raise _Error(404, f"No route for {method} {url.path}", "OBJECT_NOT_FOUND")
+        except _Error as e:
+            self._send(e.status, {"status": "error", "message": str(e), "category": e.category}, headers)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+class HubSpotSimulator:
+    """
+    Serves a simulated HubSpot portal over HTTP on a background thread.
+
+        with HubSpotSimulator(records=100000, latency=0.02) as simulator:
+            client = Client("token")
+            client.interface.base_url = simulator.url
+    """
+
+    def __init__(self, records: int = 1000, latency: float = 0.0, jitter: float = 0.0, rate_limit: int = None,
+                 rate_window: float = 10.0, daily_limit: int = 1000000, throttle_rate: float = 0.0,
+                 error_rate: float = 0.0, host: str = "127.0.0.1", port: int = 0, seed: int = None):
+        """
+        :param records: The Number of objects of each type the portal starts with
+        :param latency: Seconds added to every response
+        :param jitter: Up to this many more seconds added at random
+        :param rate_limit: The Number of requests allowed per rate_window before 429s.  Unlimited if not given
+        :param rate_window: The length of the rate limit window in seconds
+        :param daily_limit: The daily limit reported in the rate limit headers.  Each access token has its own
+        :param throttle_rate: The share of requests answered with a 429 regardless of the rate limit
+        :param error_rate: The share of requests answered with a 502
+        :param host: The address to listen on
+        :param port: The port to listen on.  A free port is picked if 0
+        :param seed: Seeds the random jitter and injected errors, for repeatable runs
+        """
+
+        self.portal = Portal(records)
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.daily_limit = daily_limit
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.requests = 0
+        # Requests made with each Authorization header, counted against the daily limit
+        self.daily = Counter()
+        self.throttled = 0
+        # (method, path) of every request, in the order they arrived
+        self.calls: List[Tuple[str, str]] = []
+        self._scripted = deque()
+        self._random = random.Random(seed)
+        self._window_start = monotonic()
+        self._window_count = 0
+        self._lock = Lock()
+        self.routes = self._routes()
+        # Paths whose bodies are counted but not kept past the first 64KB
+        self.streamed = {"/files/v3/files"}
+
+        handler = type("Handler", (_Handler, ), {"simulator": self})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "HubSpotSimulator":
+        self._thread = Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "HubSpotSimulator":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def script(self, status: int, headers: Dict[str, str] = None, count: int = 1):
+        """
+        Answers the next count requests with an error status, whatever they ask for
+
+        :param status: The status to answer with, e.g. 429 or 503
+        :param headers: Headers sent with the error on top of the rate limit headers, e.g. {"Retry-After": "0"}.  A
+                        header given here replaces the simulator's own
+        :param count: The Number of requests to answer this way
+        """
+
+        with self._lock:
+            self._scripted.extend([(status, dict(headers or {}))] * count)
+
+    def admit(self, method: str = None, path: str = None,
+              token: str = None) -> Tuple[Union[int, None], Dict[str, str]]:
+        """
+        Counts a request against the rate limit and waits out the latency
+
+        :return: (error status or None, rate limit headers)
+        """
+
+        with self._lock:
+            self.requests += 1
+            self.daily[token] += 1
+            self.calls.append((method, path))
+            now = monotonic()
+            if now - self._window_start >= self.rate_window:
+                self._window_start, self._window_count = now, 0
+            self._window_count += 1
+
+            limit = self.rate_limit if self.rate_limit is not None else 1000000
+            headers = {
+                "X-HubSpot-RateLimit-Max": str(limit),
+                "X-HubSpot-RateLimit-Remaining": str(max(0, limit - self._window_count)),
+                "X-HubSpot-RateLimit-Interval-Milliseconds": str(int(self.rate_window * 1000)),
+                "X-HubSpot-RateLimit-Daily": str(self.daily_limit),
+                "X-HubSpot-RateLimit-Daily-Remaining": str(max(0, self.daily_limit - self.daily[token])),
+            }
+
+            status = None
+            if self._scripted:
+                status, scripted = self._scripted.popleft()
+                headers.update(scripted)
+            elif self.rate_limit is not None and self._window_count > self.rate_limit:
+                status = 429
+                headers.update({"Retry-After": str(max(1, round(self.rate_window - (now - self._window_start))))})
+            elif self._random.random() < self.throttle_rate:
+                status = 429
+            elif self._random.random() < self.error_rate:
+                status = 502
+
+            if status == 429:
+                self.throttled += 1
+
+            delay = self.latency + (self._random.random() * self.jitter if self.jitter else 0)
+
+        if delay:
+            sleep(delay)
+
+        return status, headers
+
+    def _routes(self):
+        object_type = r"(?P<object_type>[a-z_0-9-]+)"
+        to_type = r"(?P<to_type>[a-z_0-9-]+)"
+        # Engagements are served on v4, as this library calls them
+        version = r"v[34]"
+        routes = [
+            (rf"/crm/{version}/objects/{object_type}", "GET", self._list),
+            (rf"/crm/{version}/objects/{object_type}", "POST", self._create),
+            (rf"/crm/{version}/objects/{object_type}/search", "POST", self._search),
+            (rf"/crm/{version}/objects/{object_type}/batch/(?P<action>create|read|update|archive)", "POST",
+             self._batch),
+            (rf"/crm/{version}/objects/{object_type}/(?P<hs_id>\d+)", "GET", self._get),
+            (rf"/crm/{version}/objects/{object_type}/(?P<hs_id>\d+)", "PATCH", self._update),
+            (rf"/crm/{version}/objects/{object_type}/(?P<hs_id>\d+)", "PUT", self._update),
+            (rf"/crm/{version}/objects/{object_type}/(?P<hs_id>\d+)", "DELETE", self._archive),
+            (rf"/crm/v4/objects/{object_type}/(?P<hs_id>\d+)/associations/{to_type}/(?P<to_id>\d+)", "PUT",
+             self._associate),
+            (rf"/crm/v4/objects/{object_type}/(?P<hs_id>\d+)/associations/{to_type}/(?P<to_id>\d+)", "DELETE",
+             self._dissociate),
+            (rf"/crm/v4/associations/{object_type}/{to_type}/batch/(?P<action>create|archive|read)", "POST",
+             self._batch_associations),
+            (rf"/crm/v4/associations/{object_type}/{to_type}/labels", "GET", self._labels),
+            (rf"/crm/v3/pipelines/{object_type}", "GET", self._pipelines),
+            (rf"/crm/v3/properties/{object_type}", "GET", self._properties),
+            (r"/files/v3/files", "POST", self._upload),
+        ]
+
+        return [(re.compile(pattern), method, route) for pattern, method, route in routes]
+
+    # Objects
+    @staticmethod
+    def _names(query: Dict) -> Union[List[str], None]:
+        if "properties" not in query:
+            return None
+
+        return [name for value in query["properties"] for name in value.split(",") if name]
+
+    def _get(self, found, query, raw):
+        object_type, hs_id = found["object_type"], int(found["hs_id"])
+        if not self.portal.exists(object_type, hs_id):
+            raise _Error(404, f"{object_type} {hs_id} not found", "OBJECT_NOT_FOUND")
+
+        return 200, self.portal.record(object_type, hs_id, self._names(query))
+
+    def _list(self, found, query, raw):
+        object_type = found["object_type"]
+        limit = min(int(query.get("limit", ["10"])[0]), 100)
+        after = int(query.get("after", ["0"])[0])
+        names = self._names(query)
+
+        results = []
+        last = after
+        for hs_id in self.portal.ids(object_type, after):
+            if len(results) == limit:
+                break
+            results.append(self.portal.record(object_type, hs_id, names))
+            last = hs_id
+
+        response = {"results": results}
+        if results and last < self.portal.last_id(object_type):
+            response.update({"paging": {"next": {"after": str(last)}}})
+
+        return 200, response
+
+    def _create(self, found, query, raw):
+        object_type = found["object_type"]
+        hs_id = self.portal.create(object_type, json.loads(raw).get("properties", {}))
+
+        return 201, self.portal.record(object_type, hs_id)
+
+    def _update(self, found, query, raw):
+        object_type, hs_id = found["object_type"], int(found["hs_id"])
+        if not self.portal.exists(object_type, hs_id):
+            raise _Error(404, f"{object_type} {hs_id} not found", "OBJECT_NOT_FOUND")
+
+        self.portal.update(object_type, hs_id, json.loads(raw).get("properties", {}))
+
+        return 200, self.portal.record(object_type, hs_id)
+
+    def _archive(self, found, query, raw):
+        self.portal.archive(found["object_type"], int(found["hs_id"]))
+
+        return 204, None
+
+    def _search(self, found, query, raw):
+        object_type = found["object_type"]
+        body = json.loads(raw)
+        after = int(body.get("after") or 0)
+        if after >= SEARCH_LIMIT:
+            raise _Error(400, f"Paging past {SEARCH_LIMIT} results is not supported")
+
+        limit = min(int(body.get("limit", 10)), 100)
+        matches = self.portal.search(object_type, body)
+        names = body.get("properties") or None
+        response = {
+            "total": len(matches),
+            "results": [self.portal.record(object_type, hs_id, names) for hs_id in matches[after:after + limit]],
+        }
+        if after + limit < len(matches):
+            response.update({"paging": {"next": {"after": str(after + limit)}}})
+
+        return 200, response
+
+    def _batch(self, found, query, raw):
+        object_type, action = found["object_type"], found["action"]
+        body = json.loads(raw)
+        inputs = body.get("inputs", [])
+        if len(inputs) > 100:
+            raise _Error(400, "Batch calls take at most 100 inputs")
+
+        results, errors = [], []
+        for item in inputs:
+            if action == "create":
+                hs_id = self.portal.create(object_type, item.get("properties", {}))
+                result = self.portal.record(object_type, hs_id)
+                if "objectWriteTraceId" in item:
+                    result.update({"objectWriteTraceId": item["objectWriteTraceId"]})
+                results.append(result)
+                continue
+
+            if action == "read" and body.get("idProperty"):
+                hs_id = self.portal.find(object_type, body["idProperty"], str(item["id"]))
+            else:
+                hs_id = int(item["id"]) if str(item["id"]).isdigit() else None
+
+            if hs_id is None or not self.portal.exists(object_type, hs_id):
+                errors.append({"status": "error", "category": "OBJECT_NOT_FOUND",
+                               "message": f"Could not find {object_type} {item['id']}",
+                               "context": {"ids": [str(item["id"])]}})
+            elif action == "read":
+                names = body.get("properties") or None
+                if names and body.get("idProperty") and body["idProperty"] not in names:
+                    names = names + [body["idProperty"]]
+                results.append(self.portal.record(object_type, hs_id, names))
+            elif action == "update":
+                self.portal.update(object_type, hs_id, item.get("properties", {}))
+                results.append(self.portal.record(object_type, hs_id))
+            else:
+                self.portal.archive(object_type, hs_id)
+
+        if action == "archive":
+            return 204, None
+
+        response = {"status": "COMPLETE", "results": results}
+        if errors:
+            response.update({"errors": errors, "numErrors": len(errors)})
+
+        return 207 if errors else (201 if action == "create" else 200), response
+
+    # Associations
+    def _associate(self, found, query, raw):
+        from_type, to_type = found["object_type"], found["to_type"]
+        from_id, to_id = int(found["hs_id"]), int(found["to_id"])
+        types = json.loads(raw or b"[]")
+        self.portal.associate(from_type, from_id, to_type, to_id, types)
+
+        return 200, {"fromObjectTypeId": from_type, "fromObjectId": from_id, "toObjectTypeId": to_type,
+                     "toObjectId": to_id, "labels": []}
+
+    def _dissociate(self, found, query, raw):
+        self.portal.dissociate(found["object_type"], int(found["hs_id"]), found["to_type"], int(found["to_id"]))
+
+        return 204, None
+
+    def _batch_associations(self, found, query, raw):
+        from_type, to_type, action = found["object_type"], found["to_type"], found["action"]
+        inputs = json.loads(raw).get("inputs", [])
+        if len(inputs) > (1000 if action == "read" else 100):
+            raise _Error(400, "Too many inputs")
+
+        if action == "read":
+            return 200, self._read_associations(from_type, to_type, inputs)
+
+        results = []
+        for item in inputs:
+            from_id = int(item["from"]["id"])
+            if action == "create":
+                to_id = int(item["to"]["id"])
+                self.portal.associate(from_type, from_id, to_type, to_id, item.get("types", []))
+                results.append({"fromObjectTypeId": from_type, "fromObjectId": from_id,
+                                "toObjectTypeId": to_type, "toObjectId": to_id, "labels": []})
+            else:
+                for to in item["to"]:
+                    self.portal.dissociate(from_type, from_id, to_type, int(to["id"]))
+
+        if action == "archive":
+            return 204, None
+
+        return 201 if action == "create" else 200, {"status": "COMPLETE", "results": results}
+
+    def _read_associations(self, from_type: str, to_type: str, inputs: List[Dict]) -> Dict:
+        results, errors = [], []
+        for item in inputs:
+            from_id = int(item["id"])
+            associated = list(self.portal.associated(from_type, from_id, to_type).items())
+            if not associated:
+                errors.append({"status": "error", "category": "OBJECT_NOT_FOUND",
+                               "message": f"No {to_type} are associated with {from_type} {from_id}",
+                               "context": {"fromObjectId": [str(from_id)]}})
+                continue
+
+            after = int(item.get("after") or 0)
+            page = associated[after:after + ASSOCIATION_PAGE]
+            result = {"from": {"id": str(from_id)},
+                      "to": [{"toObjectId": to_id, "associationTypes": types} for to_id, types in page]}
+            if after + ASSOCIATION_PAGE < len(associated):
+                result.update({"paging": {"next": {"after": str(after + ASSOCIATION_PAGE)}}})
+            results.append(result)
+
+        response = {"status": "COMPLETE", "results": results}
+        if errors:
+            response.update({"errors": errors, "numErrors": len(errors)})
+
+        return response
+
+    def _labels(self, found, query, raw):
+        return 200, {"results": [
+            {"category": "HUBSPOT_DEFINED", "typeId": 1, "label": None},
+            {"category": "USER_DEFINED", "typeId": 100, "label": "Primary"},
+        ]}
+
+    # Everything else
+    def _pipelines(self, found, query, raw):
+        return 200, {"results": [
+            {"id": str(pipeline), "label": f"Pipeline {pipeline}", "displayOrder": pipeline, "archived": False,
+             "stages": [{"id": stage, "label": stage.title(), "displayOrder": order, "archived": False,
+                         "metadata": {}} for order, stage in enumerate(STAGES)]}
+            for pipeline in range(2)
+        ]}
+
+    def _properties(self, found, query, raw):
+        return 200, {"results": [dict(prop) for prop in PROPERTIES]}
+
+    def _upload(self, found, query, raw):
+        file_name = re.search(rb'name="file"; filename="([^"]*)"', raw)
+        with self.portal.lock:
+            self.portal.files += 1
+            hs_id = self.portal.files
+
+        name = file_name.group(1).decode() if file_name else f"file{hs_id}"
+        return 201, {"id": str(hs_id), "name": name.rsplit(".", 1)[0], "extension": name.rsplit(".", 1)[-1],
+                     "type": "OTHER", "size": raw.size, "access": "PRIVATE",
+                     "url": f"https://files.example.com/{hs_id}/{name}"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=None)
+    parser.add_argument("--rate-window", type=float, default=10.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    simulator = HubSpotSimulator(args.records, args.latency, args.jitter, args.rate_limit, args.rate_window,
+                                 throttle_rate=args.throttle_rate, error_rate=args.error_rate, host=args.host,
+                                 port=args.port, seed=args.seed)
+    print(simulator.url, flush=True)
+    try:
+        simulator.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -15,5 +15,9 @@ setup(
     description='A Python interface to HubSpot',
     requires=[
         "requests"
-    ]
+    ],
+    extras_require={
+        "async": ["aiohttp"],
+        "export": ["pyarrow"]
+    }
 )
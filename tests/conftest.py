@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, os.path.join(HERE, "..", "benchmarks"))
+
+from simulator import HubSpotSimulator  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    # Clients keep property schemas in the user's cache directory
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path / "cache"))
+
+
+@pytest.fixture
+def simulator():
+    with HubSpotSimulator(records=100, rate_limit=50, rate_window=10, daily_limit=1000) as simulator:
+        yield simulator
+
+
+@pytest.fixture
+def client(simulator):
+    from HubSpot import Client
+
+    client = Client("token", rate_limit=1000)
+    client.interface.base_url = simulator.url
+    yield client
+    client.interface.pool.close()
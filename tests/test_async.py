@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+
+from HubSpot import AsyncClient
+from HubSpot.CRM import COMPANY, CONTACT, DEAL
+
+
+def run(simulator, operation):
+    async def main():
+        async with AsyncClient("token", rate_limit=1000) as client:
+            client.interface.base_url = simulator.url
+            return await operation(client)
+
+    return asyncio.run(main())
+
+
+def test_batches(simulator):
+    async def operation(client):
+        created = await client.crm.batch_new(DEAL, [{"dealname": f"Deal {index}"} for index in range(150)])
+        assert created.ok and len(created) == 150
+
+        hs_ids = [deal.hs_id for deal in created]
+        updated = await client.crm.batch_update(DEAL, [(hs_id, {"amount": "5"}) for hs_id in hs_ids])
+        assert updated.ok
+
+        found = await client.crm.batch_get(DEAL, hs_ids + ["99999"], ["amount"])
+        assert [deal.amount for deal in found.results[:-1]] == ["5"] * 150
+        assert [error.index for error in found.errors] == [150]
+
+        archived = await client.crm.batch_archive(DEAL, hs_ids[:10])
+        assert archived.results == [True] * 10
+
+        # A failed call fails only its own chunk
+        simulator.script(400)
+        found = await client.crm.batch_get(DEAL, hs_ids[10:], batch_size=100)
+        assert [error.index for error in found.errors] == list(range(100))
+        assert all(deal is not None for deal in found.results[100:])
+
+    run(simulator, operation)
+
+
+def test_upsert_many(simulator):
+    async def operation(client):
+        records = [{"email": f"async{index}@example.com", "firstname": "A"} for index in range(5)]
+        first = await client.crm.upsert_many(CONTACT, records, "email")
+        again = await client.crm.upsert_many(CONTACT, records, "email")
+
+        assert first.ok and again.ok
+        assert [contact.hs_id for contact in first] == [contact.hs_id for contact in again]
+
+    run(simulator, operation)
+
+
+def test_batch_associations(simulator):
+    async def operation(client):
+        deal = await client.crm.get_object(DEAL, 1)
+        companies = [await client.crm.get_object(COMPANY, hs_id) for hs_id in (1, 2)]
+
+        created = await client.crm.batch_create_association([(deal, company) for company in companies])
+        removed = await client.crm.batch_remove_association([(deal, companies[0])])
+
+        assert created.results == [True, True]
+        assert removed.results == [True]
+
+    run(simulator, operation)
+
+
+def test_read_associations(simulator):
+    async def operation(client):
+        deal = await client.crm.get_object(DEAL, 1)
+        company = await client.crm.get_object(COMPANY, 3)
+        await client.crm.batch_create_association([(deal, company)])
+
+        result = await client.crm.read_associations([deal], COMPANY, prefetch=True)
+
+        assert [found.hs_id for found in result.results[0]] == ["3"]
+
+    run(simulator, operation)
+
+
+def test_associations_by_label(simulator):
+    async def operation(client):
+        deal = await client.crm.get_object(DEAL, 1)
+        company = await client.crm.get_object(COMPANY, 4)
+
+        labels = await client.crm.association_labels(DEAL, COMPANY)
+        await client.crm.create_association(deal, company, "USER_DEFINED", "primary")
+        created = await client.crm.batch_create_association([(deal, company, "Primary"), (deal, company, "Missing")])
+
+        assert [label["typeId"] for label in labels] == [1, 100]
+        assert created.results == [True, None]
+        assert "Missing" in created.errors[0].message
+        assert [call for call in simulator.calls if call[1].endswith("/labels")] == [
+            ("GET", "/crm/v4/associations/deals/companies/labels")]
+
+    run(simulator, operation)
+
+
+def test_priority_is_accepted(simulator):
+    async def operation(client):
+        response = await client.interface.call("/crm/v3/objects/deals/1", priority="bulk")
+        hs_id = await client.interface.call_then("/crm/v3/objects/deals/1", lambda response: response.json()["id"],
+                                                 priority="bulk")
+
+        assert response.json()["id"] == hs_id == "1"
+
+    run(simulator, operation)
+
+
+def test_parallel(simulator):
+    async def operation(client):
+        deals = [deal async for deal in client.crm.parallel("get_object", [(DEAL, hs_id) for hs_id in range(1, 21)],
+                                                             max_workers=4)]
+        found = [(index, type(result)) async for index, result in client.crm.parallel(
+            "get_object", [(DEAL, 1), (DEAL, 99999)], ordered=False, return_exceptions=True)]
+
+        assert [deal.hs_id for deal in deals] == [str(hs_id) for hs_id in range(1, 21)]
+        assert sorted(found)[0] == (0, DEAL)
+        assert issubclass(sorted(found)[1][1], Exception)
+
+    run(simulator, operation)
+
+
+def test_search_all(simulator):
+    async def operation(client):
+        deals = [deal.hs_id async for deal in client.crm.search_all(DEAL, {})]
+        ranged = [deal.hs_id async for deal in client.crm.search_all(DEAL, {"limit": 10}, partitions=4,
+                                                                     max_workers=2)]
+
+        assert deals == [str(hs_id) for hs_id in range(1, 101)]
+        assert sorted(ranged, key=int) == deals
+
+    run(simulator, operation)
+
+
+def test_query(simulator):
+    async def operation(client):
+        query = (await client.crm.query(DEAL, validate=True)).where(amount__gte=500).select("amount")
+
+        deals = [deal async for deal in query]
+        first = await query.first()
+        everything = [deal async for deal in query.all()]
+        nothing = await query.where(amount__lt=0).first()
+
+        assert deals and all(int(deal.amount) >= 500 for deal in deals)
+        assert first.hs_id == deals[0].hs_id
+        assert sorted(deal.hs_id for deal in everything) == sorted(deal.hs_id for deal in deals)
+        assert nothing is None
+        with pytest.raises(TypeError):
+            iter(query)
+        with pytest.raises(Exception, match="has no property dealnmae"):
+            query.where(dealnmae="x")
+
+    run(simulator, operation)
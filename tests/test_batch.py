@@ -0,0 +1,167 @@
+from HubSpot.CRM import COMPANY, CONTACT, DEAL
+from HubSpot.CRM.Batch import BatchResult
+from HubSpot.CRM.HSFactory import HSFactory
+
+
+def line_up(chunk, response, input_key=str, result_key=lambda hs_data: hs_data["id"], fold_keys=False):
+    result = BatchResult(results=[None] * len(chunk))
+    HSFactory._line_up(chunk, response, result, lambda hs_data: hs_data["id"], input_key, result_key, fold_keys)
+
+    return result
+
+
+def test_unattributed_errors_only_fail_inputs_without_results():
+    chunk = [(0, "1", {"id": "1"}), (1, "2", {"id": "2"}), (2, "3", {"id": "3"})]
+    response = {"results": [{"id": "1"}, {"id": "3"}], "errors": [{"message": "Something broke", "context": {}}]}
+
+    result = line_up(chunk, response)
+
+    assert result.results == ["1", None, "3"]
+    assert [(error.index, error.message) for error in result.errors] == [(1, "Something broke")]
+
+
+def test_results_are_never_assigned_by_position():
+    chunk = [(0, "a", {"properties": {}, "objectWriteTraceId": "0"}),
+             (1, "b", {"properties": {}, "objectWriteTraceId": "1"})]
+    response = {"results": [{"id": "11"}, {"id": "12"}]}
+
+    result = line_up(chunk, response, None, lambda hs_data: hs_data.get("objectWriteTraceId"))
+
+    assert result.results == [None, None]
+    assert {error.category for error in result.errors} == {"UNMATCHED"}
+    assert result.errors[0].context == {"ids": ["11", "12"]}
+
+
+def test_a_single_leftover_result_belongs_to_the_single_leftover_input():
+    chunk = [(0, "a", {"objectWriteTraceId": "0"}), (1, "b", {"objectWriteTraceId": "1"})]
+    response = {"results": [{"id": "11", "objectWriteTraceId": "0"}, {"id": "12"}]}
+
+    result = line_up(chunk, response, None, lambda hs_data: hs_data.get("objectWriteTraceId"))
+
+    assert result.results == ["11", "12"]
+    assert result.ok
+
+
+def test_id_property_reads_match_regardless_of_case(client):
+    created = client.crm.new_object(CONTACT, email="Mixed.Case@Example.com")
+
+    found = client.crm.batch_get(CONTACT, ["MIXED.case@example.com", "missing@example.com"], id_property="email")
+
+    assert found.results[0].hs_id == created.hs_id
+    assert found.results[1] is None
+    assert [error.category for error in found.errors] == ["OBJECT_NOT_FOUND"]
+
+
+def test_upsert_many_merges_keys_differing_in_case(client):
+    first = client.crm.upsert_many(CONTACT, [{"email": "Upsert@Example.com", "firstname": "A"}], "email")
+    again = client.crm.upsert_many(CONTACT, [{"email": "upsert@example.com", "firstname": "B"},
+                                             {"email": "UPSERT@example.com", "lastname": "C"}], "email")
+
+    assert again.ok
+    assert again.results[0].hs_id == again.results[1].hs_id == first.results[0].hs_id
+
+
+def test_batch_get_by_id(client):
+    result = client.crm.batch_get(DEAL, [3, 1, 999])
+
+    assert [deal.hs_id if deal else None for deal in result] == ["3", "1", None]
+    assert [error.index for error in result.errors] == [2]
+
+
+class Record:
+    def __init__(self, hs_id, object_type="deals"):
+        self.hs_id = hs_id
+        self.object_type = object_type
+
+
+def test_association_errors_go_to_the_pairs_they_name():
+    from HubSpot.CRM.Associations import Associations
+
+    chunk = [(index, (Record(from_id), Record(to_id, "companies")), {})
+             for index, (from_id, to_id) in enumerate([(1, 10), (2, 20), (3, 30)])]
+    response = {
+        "results": [{"fromObjectId": 1, "toObjectId": 10}],
+        "errors": [{"message": "No deal 2", "category": "OBJECT_NOT_FOUND", "context": {"fromObjectId": ["2"]}},
+                   {"message": "No company 30", "category": "OBJECT_NOT_FOUND", "context": {"toObjectId": "30"}}],
+    }
+    result = BatchResult(results=[None] * 3)
+
+    Associations._line_up(chunk, response, result)
+
+    assert result.results == [True, None, None]
+    assert [(error.index, error.message) for error in result.errors] == [(1, "No deal 2"), (2, "No company 30")]
+
+
+def test_attach_file_crm_checks_targets_before_making_the_note(simulator, client):
+    import pytest
+    from HubSpot.Files import File
+
+    file = File(client.interface, {"id": "7", "name": "a.pdf", "type": "DOCUMENT"})
+    deal = client.crm.get_object(DEAL, 1)
+
+    with pytest.raises(Exception):
+        client.attach_file_crm(file, [deal, Record(None)])
+
+    assert ("POST", "/crm/v3/objects/notes") not in simulator.calls
+
+    note = client.attach_file_crm(file, [deal, client.crm.get_object(CONTACT, 2)])
+    assert note.hs_attachment_ids == "7"
+
+
+def test_read_many_fails_the_chunk_for_errors_naming_no_object(client):
+    from HubSpot.CRM.Associations import Associations
+    from HubSpot.CRM.Graph import AssociationIndex
+
+    class Canned(Associations):
+        def _read(self, from_type, to_type, inputs):
+            yield from ()
+            if inputs[0]["id"] == "1":
+                return [{"from": {"id": "1"}, "to": [{"toObjectId": 10}]}], [{"message": "Try again",
+                                                                             "category": "RATE_LIMITS"}]
+            return [{"from": {"id": "3"}, "to": [{"toObjectId": 30}]}], []
+
+    index = AssociationIndex()
+    deals = [Record(hs_id) for hs_id in (1, 2, 3)]
+    result = Canned(client.interface, "").read_many(deals, "companies", index, batch_size=2)
+
+    assert result.results == [None, None, ["30"]]
+    assert [(error.index, error.message) for error in result.errors] == [(0, "Try again"), (1, "Try again")]
+    assert not index.loaded(deals[0], "companies")
+    assert not index.loaded(deals[1], "companies")
+
+
+def test_read_many(simulator, client):
+    deal = client.crm.get_object(DEAL, 1)
+    companies = [client.crm.get_object(COMPANY, hs_id) for hs_id in (1, 2)]
+    client.crm.batch_create_association([(deal, company) for company in companies])
+
+    result = client.crm.read_associations([deal, client.crm.get_object(DEAL, 2)], COMPANY, prefetch=True)
+
+    assert result.ok
+    assert sorted(company.hs_id for company in result.results[0]) == ["1", "2"]
+    assert result.results[1] == []
+
+
+def test_read_many_fails_the_objects_whose_associated_objects_could_not_be_fetched(simulator, client):
+    deals = [client.crm.get_object(DEAL, hs_id) for hs_id in (1, 2, 3)]
+    companies = [client.crm.get_object(COMPANY, hs_id) for hs_id in (1, 2)]
+    client.crm.batch_create_association([(deals[0], companies[0]), (deals[0], companies[1]), (deals[1], companies[1]),
+                                         (deals[2], companies[0])])
+    simulator.portal.archive("companies", 2)
+
+    result = client.crm.read_associations(deals, COMPANY, prefetch=True)
+
+    assert [error.index for error in result.errors] == [0, 1]
+    assert {error.category for error in result.errors} == {"OBJECT_NOT_FOUND"}
+    assert result.results[:2] == [None, None]
+    assert [company.hs_id for company in result.results[2]] == ["1"]
+
+
+def test_batch_create_fetches_labels_once_per_pair(simulator, client):
+    deal = client.crm.get_object(DEAL, 1)
+    companies = [client.crm.get_object(COMPANY, hs_id) for hs_id in (1, 2)]
+
+    created = client.crm.batch_create_association([(deal, company, "Primary") for company in companies])
+
+    assert created.results == [True, True]
+    assert simulator.calls.count(("GET", "/crm/v4/associations/deals/companies/labels")) == 1
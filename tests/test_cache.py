@@ -0,0 +1,97 @@
+import pytest
+
+from HubSpot import Cache as module
+from HubSpot import Client
+from HubSpot.Cache import ObjectCache
+from HubSpot.CRM import DEAL
+from HubSpot.Parallel import parallel_map
+
+
+@pytest.fixture
+def cached(simulator):
+    client = Client("token", rate_limit=1000, cache=ObjectCache(max_size=3, ttl=60))
+    client.interface.base_url = simulator.url
+    yield client
+    client.interface.pool.close()
+
+
+def gets(simulator, hs_id):
+    return simulator.calls.count(("GET", f"/crm/v3/objects/deals/{hs_id}"))
+
+
+def test_hits_are_served_without_a_call(simulator, cached):
+    first = cached.crm.get_object(DEAL, 1)
+    again = cached.crm.get_object(DEAL, 1)
+
+    assert again is first
+    assert gets(simulator, 1) == 1
+    assert cached.interface.cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "coalesced": 0, "size": 1}
+
+
+def test_concurrent_misses_make_one_call(simulator, cached):
+    simulator.latency = 0.2
+
+    deals = list(parallel_map(lambda _: cached.crm.get_object(DEAL, 1), range(8), max_workers=8))
+
+    assert all(deal is deals[0] for deal in deals)
+    assert gets(simulator, 1) == 1
+    stats = cached.interface.cache.stats()
+    assert (stats["misses"], stats["coalesced"]) == (8, 7)
+
+
+def test_a_failed_load_is_not_kept(simulator, cached):
+    simulator.script(404)
+
+    with pytest.raises(Exception):
+        cached.crm.get_object(DEAL, 1)
+
+    assert cached.crm.get_object(DEAL, 1).hs_id == "1"
+    assert gets(simulator, 1) == 2
+
+
+def test_entries_expire_after_their_ttl(simulator, cached, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(module, "monotonic", lambda: now[0])
+
+    cached.crm.get_object(DEAL, 1)
+    now[0] += 59
+    cached.crm.get_object(DEAL, 1)
+    now[0] += 2
+    cached.crm.get_object(DEAL, 1)
+
+    assert gets(simulator, 1) == 2
+
+
+def test_the_least_recently_used_entry_is_evicted(simulator, cached):
+    for hs_id in (1, 2, 3):
+        cached.crm.get_object(DEAL, hs_id)
+    cached.crm.get_object(DEAL, 1)
+    cached.crm.get_object(DEAL, 4)
+
+    cached.crm.get_object(DEAL, 1)
+    cached.crm.get_object(DEAL, 2)
+
+    assert (gets(simulator, 1), gets(simulator, 2)) == (1, 2)
+    assert cached.interface.cache.stats()["evictions"] == 2
+
+
+def test_writes_drop_the_cached_object(simulator, cached):
+    deal = cached.crm.get_object(DEAL, 1)
+    deal.update_hs({"amount": "5"})
+    cached.crm.get_object(DEAL, 1)
+
+    cached.crm.batch_update(DEAL, [(1, {"amount": "6"})])
+    cached.crm.get_object(DEAL, 1).archive()
+
+    assert gets(simulator, 1) == 3
+    assert len(cached.interface.cache) == 0
+
+
+def test_batch_archive_drops_the_cached_objects(simulator, cached):
+    cached.crm.get_object(DEAL, 1)
+    cached.crm.get_object(DEAL, 2)
+
+    cached.crm.batch_archive(DEAL, [1])
+
+    assert len(cached.interface.cache) == 1
+    assert cached.interface.cache.get(DEAL.object_type, "2") is not None
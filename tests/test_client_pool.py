@@ -0,0 +1,26 @@
+from HubSpot import ClientPool
+from HubSpot.CRM import DEAL
+
+
+def test_a_token_out_of_quota_does_not_hold_back_the_others(simulator):
+    with ClientPool() as clients:
+        for portal, daily_limit in (("emea", 3), ("apac", 100)):
+            clients.add(portal, f"{portal}-token", rate_limit=1000, daily_limit=daily_limit)
+            clients[portal].interface.base_url = simulator.url
+
+        for hs_id in (1, 2, 3):
+            clients["emea"].crm.get_object(DEAL, hs_id)
+        sent = len(simulator.calls)
+
+        results = dict(clients.map(lambda client: [client.crm.get_object(DEAL, hs_id).hs_id for hs_id in (4, 5, 6)],
+                                   return_exceptions=True))
+
+        status = clients.status()
+
+    assert "daily quota" in str(results["emea"])
+    assert results["apac"] == ["4", "5", "6"]
+    # The used up token sent nothing more, and its calls didn't count against the other token
+    assert len(simulator.calls) == sent + 3
+    assert (status["emea"]["daily_remaining"], status["apac"]["daily_remaining"]) == (0, 97)
+    assert clients["emea"].interface.pool is clients["apac"].interface.pool
+
@@ -0,0 +1,69 @@
+import asyncio
+import csv
+import json
+
+from simulator import HubSpotSimulator
+
+from HubSpot import AsyncClient, Client
+from HubSpot.CRM import DEAL, SchemaRegistry
+
+
+def test_export_ndjson(simulator, client, tmp_path):
+    path = tmp_path / "deals.ndjson"
+
+    written = client.crm.export(DEAL, path, "ndjson", properties=["dealname", "amount"], batch_size=30)
+
+    rows = [json.loads(line) for line in path.read_text().splitlines()]
+    assert written == len(rows) == 100
+    assert list(rows[0]) == ["id", "dealname", "amount"]
+
+
+def test_export_csv(simulator, client, tmp_path):
+    path = tmp_path / "deals.csv"
+
+    written = client.crm.export(DEAL, path, "csv", properties=["dealname"], batch_size=30)
+
+    with path.open(newline="") as file:
+        rows = list(csv.reader(file))
+    assert written == 100
+    assert rows[0] == ["id", "dealname"]
+    assert len(rows) == 101
+
+
+def test_export_parquet_with_no_objects(tmp_path):
+    import pyarrow.parquet
+
+    path = tmp_path / "deals.parquet"
+    with HubSpotSimulator(records=0) as simulator:
+        client = Client("token", rate_limit=1000)
+        client.interface.base_url = simulator.url
+
+        assert client.crm.export(DEAL, path, properties=["dealname", "amount"]) == 0
+
+    assert pyarrow.parquet.read_table(path).column_names == ["id", "dealname", "amount"]
+
+
+def test_export_parquet_types_columns(simulator, client, tmp_path):
+    import pyarrow.parquet
+
+    path = tmp_path / "deals.parquet"
+
+    assert client.crm.export(DEAL, path, properties=["dealname", "amount"], batch_size=30) == 100
+
+    table = pyarrow.parquet.read_table(path)
+    assert table.num_rows == 100
+    assert str(table.schema.field("amount").type) == "double"
+
+
+def test_async_export(simulator, client, tmp_path):
+    schemas = SchemaRegistry()
+    schemas.put(client.crm.hs_factory.schema(DEAL))
+    path = tmp_path / "deals.ndjson"
+
+    async def main():
+        async with AsyncClient("token", rate_limit=1000, schemas=schemas) as async_client:
+            async_client.interface.base_url = simulator.url
+            return await async_client.crm.export(DEAL, path, "ndjson", properties=["dealname"], batch_size=30)
+
+    assert asyncio.run(main()) == 100
+    assert len(path.read_text().splitlines()) == 100
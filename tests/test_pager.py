@@ -0,0 +1,83 @@
+import pytest
+
+from HubSpot import CallEvent, Instrument, priority
+from HubSpot.CRM import DEAL
+from HubSpot.CRM.Pager import Pager
+from HubSpot.Parallel import parallel_map
+
+
+def pages(size, total):
+    def fetch_page(after):
+        start = int(after or 0)
+        end = min(start + size, total)
+        return list(range(start, end)), str(end) if end < total else None
+
+    return fetch_page
+
+
+@pytest.mark.parametrize("prefetch", [0, 2])
+def test_pages_through_everything(prefetch):
+    assert list(Pager(pages(10, 95), prefetch=prefetch)) == list(range(95))
+
+
+def test_next_works_as_on_a_generator():
+    pager = Pager(pages(10, 25))
+
+    assert next(pager) == 0
+    assert next(pager) == 1
+    assert list(pager) == list(range(2, 25))
+    with pytest.raises(StopIteration):
+        next(pager)
+
+
+def test_resumes_after_the_last_record_yielded():
+    pager = Pager(pages(10, 35))
+    seen = [next(pager) for _ in range(13)]
+
+    assert (pager.after, pager.offset) == ("10", 3)
+
+    resumed = pager.resume()
+    assert seen + list(resumed) == list(range(35))
+    # The final position is kept, so resuming a finished pager yields nothing new
+    assert (resumed.after, resumed.offset) == ("30", 5)
+    assert list(resumed.resume()) == []
+
+
+def test_list_objects_resumes_from_a_saved_position(client):
+    deals = client.crm.list_objects(DEAL, limit=7)
+    first = [next(deals).hs_id for _ in range(10)]
+    deals.close()
+
+    rest = client.crm.list_objects(DEAL, limit=7, _after=deals.after, _offset=deals.offset)
+    hs_ids = first + [deal.hs_id for deal in rest]
+
+    assert hs_ids == [str(hs_id) for hs_id in range(1, 101)]
+
+
+class Lanes(Instrument):
+    def __init__(self):
+        self.lanes = []
+
+    def response(self, event: CallEvent):
+        self.lanes.append(event.lane)
+
+
+def test_prefetched_pages_are_fetched_in_the_lane_of_the_priority_block(client):
+    lanes = Lanes()
+    client.interface.instruments.append(lanes)
+
+    with priority("bulk"):
+        deals = list(client.crm.list_objects(DEAL, limit=50))
+
+    assert len(deals) == 100
+    assert lanes.lanes == ["bulk", "bulk"]
+
+
+def test_parallel_calls_are_made_in_the_lane_of_the_priority_block(client):
+    lanes = Lanes()
+    client.interface.instruments.append(lanes)
+
+    with priority("bulk"):
+        list(parallel_map(lambda hs_id: client.crm.get_object(DEAL, hs_id), range(1, 5), max_workers=2))
+
+    assert lanes.lanes == ["bulk"] * 4
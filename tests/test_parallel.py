@@ -0,0 +1,77 @@
+import time
+from itertools import count
+
+import pytest
+
+from HubSpot.Parallel import parallel_map, parallel_merge
+
+
+def test_results_come_back_in_argument_order():
+    # Later arguments finish first
+    results = parallel_map(lambda value: time.sleep((10 - value) / 200) or value * 2, range(10), max_workers=4)
+
+    assert list(results) == [value * 2 for value in range(10)]
+
+
+def test_unordered_results_carry_their_index():
+    results = list(parallel_map(lambda a, b: a + b, [(index, index) for index in range(10)], ordered=False))
+
+    assert sorted(results) == [(index, index * 2) for index in range(10)]
+
+
+def test_only_a_window_of_arguments_is_taken_ahead():
+    taken = []
+
+    def arguments():
+        for value in count():
+            taken.append(value)
+            yield value
+
+    results = parallel_map(lambda value: value, arguments(), max_workers=2)
+
+    assert [next(results) for _ in range(3)] == [0, 1, 2]
+    assert len(taken) <= 3 + 2 * 2
+    results.close()
+
+
+def fail_odd(value):
+    if value % 2:
+        raise ValueError(value)
+    return value
+
+
+def test_exceptions_are_raised():
+    with pytest.raises(ValueError):
+        list(parallel_map(fail_odd, range(4)))
+
+
+def test_exceptions_are_returned_in_place():
+    results = list(parallel_map(fail_odd, range(4), return_exceptions=True))
+
+    assert results[0::2] == [0, 2]
+    assert [type(result) for result in results[1::2]] == [ValueError, ValueError]
+
+
+def test_merge_yields_every_item():
+    sources = [lambda start=start: range(start, start + 100) for start in (0, 100, 200)]
+
+    assert sorted(parallel_merge(sources, max_workers=2)) == list(range(300))
+
+
+def test_a_stopped_merge_pulls_nothing_more():
+    pulls = []
+
+    def source(name):
+        def items():
+            for index in range(100):
+                pulls.append(name)
+                yield index
+        return items
+
+    merged = parallel_merge([source(name) for name in "abc"], max_workers=1, buffer=1)
+    next(merged)
+    merged.close()
+
+    # The sources not started when the merge stopped are never pulled from
+    assert set(pulls) == {"a"}
+    assert len(pulls) <= 3
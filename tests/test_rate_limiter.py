@@ -0,0 +1,68 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from HubSpot import RateLimiter as module
+from HubSpot.RateLimiter import RateLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(module, "monotonic", clock.monotonic)
+    monkeypatch.setattr(module, "sleep", clock.sleep)
+    return clock
+
+
+def test_burst_passes_without_waiting(clock):
+    limiter = RateLimiter(10, 1.0, burst=5)
+
+    assert [limiter.acquire() for _ in range(5)] == [0.0] * 5
+    assert clock.now == 1000.0
+    assert limiter.acquire() == pytest.approx(0.1)
+
+
+def test_the_rate_is_held_across_threads(clock):
+    limiter = RateLimiter(10, 2.0, burst=4)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        delays = sorted(executor.map(lambda _: limiter.reserve(), range(24)))
+
+    # The burst goes at once, then one token every window / rate_limit seconds, whichever thread asked
+    assert delays[:4] == [0.0] * 4
+    assert delays[4:] == pytest.approx([0.2 * step for step in range(1, 21)])
+
+
+def test_the_bucket_refills_at_the_rate(clock):
+    limiter = RateLimiter(10, 1.0)
+    for _ in range(10):
+        limiter.acquire()
+
+    clock.now += 0.5
+    assert limiter.available == pytest.approx(5)
+    clock.now += 5
+    assert limiter.available == pytest.approx(10)
+
+
+def test_pause_holds_back_everyone_sharing_the_limiter(clock):
+    limiter = RateLimiter(10, 1.0)
+
+    limiter.pause(3)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first, second = executor.map(lambda _: limiter.reserve(), range(2))
+
+    assert sorted((first, second)) == pytest.approx([3.1, 3.2])
+    clock.now += 3.2
+    assert limiter.try_reserve() == pytest.approx(0.1)
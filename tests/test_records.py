@@ -0,0 +1,43 @@
+import gc
+import weakref
+
+from HubSpot import Client
+from HubSpot.CRM import DEAL
+
+
+def test_record_classes_are_shared_within_a_client(simulator, client):
+    first = list(client.crm.list_objects(DEAL, limit=10, compact=True))[:1]
+    second = list(client.crm.list_objects(DEAL, limit=10, compact=True))[:1]
+
+    assert type(first[0]) is type(second[0])
+
+
+def test_record_classes_do_not_keep_clients_alive(simulator):
+    client = Client("token", rate_limit=1000)
+    client.interface.base_url = simulator.url
+    assert len(list(client.crm.list_objects(DEAL, limit=100, compact=True))) == 100
+
+    bulk = client.with_priority("bulk")
+    assert len(list(bulk.crm.list_objects(DEAL, limit=100, compact=True))) == 100
+
+    interface = weakref.ref(client.interface)
+    view = weakref.ref(bulk.interface)
+    client.interface.pool.close()
+    del client, bulk
+    gc.collect()
+
+    assert interface() is None
+    assert view() is None
+
+
+def test_layouts_from_many_threads_keep_their_own_positions():
+    from HubSpot.CRM import PropertyTable
+    from HubSpot.Parallel import parallel_map
+
+    table = PropertyTable()
+    orders = [("a", "b", "c"), ("c", "b", "a"), ("b", "c", "a")]
+
+    def check(keys):
+        return all(table.names[position] == key for key, position in zip(keys, table.layout(keys)))
+
+    assert all(parallel_map(check, [(orders[index % 3], ) for index in range(3000)], max_workers=8))
@@ -0,0 +1,122 @@
+import io
+
+import pytest
+from requests import HTTPError
+from requests.exceptions import ReadTimeout
+
+from HubSpot import CallEvent, Instrument
+from HubSpot.CRM import CONTACT, DEAL
+from HubSpot.Retry import RetryPolicy
+
+
+class Events(Instrument):
+    def __init__(self):
+        self.events = []
+
+    def response(self, event: CallEvent):
+        self.events.append(event)
+
+
+def test_rate_limit_headers_are_read(simulator, client):
+    assert client.interface.remaining is None
+
+    client.crm.get_object(DEAL, 1)
+    client.crm.get_object(DEAL, 2)
+
+    status = client.interface.rate_limit_status
+    assert status.remaining == 48
+    assert status.max == 50
+    assert status.interval == 10
+    assert status.daily == 1000
+    assert status.daily_remaining == 998
+    assert client.interface.remaining == 48
+
+
+def test_429_is_retried_after_retry_after(simulator, client):
+    events = Events()
+    client.interface.instruments.append(events)
+    simulator.script(429, {"Retry-After": "0"}, count=2)
+
+    deal = client.crm.get_object(DEAL, 3)
+
+    assert deal.hs_id == "3"
+    assert len(simulator.calls) == 3
+    assert events.events[-1].retries == 2
+
+
+def test_429_is_retried_for_creates(simulator, client):
+    simulator.script(429, {"Retry-After": "0"})
+
+    contact = client.crm.new_object(CONTACT, email="a@example.com")
+
+    assert contact.hs_id is not None
+    assert simulator.calls == [("POST", "/crm/v3/objects/contacts")] * 2
+
+
+def test_server_errors_are_retried_for_reads(simulator, client):
+    client.interface.retry_policy = RetryPolicy(backoff=0)
+    simulator.script(503, count=2)
+
+    assert client.crm.get_object(DEAL, 4).hs_id == "4"
+    assert len(simulator.calls) == 3
+
+    simulator.script(502)
+    assert client.crm.batch_get(DEAL, [1, 2]).ok
+    assert simulator.calls[-2:] == [("POST", "/crm/v3/objects/deals/batch/read")] * 2
+
+
+def test_server_errors_are_not_retried_for_creates(simulator, client):
+    client.interface.retry_policy = RetryPolicy(backoff=0)
+    simulator.script(502)
+
+    with pytest.raises(HTTPError):
+        client.crm.new_object(CONTACT, email="b@example.com")
+
+    assert simulator.calls == [("POST", "/crm/v3/objects/contacts")]
+
+
+def test_retries_give_up_after_max_retries(simulator, client):
+    client.interface.retry_policy = RetryPolicy(max_retries=2, backoff=0)
+    simulator.script(503, count=5)
+
+    with pytest.raises(HTTPError):
+        client.crm.get_object(DEAL, 5)
+
+    assert len(simulator.calls) == 3
+
+
+def test_retry_after_sets_the_least_wait():
+    policy = RetryPolicy(backoff=0)
+
+    assert policy.delay(0, {"Retry-After": "2"}) == 2
+    assert policy.delay(0, {}) == 0
+    assert policy.should_retry(503, 0, "POST", "/crm/v3/objects/deals/search")
+    assert not policy.should_retry(503, 0, "POST", "/crm/v3/objects/deals/batch/create")
+    assert policy.should_retry(429, 0, "POST", "/crm/v3/objects/deals/batch/create")
+
+
+def test_a_stalled_response_times_out(simulator, client):
+    assert client.interface.pool.timeout == (5, 60)
+    client.interface.pool.timeout = (5, 0.2)
+    simulator.latency = 1
+
+    with pytest.raises(ReadTimeout):
+        client.crm.get_object(DEAL, 1)
+
+    # Uploads wait longer than other calls
+    assert client.files.upload(io.BytesIO(b"data"), "PRIVATE", "/tests", "stalled.txt").name == "stalled"
+
+
+def test_call_then_times_the_json_without_changing_the_response(simulator, client):
+    events = Events()
+    client.interface.instruments.append(events)
+    seen = []
+
+    def handler(response):
+        seen.append(response)
+        return response.json() is response.json()
+
+    assert client.interface.call_then("/crm/v3/objects/deals/1", handler)
+    assert "json" not in vars(seen[0]._response)
+    assert events.events[0].parse_time > 0
+    assert events.events[0].handler_time >= events.events[0].parse_time
@@ -0,0 +1,74 @@
+from threading import Event, Lock, Thread
+
+import pytest
+
+from HubSpot.CRM import COMPANY, DEAL
+from HubSpot.RateLimiter import RateLimiter
+from HubSpot.Scheduler import Scheduler
+
+
+def contend(scheduler: Scheduler, lanes, grants: int, workers: int = 4):
+    """ Keeps workers waiting in every lane until grants tokens are handed out, and returns the lane of each in order """
+
+    served = []
+    lock = Lock()
+    done = Event()
+
+    def work(lane):
+        while not done.is_set():
+            scheduler.acquire(lane)
+            with lock:
+                served.append(lane)
+                if len(served) >= grants:
+                    done.set()
+
+    threads = [Thread(target=work, args=(lane, )) for lane in lanes for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return served
+
+
+def test_contending_lanes_are_served_by_weight():
+    scheduler = Scheduler(RateLimiter(200, 1.0, burst=1), {"interactive": 3, "default": 1})
+    scheduler.acquire()
+
+    served = contend(scheduler, ["interactive", "default"], 120)
+
+    # The first few go to whichever lane asked first, then interactive gets 3 of every 4
+    assert served[8:108].count("interactive") == pytest.approx(75, abs=4)
+
+
+def test_stats_count_what_each_lane_was_served_and_waited():
+    scheduler = Scheduler(RateLimiter(200, 1.0, burst=1), {"interactive": 3, "default": 1, "bulk": 1})
+    scheduler.acquire()
+
+    served = contend(scheduler, ["interactive", "bulk"], 40)
+    stats = scheduler.stats()
+
+    assert stats["default"]["served"] == 1
+    assert stats["default"]["wait"]["max"] == 0
+    for lane in ("interactive", "bulk"):
+        assert stats[lane]["weight"] == scheduler.lanes[lane].weight
+        assert stats[lane]["depth"] == 0
+        assert stats[lane]["served"] == stats[lane]["wait"]["count"] == served.count(lane)
+        assert stats[lane]["wait"]["max"] > 0
+
+
+def test_with_priority_shares_the_caches_of_the_client(simulator, client):
+    client.crm.association_labels(DEAL, COMPANY)
+    client.crm.schema(DEAL)
+
+    bulk = client.with_priority("bulk")
+    bulk.crm.association_labels(DEAL, COMPANY)
+    bulk.crm.schema(DEAL)
+
+    assert simulator.calls.count(("GET", "/crm/v4/associations/deals/companies/labels")) == 1
+    assert simulator.calls.count(("GET", "/crm/v3/properties/deals")) == 1
+    assert bulk.crm.hs_factory.schemas is client.crm.hs_factory.schemas
+    assert bulk.crm.association.hs_factory is bulk.crm.hs_factory
+
+    assert bulk.crm.get_object(DEAL, 1).interface is bulk.interface
+    assert client.queues["bulk"]["served"] == 1
@@ -0,0 +1,105 @@
+import asyncio
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+import simulator as portal
+
+from HubSpot import AsyncClient, Client
+from HubSpot.CRM import DEAL, PropertySchema, SchemaRegistry
+from HubSpot.CRM.Schema import default_path, encode
+
+
+def test_schemas_are_kept_between_clients(simulator, client):
+    assert client.crm.schema(DEAL).type("amount") == "number"
+    assert default_path("token").exists()
+
+    again = Client("token", rate_limit=1000)
+    again.interface.base_url = simulator.url
+    calls = len(simulator.calls)
+
+    assert again.crm.schema(DEAL).type("amount") == "number"
+    assert len(simulator.calls) == calls
+    assert default_path("other token") != default_path("token")
+
+
+def test_async_schema_and_typed_listing(simulator):
+    async def main():
+        async with AsyncClient("token", rate_limit=1000, schemas=SchemaRegistry()) as client:
+            client.interface.base_url = simulator.url
+            deals = [deal async for deal in client.crm.list_objects(DEAL, limit=50, typed=True)]
+            schema = await client.crm.schema(DEAL)
+            return deals, schema
+
+    deals, schema = asyncio.run(main())
+
+    assert len(deals) == 100
+    assert deals[1].amount == 20
+    assert isinstance(deals[1].createdate, datetime)
+    assert schema.type("closedate") == "datetime"
+    assert [path for _, path in simulator.calls].count("/crm/v3/properties/deals") == 1
+
+
+def test_encode():
+    moment = datetime(2024, 5, 6, 7, 8, 9, 123456, tzinfo=timezone.utc)
+    schema = PropertySchema(DEAL, [{"name": "day", "type": "date"}, {"name": "closedate", "type": "datetime"}])
+
+    assert encode({"closedate": moment, "amount": Decimal("1E+2"), "flag": True, "day": date(2024, 5, 6)}) == {
+        "closedate": "2024-05-06T07:08:09.123Z", "amount": "100", "flag": "true", "day": "2024-05-06"}
+    assert encode({"closedate": datetime(2024, 5, 6)}) == {"closedate": "2024-05-06T00:00:00.000Z"}
+    assert encode({"day": moment, "closedate": date(2024, 5, 6)}, schema) == {
+        "day": "2024-05-06", "closedate": "2024-05-06T00:00:00.000Z"}
+
+
+def test_typed_values_are_sent(simulator, client):
+    moment = datetime(2024, 5, 6, 7, 8, 9, tzinfo=timezone.utc)
+    client.crm.schema(DEAL)
+
+    deal = client.crm.new_object(DEAL, dealname="Typed", amount=Decimal("12.50"), closedate=moment)
+    assert deal.amount == "12.50"
+    assert deal.closedate == "2024-05-06T07:08:09.000Z"
+
+    # Sent without a TypeError from json.dumps
+    deal.update_hs({"closedate": date(2024, 6, 1)})
+
+    with client.crm.session():
+        deal.amount = Decimal("7")
+        deal.closedate = moment
+
+    typed = list(client.crm.list_objects(DEAL, limit=100, properties=["amount", "closedate"], typed=True))
+    assert typed[-1].amount == 7
+    assert typed[-1].closedate == moment
+
+    created = client.crm.batch_new(DEAL, [{"dealname": "Batch", "closedate": date(2024, 1, 2)}])
+    assert created.ok
+    assert created[0].closedate == "2024-01-02T00:00:00.000Z"
+
+
+def fetches(simulator):
+    return simulator.calls.count(("GET", "/crm/v3/properties/deals"))
+
+
+def test_a_schema_from_an_earlier_run_is_fetched_again_before_rejecting(simulator, client, monkeypatch):
+    client.crm.schema(DEAL)
+    # Added in HubSpot after the schema was kept
+    properties = [dict(prop) for prop in portal.PROPERTIES] + [{"name": "region", "type": "string"}]
+    for prop in properties:
+        if prop["name"] == "dealstage":
+            prop["options"] = prop["options"] + [{"value": "paused"}]
+    monkeypatch.setattr(portal, "PROPERTIES", properties)
+
+    again = Client("token", rate_limit=1000)
+    again.interface.base_url = simulator.url
+
+    # Not checked against a schema this run hasn't fetched
+    assert again.crm.query(DEAL).where(region="emea").known_properties is None
+
+    created = again.crm.new_object(DEAL, dealname="New", region="emea")
+    assert created.hs_id is not None
+    assert fetches(simulator) == 2
+
+    assert again.crm.batch_new(DEAL, [{"dealname": "Paused", "dealstage": "paused"}]).ok
+    with pytest.raises(Exception, match="has no properties"):
+        again.crm.new_object(DEAL, dealname="New", regoin="emea")
+    assert fetches(simulator) == 2
+    assert "region" in again.crm.query(DEAL).known_properties
@@ -0,0 +1,78 @@
+import pytest
+
+from HubSpot.CRM import DEAL
+
+
+def _group(count: int):
+    return {"filters": [{"propertyName": "amount", "operator": "HAS_PROPERTY"}] * count}
+
+
+def test_search_all_pages_of_100_by_default(simulator, client):
+    deals = list(client.crm.search_all(DEAL, {}))
+
+    assert len(deals) == 100
+    # One search for the lowest id, then a single page
+    assert len(simulator.calls) == 2
+
+
+def test_search_all_leaves_room_in_each_group_for_the_range(simulator, client):
+    with pytest.raises(Exception, match="at most 4 filters"):
+        list(client.crm.search_all(DEAL, {"filterGroups": [_group(5)]}))
+
+    assert simulator.calls == []
+
+
+def test_search_all_leaves_room_in_the_search_for_the_range(simulator, client):
+    with pytest.raises(Exception, match="limit of 18 filters"):
+        list(client.crm.search_all(DEAL, {"filterGroups": [_group(2)] * 5}))
+
+    assert simulator.calls == []
+
+
+def test_query_all_checks_room_for_the_range(simulator, client):
+    query = client.crm.query(DEAL).where(amount__gt=1, amount__lt=2, dealname__neq="a", dealstage__neq="b",
+                                         pipeline__neq="c")
+
+    with pytest.raises(Exception, match="at most 4 filters"):
+        list(query.all())
+
+
+def test_query_validate_fetches_the_schema(simulator, client):
+    query = client.crm.query(DEAL, validate=True)
+
+    assert query.known_properties is not None
+    with pytest.raises(Exception, match="has no property dealnmae"):
+        query.where(dealnmae="x")
+
+
+def test_query_without_a_held_schema_is_not_checked(simulator, client):
+    query = client.crm.query(DEAL).where(dealnmae="x")
+
+    assert query.known_properties is None
+    assert simulator.calls == []
+
+
+def test_search_all_stopped_early_closes_its_pager(simulator, client):
+    import threading
+    import time
+
+    def pagers():
+        return [thread for thread in threading.enumerate() if thread.name == "Pager"]
+
+    deals = client.crm.search_all(DEAL, {"limit": 10})
+    next(deals)
+    deals.close()
+
+    deadline = time.monotonic() + 2
+    while pagers() and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    assert pagers() == []
+    assert len(simulator.calls) < 10
+
+
+def test_query_first_reads_one_result(simulator, client):
+    deal = client.crm.query(DEAL).first()
+
+    assert deal is not None
+    assert len(simulator.calls) == 1
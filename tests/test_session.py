@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from HubSpot import AsyncClient
+from HubSpot.CRM import COMPANY, DEAL
+
+
+def batch_calls(simulator, path):
+    return simulator.calls.count(("POST", path))
+
+
+def test_only_changed_properties_are_sent_in_one_batch(simulator, client):
+    deals = [client.crm.get_object(DEAL, hs_id) for hs_id in (1, 2, 3)]
+
+    with client.crm.session() as session:
+        deals[0].amount = "100"
+        deals[1].dealname = "Renamed"
+        assert session.dirty == deals[:2]
+        assert deals[0].changes == {"amount": "100"}
+
+    assert batch_calls(simulator, "/crm/v3/objects/deals/batch/update") == 1
+    assert simulator.portal.properties("deals", 1)["amount"] == "100"
+    assert simulator.portal.properties("deals", 2)["dealname"] == "Renamed"
+    assert deals[0].changes == {} and session.dirty == []
+
+
+def test_nothing_is_sent_if_the_block_raises(simulator, client):
+    deal = client.crm.get_object(DEAL, 1)
+
+    with pytest.raises(ValueError):
+        with client.crm.session():
+            deal.amount = "100"
+            raise ValueError()
+
+    assert batch_calls(simulator, "/crm/v3/objects/deals/batch/update") == 0
+    assert deal.changes == {"amount": "100"}
+
+
+def test_failed_changes_stay_pending_and_are_retried(simulator, client):
+    deals = [client.crm.get_object(DEAL, hs_id) for hs_id in (1, 2)]
+    simulator.portal.archive("deals", 2)
+
+    session = client.crm.session()
+    with pytest.raises(Exception, match="1 changes failed"):
+        with session:
+            deals[0].amount = "100"
+            deals[1].amount = "200"
+
+    assert [error.input for error in session.errors] == [deals[1]]
+    assert session.dirty == [deals[1]]
+
+    simulator.portal.archived.discard(("deals", 2))
+    session.flush()
+
+    assert session.errors == [] and session.dirty == []
+    assert simulator.portal.properties("deals", 2)["amount"] == "200"
+
+
+def test_removing_a_pending_association_cancels_it(simulator, client):
+    deal = client.crm.get_object(DEAL, 1)
+    companies = [client.crm.get_object(COMPANY, hs_id) for hs_id in (1, 2)]
+    client.crm.create_association(deal, companies[1])
+
+    with client.crm.session() as session:
+        deal.associate(companies[0])
+        deal.remove_association(companies[0])
+        deal.remove_association(companies[1])
+        assert len(session._associations) == 1
+
+    assert batch_calls(simulator, "/crm/v4/associations/deals/companies/batch/create") == 0
+    assert batch_calls(simulator, "/crm/v4/associations/deals/companies/batch/archive") == 1
+    assert simulator.portal.associated("deals", 1, "companies") == {}
+
+
+def test_async_session(simulator):
+    async def main():
+        async with AsyncClient("token", rate_limit=1000) as client:
+            client.interface.base_url = simulator.url
+            deal = await client.crm.get_object(DEAL, 1)
+            company = await client.crm.get_object(COMPANY, 3)
+
+            with pytest.raises(Exception, match="async with"):
+                with client.crm.session():
+                    pass
+
+            async with client.crm.session() as session:
+                deal.amount = "100"
+                await deal.associate(company)
+                assert session.dirty == [deal]
+
+            return session
+
+    session = asyncio.run(main())
+
+    assert session.errors == [] and session.dirty == []
+    assert simulator.portal.properties("deals", 1)["amount"] == "100"
+    assert list(simulator.portal.associated("deals", 1, "companies")) == [3]
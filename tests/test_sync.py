@@ -0,0 +1,99 @@
+import pytest
+from simulator import HubSpotSimulator
+
+from HubSpot import Client
+from HubSpot.CRM import DEAL, LocalMirror, SyncEngine
+
+
+def searches(simulator):
+    return simulator.calls.count(("POST", "/crm/v3/objects/deals/search"))
+
+
+def failing_search(hs_factory, monkeypatch, on_call, action):
+    """ Runs action before the on_call'th search """
+
+    search = hs_factory.search
+    calls = []
+
+    def wrapped(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == on_call:
+            action()
+        return search(*args, **kwargs)
+
+    monkeypatch.setattr(hs_factory, "search", wrapped)
+
+
+def test_sync_mirrors_everything_then_only_changes(simulator, client):
+    mirror = LocalMirror()
+
+    assert SyncEngine(client.crm.hs_factory, mirror, page_size=25).sync(DEAL) >= 100
+    assert mirror.count(DEAL) == 100
+
+    client.crm.batch_update(DEAL, [(7, {"amount": "123"})])
+    before = searches(simulator)
+    client.crm.sync(DEAL, mirror, ["amount"])
+
+    assert mirror.get(DEAL, 7)["properties"]["amount"] == "123"
+    assert searches(simulator) - before == 1
+
+
+def test_an_object_changed_mid_sync_does_not_hide_the_next(simulator, client, monkeypatch):
+    mirror = LocalMirror()
+    # Moves an object already read to the end, as an edit in HubSpot would, shifting the rest down one
+    failing_search(client.crm.hs_factory, monkeypatch, 2,
+                   lambda: simulator.portal.update("deals", 5, {"amount": "1"}))
+
+    SyncEngine(client.crm.hs_factory, mirror, page_size=25).sync(DEAL, ["amount"])
+
+    assert mirror.count(DEAL) == 100
+    assert mirror.get(DEAL, 5)["properties"]["amount"] == "1"
+
+
+def test_a_crashed_sync_resumes_from_its_checkpoint(simulator, client, monkeypatch):
+    mirror = LocalMirror()
+    engine = SyncEngine(client.crm.hs_factory, mirror, page_size=25)
+
+    def crash():
+        raise Exception("lost the connection")
+
+    with monkeypatch.context() as patch:
+        failing_search(client.crm.hs_factory, patch, 3, crash)
+        with pytest.raises(Exception, match="lost the connection"):
+            engine.sync(DEAL)
+
+    # Each page starts from the last modified date of the one before, so reads its last object again
+    assert mirror.count(DEAL) == 49
+    assert mirror.checkpoint(DEAL) == (mirror.get(DEAL, 49)["properties"]["hs_lastmodifieddate"], None)
+
+    before = searches(simulator)
+    engine.sync(DEAL)
+
+    assert mirror.count(DEAL) == 100
+    # Carried on from the last object read, rather than starting again
+    assert searches(simulator) - before == 3
+
+
+def test_objects_sharing_a_modified_date_are_paged_by_id(simulator, client):
+    portal = simulator.portal
+    stamp = portal.properties("deals", 1)["hs_lastmodifieddate"]
+    for hs_id in range(1, 61):
+        portal.changed[("deals", hs_id)] = {**portal.properties("deals", hs_id), "hs_lastmodifieddate": stamp}
+
+    mirror = LocalMirror()
+    SyncEngine(client.crm.hs_factory, mirror, page_size=25).sync(DEAL)
+
+    assert mirror.count(DEAL) == 100
+    assert mirror.checkpoint(DEAL) == (portal.properties("deals", 100)["hs_lastmodifieddate"], None)
+
+
+def test_sync_crosses_the_search_cap():
+    with HubSpotSimulator(records=10250) as simulator:
+        client = Client("token", rate_limit=1000)
+        client.interface.base_url = simulator.url
+
+        mirror = LocalMirror()
+        client.crm.sync(DEAL, mirror)
+        client.interface.pool.close()
+
+    assert mirror.count(DEAL) == 10250
@@ -0,0 +1,128 @@
+import io
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+from requests import HTTPError
+
+from HubSpot.Files.UploadIndex import UploadIndex
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Uploads a file in a fresh process and prints its peak RSS in KB before and after
+UPLOAD = textwrap.dedent("""
+    import resource
+    import sys
+    from pathlib import Path
+
+    sys.path.insert(0, sys.argv[1])
+    from HubSpot import Client
+
+    client = Client("token", rate_limit=1000)
+    client.interface.base_url = sys.argv[2]
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    uploaded = client.files.upload(Path(sys.argv[3]), "PRIVATE", "/tests")
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(before, after, uploaded.size)
+""")
+
+
+class Unseekable(io.RawIOBase):
+    def __init__(self, data: bytes):
+        self.data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        chunk = self.data.read(len(buffer))
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="ru_maxrss is read as KB, as Linux reports it")
+def test_large_upload_memory_stays_flat(simulator, tmp_path):
+    size = 2 << 30
+    upload = tmp_path / "large.bin"
+    with upload.open("wb") as f:
+        # Sparse, so the test needs no disk space
+        f.truncate(size)
+
+    result = subprocess.run([sys.executable, "-c", UPLOAD, os.path.join(HERE, ".."), simulator.url, str(upload)],
+                            capture_output=True, text=True, timeout=600, check=True)
+    before, after, uploaded = (int(value) for value in result.stdout.split())
+
+    assert uploaded > size
+    assert after - before < 32 * 1024
+
+
+def test_file_name_is_escaped(simulator, client):
+    uploaded = client.files.upload(io.BytesIO(b"data"), "PRIVATE", "/tests", file_name='a"b\r\nc.txt')
+
+    assert uploaded.name == "a%22b%0D%0Ac"
+    assert uploaded.extension == "txt"
+
+
+def test_unseekable_upload_raises_the_http_error(simulator, client):
+    simulator.script(429, {"Retry-After": "0"})
+
+    with pytest.raises(HTTPError) as raised:
+        client.files.upload(Unseekable(b"data"), "PRIVATE", "/tests", file_name="data.bin")
+
+    assert raised.value.response.status_code == 429
+    assert simulator.calls == [("POST", "/files/v3/files")]
+
+
+def test_seekable_upload_is_retried(simulator, client):
+    simulator.script(429, {"Retry-After": "0"})
+
+    uploaded = client.files.upload(io.BytesIO(b"data"), "PRIVATE", "/tests", file_name="data.bin")
+
+    assert uploaded.name == "data"
+    assert len(simulator.calls) == 2
+
+
+def uploads(simulator):
+    return simulator.calls.count(("POST", "/files/v3/files"))
+
+
+def test_upload_many_returns_files_in_the_order_given(simulator, client, tmp_path):
+    paths = []
+    for index in range(6):
+        path = tmp_path / f"file{index}.txt"
+        path.write_bytes(f"content {index}".encode())
+        paths.append(path)
+
+    uploaded = client.files.upload_many(paths, "PRIVATE", "/tests", max_workers=3)
+
+    assert [file.name for file in uploaded] == [f"file{index}" for index in range(6)]
+    assert uploads(simulator) == 6
+
+
+def test_upload_many_sends_identical_files_once(simulator, client, tmp_path):
+    paths = [tmp_path / "a.txt", tmp_path / "b.txt", tmp_path / "c.txt"]
+    for path in paths[:2]:
+        path.write_bytes(b"same")
+    paths[2].write_bytes(b"other")
+
+    uploaded = client.files.upload_many(paths, "PRIVATE", "/tests", index=UploadIndex())
+
+    assert uploads(simulator) == 2
+    assert uploaded[0].hs_id == uploaded[1].hs_id != uploaded[2].hs_id
+
+
+def test_upload_many_skips_files_in_a_saved_index(simulator, client, tmp_path, monkeypatch):
+    path = tmp_path / "a.txt"
+    path.write_bytes(b"data")
+    closed = []
+    monkeypatch.setattr(UploadIndex, "close", lambda self: closed.append(self) or self._connection.close())
+
+    first = client.files.upload_many([path], "PRIVATE", "/tests", index=tmp_path / "uploads.db")
+    again = client.files.upload_many([path], "PRIVATE", "/tests", index=tmp_path / "uploads.db")
+
+    assert uploads(simulator) == 1
+    assert again[0].hs_id == first[0].hs_id
+    assert len(closed) == 2